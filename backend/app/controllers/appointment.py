@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session, joinedload
 from app.models import UserAccount, Appointment
 from app.schemas import UserCreate, AppointmentCreate, AppointmentUpdate
 from config.security import hash_password
+from app.services import notification_service, patient_access
 from datetime import datetime
 
 def create_appointment(db: Session, appointment: AppointmentCreate, user_id: int):
@@ -25,8 +26,13 @@ def update_appointment(db: Session, appointment_id: int, appointment: Appointmen
     db_appointment = get_appointment(db, appointment_id)
     if db_appointment:
         update_data = appointment.dict(exclude_unset=True)
+        rescheduled = "appointment_date" in update_data and update_data["appointment_date"] != db_appointment.appointment_date
         for key, value in update_data.items():
             setattr(db_appointment, key, value)
+        if rescheduled:
+            notification_service.reschedule_appointment_notifications(db, db_appointment, commit=False)
+        if "status" in update_data or "doctor_id" in update_data:
+            patient_access.invalidate(db)
         db.commit()
         db.refresh(db_appointment)
     return db_appointment
@@ -34,7 +40,9 @@ def update_appointment(db: Session, appointment_id: int, appointment: Appointmen
 def delete_appointment(db: Session, appointment_id: int):
     db_appointment = get_appointment(db, appointment_id)
     if db_appointment:
+        notification_service.withdraw_appointment_notifications(db, appointment_id, commit=False)
         db.delete(db_appointment)
+        patient_access.invalidate(db)
         db.commit()
         return True
     return False
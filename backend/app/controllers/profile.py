@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from app.models.user import UserAccount
 from app.schemas.user import UserProfileUpdate
+from app.services import community_service
 from fastapi import HTTPException, status
 import os
 from datetime import datetime
@@ -22,6 +23,10 @@ def update_user_profile(db: Session, user_id: int, profile_update: UserProfileUp
 def update_profile_picture(db: Session, user_id: int, profile_picture_path: str):
     user = db.query(UserAccount).filter(UserAccount.id == user_id).first()
     user.profile_picture = profile_picture_path
+    # Thumbnails of the previous picture no longer apply
+    user.profile_picture_variants = None
+    # Cached feed pages still link the previous picture, which is deleted
+    community_service.invalidate_feed(db)
     db.commit()
     db.refresh(user)
     return user 
\ No newline at end of file
@@ -1,15 +1,26 @@
 from config.database import Base
 from .user import UserAccount
 from .appointment import Appointment
-from .document import Document
+from .document import Document, DocumentBlob
 from .comment import Comment, Reply
-from .notification import Notification
+from .notification import Notification, NotificationActor
+from .cache_generation import CacheGeneration
+from .community_change import CommunityChange
+from .moderation import ModerationTerm, ModerationQueueItem
+from .upload_session import UploadSession
 
 __all__ = [
     "UserAccount",
     "Appointment",
     "Document",
+    "DocumentBlob",
     "Comment",
     "Reply",
-    "Notification"
+    "Notification",
+    "NotificationActor",
+    "CacheGeneration",
+    "CommunityChange",
+    "ModerationTerm",
+    "ModerationQueueItem",
+    "UploadSession"
 ]
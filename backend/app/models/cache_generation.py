@@ -0,0 +1,13 @@
+from sqlalchemy import BigInteger, Column, String
+from config.database import Base
+
+class CacheGeneration(Base):
+    """
+    Version counter per shared cache. Writers bump it in the same transaction
+    as the change; every worker compares it with the version its local cache
+    was built from.
+    """
+    __tablename__ = "cache_generations"
+
+    name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
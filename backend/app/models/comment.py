@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Table
+import time
+
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, DateTime, Text, Table, Index, DDL, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from config.database import Base
@@ -9,6 +11,8 @@ comment_likes = Table(
     Base.metadata,
     Column('user_id', Integer, ForeignKey('user_account.id', ondelete='CASCADE')),
     Column('comment_id', Integer, ForeignKey('comments.id', ondelete='CASCADE')),
+    # One like per user per comment; also the conflict target of the like toggle
+    Index('uq_comment_likes_user_comment', 'user_id', 'comment_id', unique=True),
 )
 
 class Comment(Base):
@@ -18,20 +22,35 @@ class Comment(Base):
     content = Column(Text, nullable=False)
     user_id = Column(Integer, ForeignKey("user_account.id", ondelete="CASCADE"), nullable=False)
     likes = Column(Integer, default=0, nullable=False)
+    # Denormalized count of replies, kept in step by create/delete reply
+    reply_count = Column(Integer, default=0, server_default="0", nullable=False)
+    # Trending score (see app/services/hot_ranking.py), decayed up to
+    # hot_decayed_at, which is kept as unix time so the decay is plain arithmetic
+    hot_score = Column(Float, default=1.0, server_default="1", nullable=False)
+    hot_decayed_at = Column(Float, default=time.time, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
     user = relationship("UserAccount", back_populates="comments")
-    replies = relationship("Reply", back_populates="comment", cascade="all, delete-orphan")
+    replies = relationship("Reply", back_populates="comment", cascade="all, delete-orphan", order_by="Reply.created_at")
+    # Never loaded by the feed; is_liked is answered from comment_likes directly
     liked_by = relationship(
         "UserAccount",
         secondary=comment_likes,
         backref="liked_comments",
-        lazy="joined"
+        lazy="select"
+    )
+
+    __table_args__ = (
+        # Keyset pagination of the feed on (created_at, id)
+        Index("ix_comments_created_at_id", "created_at", "id"),
+        # Keyset pagination of the hot feed on (hot_score, id)
+        Index("ix_comments_hot_score_id", "hot_score", "id"),
     )
 
-    def to_dict(self, current_user=None):
+    def to_dict(self, is_liked=False, replies=(), replies_cursor=None):
+        """``replies`` is the preview shown in the feed, not the whole thread."""
         return {
             "id": self.id,
             "content": self.content,
@@ -43,10 +62,13 @@ class Comment(Base):
                 "first_name": self.user.first_name,
                 "last_name": self.user.last_name,
                 "role": self.user.role,
-                "profile_picture": self.user.profile_picture
+                "profile_picture": self.user.profile_picture,
+                "profile_picture_variants": self.user.profile_picture_variants
             },
-            "replies": [reply.to_dict() for reply in self.replies],
-            "is_liked": any(user.id == current_user.id for user in self.liked_by) if current_user else False
+            "replies": [reply.to_dict() for reply in replies],
+            "reply_count": self.reply_count,
+            "replies_cursor": replies_cursor,
+            "is_liked": is_liked
         }
 
 class Reply(Base):
@@ -63,6 +85,11 @@ class Reply(Base):
     comment = relationship("Comment", back_populates="replies")
     user = relationship("UserAccount", back_populates="replies")
 
+    __table_args__ = (
+        # Reply previews and keyset pagination of a thread on (created_at, id)
+        Index("ix_replies_comment_id_created_at", "comment_id", "created_at"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -75,6 +102,22 @@ class Reply(Base):
                 "first_name": self.user.first_name,
                 "last_name": self.user.last_name,
                 "role": self.user.role,
-                "profile_picture": self.user.profile_picture
+                "profile_picture": self.user.profile_picture,
+                "profile_picture_variants": self.user.profile_picture_variants
             }
-        } 
\ No newline at end of file
+        } 
+
+# Full-text search (Postgres only): a generated tsvector column with a GIN
+# index on both tables, so Postgres keeps it current on every write. It is
+# not mapped on the models; search_service refers to it by name.
+# 'simple' does no stemming, since posts are written in English and French.
+SEARCH_CONFIG = "simple"
+
+for _table in (Comment.__table__, Reply.__table__):
+    event.listen(_table, "after_create", DDL(
+        "ALTER TABLE %(table)s ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS (to_tsvector('{SEARCH_CONFIG}', content)) STORED"
+    ).execute_if(dialect="postgresql"))
+    event.listen(_table, "after_create", DDL(
+        "CREATE INDEX ix_%(table)s_search_vector ON %(table)s USING gin (search_vector)"
+    ).execute_if(dialect="postgresql"))
@@ -0,0 +1,33 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String
+from datetime import datetime
+
+from config.database import Base
+
+class CommunityChange(Base):
+    """
+    Append-only log of community writes, read by GET /community/changes.
+    ``seq`` is the sync watermark, numbered in commit order after the write
+    commits (see app/services/change_log.py); deletions are kept as tombstone
+    rows.
+    """
+    __tablename__ = "community_changes"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    seq = Column(BigInteger, nullable=True)  # None until sequenced
+    entity = Column(String, nullable=False)  # "comment" or "reply"
+    entity_id = Column(Integer, nullable=False)
+    comment_id = Column(Integer, nullable=False)  # the comment itself, or the reply's parent
+    op = Column(String, nullable=False)  # "upsert", "delete" or "likes"
+    likes = Column(Integer, nullable=True)  # new count for "likes" changes
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_community_changes_seq", "seq", unique=True),
+        # What the sequencer still has to number
+        Index(
+            "ix_community_changes_unsequenced", "id",
+            postgresql_where=seq.is_(None), sqlite_where=seq.is_(None)
+        ),
+        # SQLite would otherwise reuse ids once old rows are pruned
+        {"sqlite_autoincrement": True}
+    )
@@ -1,8 +1,13 @@
+import secrets
+
 from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from config.database import Base
 
+def new_public_id() -> str:
+    return secrets.token_urlsafe(12)
+
 class Document(Base):
     __tablename__ = "documents"
 
@@ -11,7 +16,26 @@ class Document(Base):
     name = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
     content_type = Column(String, nullable=False)
-    timestamp = Column(String, nullable=False)  # Used as document_id in API
+    public_id = Column(String, nullable=False, unique=True, default=new_public_id)  # Used as document_id in API
+    # Content address of the stored file; NULL for files uploaded before deduplication
+    sha256 = Column(String(64), ForeignKey("document_blobs.sha256"), nullable=True, index=True)
+    size = Column(Integer, nullable=True)
+    uploaded_by = Column(Integer, ForeignKey("user_account.id", ondelete="SET NULL"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    user = relationship("UserAccount", back_populates="documents") 
\ No newline at end of file
+    user = relationship("UserAccount", back_populates="documents", foreign_keys=[user_id])
+
+class DocumentBlob(Base):
+    """
+    One stored file per distinct content, shared by every Document row with
+    the same SHA-256. ``refcount`` is the number of those rows; the file is
+    deleted when it drops to zero.
+    """
+    __tablename__ = "document_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(Integer, nullable=False)
+    content_type = Column(String, nullable=False)
+    file_path = Column(String, nullable=False)
+    refcount = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Index
+from datetime import datetime
+
+from config.database import Base
+
+class ModerationTerm(Base):
+    __tablename__ = "moderation_terms"
+
+    id = Column(Integer, primary_key=True, index=True)
+    term = Column(String, nullable=False, unique=True)  # normalized, see moderation.normalize
+    created_by = Column(Integer, ForeignKey("user_account.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class ModerationQueueItem(Base):
+    """A comment or reply that matched moderation terms, waiting for review."""
+    __tablename__ = "moderation_queue"
+
+    id = Column(Integer, primary_key=True, index=True)
+    entity = Column(String, nullable=False)  # "comment" or "reply"
+    entity_id = Column(Integer, nullable=False)
+    # The comment itself, or the reply's parent. Not a foreign key: reviewed
+    # entries outlive the posts they removed
+    comment_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, ForeignKey("user_account.id", ondelete="CASCADE"), nullable=False)
+    matched_terms = Column(JSON, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending, approved, removed
+    reviewed_by = Column(Integer, ForeignKey("user_account.id", ondelete="SET NULL"), nullable=True)
+    reviewed_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("uq_moderation_queue_entity", "entity", "entity_id", unique=True),
+        Index("ix_moderation_queue_status_id", "status", "id"),
+    )
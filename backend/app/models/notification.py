@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -11,15 +12,48 @@ class Notification(Base):
     user_id = Column(Integer, ForeignKey("user_account.id", ondelete="CASCADE"))
     actor_id = Column(Integer, ForeignKey("user_account.id", ondelete="SET NULL"), nullable=True)
     type = Column(String, nullable=False)
-    message = Column(String, nullable=False)
+    message = Column(String, nullable=True)  # Only free-text notifications; typed ones render on read
     link = Column(String, nullable=True)
-    notification_metadata = Column(JSON, nullable=True)
+    notification_metadata = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     is_read = Column(Integer, default=0)
 
+    # Aggregation: unread notifications sharing a group_key (e.g. all likes on
+    # one comment) are folded into a single row counting the distinct actors,
+    # who are listed in notification_actors.
+    group_key = Column(String, nullable=True)
+    actor_count = Column(Integer, nullable=False, default=1, server_default="1")
+
     # Relationships
     user = relationship("UserAccount", foreign_keys=[user_id], back_populates="notifications")
     actor = relationship("UserAccount", foreign_keys=[actor_id])
 
-    
-    
\ No newline at end of file
+    __table_args__ = (
+        # Serves unread counts and the set-based mark-read UPDATE
+        Index("ix_notifications_user_unread", "user_id", "is_read"),
+        # Containment (@>) lookups on metadata keys such as appointment_id,
+        # comment_id or recent_actors[].id
+        Index(
+            "ix_notifications_metadata",
+            "notification_metadata",
+            postgresql_using="gin",
+            postgresql_ops={"notification_metadata": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+        # At most one unread aggregate per (recipient, group); this is the
+        # conflict target of the upsert in notification_service.
+        Index(
+            "uq_notifications_unread_group",
+            "user_id",
+            "group_key",
+            unique=True,
+            postgresql_where=text("is_read = 0 AND group_key IS NOT NULL"),
+            sqlite_where=text("is_read = 0 AND group_key IS NOT NULL"),
+        ),
+    )
+
+class NotificationActor(Base):
+    """Everyone folded into an aggregate notification, so each is counted once."""
+    __tablename__ = "notification_actors"
+
+    notification_id = Column(Integer, ForeignKey("notifications.id", ondelete="CASCADE"), primary_key=True)
+    actor_id = Column(Integer, ForeignKey("user_account.id", ondelete="CASCADE"), primary_key=True)
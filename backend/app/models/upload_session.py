@@ -0,0 +1,31 @@
+import secrets
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, BigInteger
+
+from config.database import Base
+
+def new_session_id() -> str:
+    return secrets.token_urlsafe(24)
+
+class UploadSession(Base):
+    """
+    A resumable document upload in progress. Chunks are appended to a staging
+    file until ``offset`` reaches ``size``; completing the session checks the
+    file against ``sha256`` and turns it into a Document owned by ``owner_id``.
+    """
+    __tablename__ = "upload_sessions"
+
+    id = Column(String, primary_key=True, default=new_session_id)
+    user_id = Column(Integer, ForeignKey("user_account.id", ondelete="CASCADE"), nullable=False, index=True)
+    # The patient the document is for; the uploader themselves unless a doctor uploads
+    owner_id = Column(Integer, ForeignKey("user_account.id", ondelete="CASCADE"), nullable=False)
+    name = Column(String, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    offset = Column(BigInteger, nullable=False, default=0, server_default="0")
+    content_type = Column(String, nullable=True)  # sniffed from the first chunk
+    # Set while a chunk is being written, so concurrent PUTs cannot interleave
+    locked_until = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
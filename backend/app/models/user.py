@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from config.database import Base
@@ -16,6 +16,9 @@ class UserAccount(Base):
     password = Column(String, nullable=False)
     phone = Column(String)
     profile_picture = Column(String, nullable=True)
+    # Thumbnail URLs by edge size ({"48": ..., "128": ..., "512": ...}), set
+    # once the current profile_picture has been processed
+    profile_picture_variants = Column(JSON, nullable=True)
     bio = Column(Text, nullable=True)
     address = Column(String, nullable=True)
     city = Column(String, nullable=True)
@@ -34,7 +37,7 @@ class UserAccount(Base):
     appointments_as_patient = relationship("Appointment", foreign_keys="[Appointment.user_id]", back_populates="user")
     appointments_as_doctor = relationship("Appointment", foreign_keys="[Appointment.doctor_id]", back_populates="doctor")
     notifications = relationship("Notification", back_populates="user", foreign_keys="[Notification.user_id]", cascade="all, delete-orphan")
-    documents = relationship("Document", back_populates="user")
+    documents = relationship("Document", back_populates="user", foreign_keys="[Document.user_id]")
     comments = relationship("Comment", back_populates="user", cascade="all, delete-orphan")
     replies = relationship("Reply", back_populates="user", cascade="all, delete-orphan")
 
@@ -3,11 +3,13 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from typing import Optional
 from app.middleware.admin import get_admin_user
-from app.models import Appointment, UserAccount, Comment, Reply, Notification
+from app.models import Appointment, UserAccount, Comment, Reply, Notification, Document
 from config.database import get_db
 from pydantic import BaseModel
-from app.services import notification_service
-from app.schemas.notification import NotificationCreate
+from app.services import change_log, community_service, document_storage, notification_service, patient_access
+from app.services.storage import storage
+from app.services.thumbnails import picture_keys
+from app.services.feed_cache import feed_cache
 from app.schemas.user import UserResponse
 from config.security import get_current_user
 
@@ -53,19 +55,12 @@ def confirm_appointment(
     # Update appointment
     appointment.status = "confirmed"
     appointment.doctor_id = doctor.id
+    patient_access.invalidate(db)
     db.commit()
     
-    # Create notification for the patient
-    patient_notification = NotificationCreate(
-        message=f"Your appointment scheduled for {appointment.appointment_date.strftime('%B %d, %Y at %I:%M %p')} has been confirmed with Dr. {doctor.first_name} {doctor.last_name}."
-    )
-    notification_service.create_notification(db, user_id=appointment.user_id, notif=patient_notification)
-    
-    # Create notification for the doctor
-    doctor_notification = NotificationCreate(
-        message=f"You have been assigned to an appointment on {appointment.appointment_date.strftime('%B %d, %Y at %I:%M %p')} with {appointment.user.first_name} {appointment.user.last_name}."
-    )
-    notification_service.create_notification(db, user_id=doctor.id, notif=doctor_notification)
+    # Notify the patient and the assigned doctor
+    notification_service.create_appointment_confirmed_notification(db, appointment, doctor)
+    notification_service.create_appointment_assigned_notification(db, appointment, doctor)
     
     return {"message": "Appointment confirmed successfully"}
 
@@ -82,16 +77,30 @@ def reject_appointment(
     
     appointment.status = "rejected"
     appointment.rejection_reason = rejection_data.reason
+    patient_access.invalidate(db)
     db.commit()
     
     # Create notification for the user
-    notification = NotificationCreate(
-        message=f"Your appointment scheduled for {appointment.appointment_date.strftime('%B %d, %Y at %I:%M %p')} has been rejected. Reason: {rejection_data.reason}"
-    )
-    notification_service.create_notification(db, user_id=appointment.user_id, notif=notification)
+    notification_service.create_appointment_rejected_notification(db, appointment, rejection_data.reason)
     
     return {"message": "Appointment rejected successfully"}
 
+@router.post("/community/reconcile-likes")
+def reconcile_likes(admin: UserAccount = Depends(get_admin_user), db: Session = Depends(get_db)):
+    try:
+        repaired = community_service.reconcile_like_counts(db)
+    except community_service.LikeDeltasPending:
+        raise HTTPException(
+            status_code=409,
+            detail="Like counters are write-behind. Stop the API and run reconcile_likes.py --workers-stopped."
+        )
+    return {"message": "Like counters reconciled", "repaired": repaired}
+
+@router.get("/community/feed-cache")
+def feed_cache_stats(admin: UserAccount = Depends(get_admin_user)):
+    # Counters are per worker process
+    return feed_cache.stats()
+
 @router.get("/users")
 def list_users(admin: UserAccount = Depends(get_admin_user), db: Session = Depends(get_db)):
     return db.query(UserAccount).all()
@@ -102,7 +111,9 @@ def delete_appointment(appointment_id: int, admin: UserAccount = Depends(get_adm
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     
+    notification_service.withdraw_appointment_notifications(db, appointment.id, commit=False)
     db.delete(appointment)
+    patient_access.invalidate(db)
     db.commit()
     return {"message": "Appointment deleted successfully"}
 
@@ -122,10 +133,7 @@ def update_user_role(
     db.refresh(user)
     
     # Create notification for the user
-    notification = NotificationCreate(
-        message=f"Your account role has been updated to {role_update.role}."
-    )
-    notification_service.create_notification(db, user_id=user.id, notif=notification)
+    notification_service.create_role_update_notification(db, user_id=user.id, role=role_update.role)
     
     return user
 
@@ -171,16 +179,36 @@ async def ban_user(
             (Notification.actor_id == user_id)
         ).delete(synchronize_session=False)
 
-        # Delete all replies by the user
+        # Delete all replies by the user, then recount the threads they were in
+        replies = db.query(Reply.id, Reply.comment_id).filter(Reply.user_id == user_id).all()
         db.query(Reply).filter(Reply.user_id == user_id).delete(synchronize_session=False)
+        community_service.refresh_reply_counts(db, {comment_id for _, comment_id in replies})
         
         # Delete all comments by the user
+        comment_ids = [comment_id for comment_id, in db.query(Comment.id).filter(Comment.user_id == user_id)]
         db.query(Comment).filter(Comment.user_id == user_id).delete(synchronize_session=False)
+        change_log.record_many(db, [
+            change_log.change("reply", "delete", reply_id, comment_id) for reply_id, comment_id in replies
+        ] + [
+            change_log.change("comment", "delete", comment_id, comment_id) for comment_id in comment_ids
+        ])
+        community_service.invalidate_feed(db)
+
+        # Delete their documents; the files no other document shares go after the commit
+        released = [
+            key for document in db.query(Document).filter(Document.user_id == user_id).all()
+            if (key := document_storage.release(db, document)) is not None
+        ]
+        picture = picture_keys(user_to_ban.profile_picture, user_to_ban.profile_picture_variants)
         
         # Finally, delete the user account
         db.delete(user_to_ban)
         db.commit()
 
+        await document_storage.delete_released(db, released)
+        for key in picture:
+            await storage.delete(key)
+
         return {"message": f"User {user_to_ban.first_name} {user_to_ban.last_name} has been banned and all their data has been removed"}
     
     except Exception as e:
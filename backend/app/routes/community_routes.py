@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List, Literal, Optional
 from datetime import datetime
 
 from app.models import UserAccount, Comment, Reply
-from app.schemas.comment import CommentCreate, CommentResponse, ReplyCreate, ReplyResponse
-from app.services import notification_service
+from app.schemas.comment import CommentCreate, CommentResponse, ReplyCreate, ReplyResponse, SearchResults
+from app.services import change_log, community_service, moderation, notification_service, search_service
+from app.utils.json_response import FastJSONResponse
 from config.database import get_db
 from config.security import get_current_user
 
@@ -16,23 +17,56 @@ router = APIRouter(
 
 @router.get("/comments", response_model=List[CommentResponse])
 def get_comments(
+    limit: int = Query(community_service.DEFAULT_PAGE_SIZE, ge=1, le=community_service.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: Literal["new", "hot"] = "new",
     db: Session = Depends(get_db),
     current_user: UserAccount = Depends(get_current_user)
 ):
-    comments = (
-        db.query(Comment)
-        .options(
-            joinedload(Comment.user),
-            joinedload(Comment.replies).joinedload(Reply.user),
-            joinedload(Comment.liked_by)
+    try:
+        comments, next_cursor = community_service.get_feed_page(
+            db, current_user.id, limit=limit, cursor=cursor, sort=sort
         )
-        .order_by(Comment.created_at.desc())
-        .all()
-    )
-    
-    # Get the current user from this session to avoid session conflicts
-    user_in_session = db.query(UserAccount).filter(UserAccount.id == current_user.id).first()
-    return [comment.to_dict(user_in_session) for comment in comments]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # The body stays a plain list; the next page is requested with ?cursor=
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return FastJSONResponse(comments, headers=headers)
+
+@router.get("/search", response_model=SearchResults)
+def search_community(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(search_service.DEFAULT_PAGE_SIZE, ge=1, le=search_service.MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0, le=search_service.MAX_OFFSET),
+    db: Session = Depends(get_db),
+    current_user: UserAccount = Depends(get_current_user)
+):
+    results, next_offset = search_service.search(db, q, limit=limit, offset=offset)
+    return FastJSONResponse({"results": results, "next_offset": next_offset})
+
+@router.get("/changes")
+def get_changes(
+    since: Optional[int] = Query(None, ge=0),
+    limit: int = Query(change_log.MAX_PAGE_SIZE, ge=1, le=change_log.MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user: UserAccount = Depends(get_current_user)
+):
+    """
+    Comment and reply changes after the ``since`` watermark. Without
+    ``since`` only the current watermark is returned; clients read it before
+    loading the feed and poll from there.
+    """
+    if since is None:
+        return {"changes": [], "watermark": change_log.latest_seq(db), "has_more": False}
+    try:
+        changes, watermark, has_more = change_log.changes_since(
+            db, since, limit,
+            liked_ids=lambda ids: community_service.liked_comment_ids(db, current_user.id, ids)
+        )
+    except change_log.ResyncRequired:
+        raise HTTPException(status_code=410, detail="Watermark expired, reload the feed")
+    return FastJSONResponse({"changes": changes, "watermark": watermark, "has_more": has_more})
 
 @router.post("/comments", response_model=CommentResponse)
 def create_comment(
@@ -46,20 +80,15 @@ def create_comment(
         created_at=datetime.utcnow()
     )
     db.add(db_comment)
+    db.flush()
+    # Serialized before the commit expires the instance; the author is
+    # current_user, already in this session
+    payload = db_comment.to_dict()
+    moderation.screen(db, "comment", db_comment.id, db_comment.id, current_user.id, db_comment.content)
+    change_log.record(db, "comment", "upsert", db_comment.id, db_comment.id)
+    community_service.invalidate_feed(db)
     db.commit()
-    db.refresh(db_comment)
-    
-    # Fetch the comment with user information
-    comment_with_user = (
-        db.query(Comment)
-        .options(
-            joinedload(Comment.user),
-            joinedload(Comment.replies).joinedload(Reply.user)
-        )
-        .filter(Comment.id == db_comment.id)
-        .first()
-    )
-    return comment_with_user
+    return FastJSONResponse(payload)
 
 @router.delete("/comments/{comment_id}")
 def delete_comment(
@@ -82,14 +111,32 @@ def delete_comment(
             db,
             comment_author_id=comment.user_id,
             admin=current_user,
-            post_title=f"Comment: {comment.content[:50]}...",  # Use truncated comment content as title
+            post_title=comment.content[:50],  # Use truncated comment content as title
             reason=reason or "Violated community guidelines"
         )
     
-    db.delete(comment)
+    community_service.remove_comment(db, comment)
     db.commit()
     return {"message": "Comment deleted successfully"}
 
+@router.get("/comments/{comment_id}/replies", response_model=List[ReplyResponse])
+def get_replies(
+    comment_id: int,
+    limit: int = Query(community_service.DEFAULT_PAGE_SIZE, ge=1, le=community_service.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: UserAccount = Depends(get_current_user)
+):
+    if not db.query(Comment.id).filter(Comment.id == comment_id).first():
+        raise HTTPException(status_code=404, detail="Comment not found")
+    try:
+        replies, next_cursor = community_service.get_replies_page(db, comment_id, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return FastJSONResponse(replies, headers=headers)
+
 @router.post("/comments/{comment_id}/replies", response_model=ReplyResponse)
 def create_reply(
     comment_id: int,
@@ -97,8 +144,8 @@ def create_reply(
     db: Session = Depends(get_db),
     current_user: UserAccount = Depends(get_current_user)
 ):
-    # Check if comment exists
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    # Check if comment exists; a plain row, so the commit below does not expire it
+    comment = db.query(Comment.id, Comment.user_id, Comment.content).filter(Comment.id == comment_id).first()
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
 
@@ -109,6 +156,12 @@ def create_reply(
         created_at=datetime.utcnow()
     )
     db.add(db_reply)
+    community_service.adjust_reply_count(db, comment_id, 1)
+    db.flush()
+    payload = db_reply.to_dict()
+    moderation.screen(db, "reply", db_reply.id, comment_id, current_user.id, db_reply.content)
+    change_log.record(db, "reply", "upsert", db_reply.id, comment_id)
+    community_service.invalidate_feed(db)
     db.commit()
     db.refresh(db_reply)
     
@@ -118,17 +171,11 @@ def create_reply(
             db,
             comment_author_id=comment.user_id,
             replier=current_user,
-            post_title=f"Comment: {comment.content[:50]}..."  # Use truncated comment content as title
+            post_title=comment.content[:50],  # Use truncated comment content as title
+            comment_id=comment.id
         )
     
-    # Fetch the reply with user information
-    reply_with_user = (
-        db.query(Reply)
-        .options(joinedload(Reply.user))
-        .filter(Reply.id == db_reply.id)
-        .first()
-    )
-    return reply_with_user
+    return FastJSONResponse(payload)
 
 @router.delete("/comments/{comment_id}/replies/{reply_id}")
 def delete_reply(
@@ -145,7 +192,7 @@ def delete_reply(
     if reply.user_id != current_user.id and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized to delete this reply")
     
-    db.delete(reply)
+    community_service.remove_reply(db, reply)
     db.commit()
     return {"message": "Reply deleted successfully"}
 
@@ -155,48 +202,35 @@ def like_comment(
     db: Session = Depends(get_db),
     current_user: UserAccount = Depends(get_current_user)
 ):
-    comment = (
-        db.query(Comment)
-        .options(
-            joinedload(Comment.liked_by),
-            joinedload(Comment.user)  # Add this to get comment author info
-        )
-        .filter(Comment.id == comment_id)
-        .first()
-    )
-    
+    comment = db.query(Comment.id, Comment.user_id, Comment.content).filter(Comment.id == comment_id).first()
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
     
-    # Get the current user from this session
-    user_in_session = db.query(UserAccount).filter(UserAccount.id == current_user.id).first()
-    
-    # Check if user has already liked the comment using IDs for comparison
-    already_liked = any(user.id == current_user.id for user in comment.liked_by)
-    
-    if already_liked:
-        # Unlike the comment
-        comment.liked_by = [user for user in comment.liked_by if user.id != current_user.id]
-        comment.likes = max(0, comment.likes - 1)  # Ensure likes don't go below 0
-        message = "Comment unliked successfully"
-    else:
-        # Like the comment
-        comment.liked_by.append(user_in_session)
-        comment.likes = comment.likes + 1
+    try:
+        is_liked, likes = community_service.toggle_like(db, comment_id, current_user.id)
+    except community_service.CommentNotFound:
+        # Deleted since the check above
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Comment not found")
+    db.commit()
+    community_service.publish_like_count(comment_id, likes)
+
+    if is_liked:
         # Create notification for the comment author
         if comment.user_id != current_user.id:  # Don't notify if user likes their own comment
             notification_service.create_like_notification(
                 db,
                 post_author_id=comment.user_id,
                 liker=current_user,
-                post_title=f"Comment: {comment.content[:50]}..."  # Use truncated comment content as title
+                post_title=comment.content[:50],  # Use truncated comment content as title
+                comment_id=comment.id
             )
         message = "Comment liked successfully"
-    
-    db.commit()
+    else:
+        message = "Comment unliked successfully"
     
     return {
         "message": message,
-        "likes": comment.likes,
-        "is_liked": not already_liked
-    } 
\ No newline at end of file
+        "likes": likes,
+        "is_liked": is_liked
+    }
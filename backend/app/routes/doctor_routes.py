@@ -1,17 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
 from typing import List
 from datetime import datetime, timedelta
-import os
-import shutil
-from pathlib import Path
-from fastapi.responses import FileResponse
 
 from app.models import UserAccount, Appointment, Document
 from app.schemas.appointment import Appointment as AppointmentSchema
-from app.schemas.document import Document as DocumentSchema
-from app.schemas.notification import NotificationCreate
-from app.services import notification_service
+from app.schemas.document import Document as DocumentSchema, DocumentLink
+from app.services import document_storage, notification_service, patient_access
+from app.services.storage import storage
+from app.utils import signed_urls, uploads
+from app.utils.file_response import storage_response
+from app.utils.zip_stream import ZipEntry, stream_zip, unique_names
 from config.database import get_db
 from config.security import get_current_user
 
@@ -20,14 +20,6 @@ router = APIRouter(
     tags=["doctor"]
 )
 
-# Create base uploads directory
-UPLOAD_DIR = Path("uploads")
-DOCUMENTS_DIR = UPLOAD_DIR / "documents"
-
-# Ensure directories exist
-UPLOAD_DIR.mkdir(exist_ok=True)
-DOCUMENTS_DIR.mkdir(exist_ok=True)
-
 def get_doctor_user(current_user: UserAccount = Depends(get_current_user)):
     if not current_user.is_doctor:
         raise HTTPException(status_code=403, detail="Access denied. User is not a doctor.")
@@ -63,6 +55,9 @@ async def get_doctor_calendar(
     result = []
     for appointment in appointments:
         if appointment.user:
+            # A confirmed appointment is what lets the doctor read the patient's files
+            if appointment.status == "confirmed":
+                signed_urls.sign_documents(appointment.user.documents, current_user.id)
             # Create a new appointment dict with all required fields
             appointment_dict = {
                 "id": appointment.id,
@@ -90,28 +85,52 @@ async def get_patient_document(
     Allow doctors to access patient documents if they have an appointment with the patient.
     """
     # First find the document
-    document = db.query(Document).filter(Document.timestamp == document_id).first()
+    document = db.query(Document).filter(Document.public_id == document_id).first()
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
 
     # Check if the doctor has an appointment with this patient
-    appointment = db.query(Appointment).filter(
-        Appointment.doctor_id == current_user.id,
-        Appointment.user_id == document.user_id,
-        Appointment.status == "confirmed"
-    ).first()
-
-    if not appointment:
+    if not patient_access.has_access(db, current_user.id, document.user_id):
         raise HTTPException(
             status_code=403, 
             detail="Access denied. You don't have a confirmed appointment with this patient."
         )
 
-    file_location = f"uploads/{document.file_path.replace('/uploads/', '')}"
-    if not os.path.isfile(file_location):
+    response = await storage_response(storage, document_storage.storage_key(document))
+    if response is None:
         raise HTTPException(status_code=404, detail="File not found")
         
-    return FileResponse(file_location)
+    return response
+
+@router.get("/patients/{patient_id}/documents.zip")
+async def download_patient_documents(
+    patient_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserAccount = Depends(get_doctor_user)
+):
+    """
+    All of a patient's documents as one ZIP archive, streamed as it is built.
+    Access is checked once for the whole archive.
+    """
+    if not patient_access.has_access(db, current_user.id, patient_id):
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied. No confirmed appointment with this patient."
+        )
+
+    documents = db.query(Document).filter(Document.user_id == patient_id).order_by(Document.created_at).all()
+    entries = [
+        ZipEntry(name, document_storage.storage_key(document), document.content_type, document.created_at)
+        for document, name in zip(documents, unique_names(document.name for document in documents))
+    ]
+    return StreamingResponse(
+        stream_zip(storage, entries),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="patient-{patient_id}-documents.zip"',
+            "Cache-Control": "private, no-store"
+        }
+    )
 
 @router.post("/patients/{patient_id}/documents", response_model=DocumentSchema)
 async def upload_patient_document(
@@ -125,85 +144,36 @@ async def upload_patient_document(
     Only allowed if the doctor has a confirmed appointment with the patient.
     """
     # Check if doctor has a confirmed appointment with this patient
-    appointment = db.query(Appointment).filter(
-        Appointment.doctor_id == current_user.id,
-        Appointment.user_id == patient_id,
-        Appointment.status == "confirmed"
-    ).first()
-
-    if not appointment:
+    if not patient_access.has_access(db, current_user.id, patient_id):
         raise HTTPException(
             status_code=403,
             detail="Access denied. No confirmed appointment with this patient."
         )
 
     try:
-        # Validate file type
-        allowed_types = {
-            'application/pdf': '.pdf',
-            'application/msword': '.doc',
-            'application/vnd.openxmlformats-officedocument.wordprocessingml.document': '.docx',
-            'image/jpeg': '.jpg',
-            'image/png': '.png'
-        }
-        
-        if file.content_type not in allowed_types:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid file type: {file.content_type}. Allowed types: PDF, DOC, DOCX, JPG, PNG"
-            )
-        
-        # Validate file size (max 10MB)
-        MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
-        file_size = 0
-        chunk_size = 1024 * 1024  # 1MB chunks
-        
-        while chunk := await file.read(chunk_size):
-            file_size += len(chunk)
-            if file_size > MAX_FILE_SIZE:
+        async with uploads.receive(
+            file, storage.staging_dir("documents"), uploads.DOCUMENT_TYPES, uploads.MAX_DOCUMENT_SIZE
+        ) as upload:
+            try:
+                # Identical content already stored is only referenced again
+                document = await document_storage.store_upload(
+                    db, upload, patient_id, current_user.id, file.filename
+                )
+            except OSError as e:
                 raise HTTPException(
-                    status_code=400,
-                    detail=f"File size ({file_size} bytes) exceeds maximum allowed size of 10MB"
+                    status_code=500,
+                    detail=f"Could not save the file: {str(e)}"
                 )
-        await file.seek(0)  # Reset file pointer
-        
-        # Generate unique filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_extension = allowed_types[file.content_type]
-        filename = f"{patient_id}_{timestamp}{file_extension}"
-        
-        # Save file
-        file_path = DOCUMENTS_DIR / filename
-        relative_path = f"documents/{filename}"
-        
-        try:
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Could not save the file: {str(e)}"
-            )
-        
-        # Create document record in database
-        document = Document(
-            user_id=patient_id,  # Assign to patient
-            name=file.filename,
-            file_path=f"/uploads/{relative_path}",
-            content_type=file.content_type,
-            timestamp=timestamp
-        )
-        db.add(document)
-        db.commit()
-        db.refresh(document)
 
         # Create notification for the patient
-        notification = NotificationCreate(
-            message=f"Dr. {current_user.first_name} {current_user.last_name} has uploaded a document: {file.filename}"
+        notification_service.create_document_uploaded_notification(
+            db,
+            patient_id=patient_id,
+            doctor=current_user,
+            document_name=file.filename
         )
-        notification_service.create_notification(db, user_id=patient_id, notif=notification)
         
-        return document
+        return signed_urls.sign_documents([document], current_user.id)[0]
         
     except HTTPException:
         raise
@@ -211,4 +181,33 @@ async def upload_patient_document(
         raise HTTPException(
             status_code=500,
             detail=f"An unexpected error occurred: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+@router.post("/patients/{patient_id}/documents/link", response_model=DocumentSchema)
+def link_patient_document(
+    patient_id: int,
+    link: DocumentLink,
+    db: Session = Depends(get_db),
+    current_user: UserAccount = Depends(get_doctor_user)
+):
+    """
+    Add a document the doctor already uploaded (to any patient) to this
+    patient's file by SHA-256, without sending the file again.
+    """
+    if not patient_access.has_access(db, current_user.id, patient_id):
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied. No confirmed appointment with this patient."
+        )
+
+    document = document_storage.link_existing(db, link.sha256, current_user.id, patient_id, link.name)
+    if document is None:
+        raise HTTPException(status_code=404, detail="No stored document with this content")
+
+    notification_service.create_document_uploaded_notification(
+        db,
+        patient_id=patient_id,
+        doctor=current_user,
+        document_name=link.name
+    )
+    return signed_urls.sign_documents([document], current_user.id)[0]
@@ -0,0 +1,153 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Literal, Optional
+
+from app.middleware.admin import get_admin_user
+from app.models import Comment, ModerationQueueItem, ModerationTerm, Reply, UserAccount
+from app.schemas.moderation import (
+    BulkModerationRequest, ModerationQueueItemOut, ModerationRemoval, ModerationTermOut, ModerationTermsCreate
+)
+from app.services import community_service, moderation, notification_service
+from config.database import get_db
+
+router = APIRouter(prefix="/admin/moderation", tags=["moderation"])
+
+DEFAULT_REASON = "Flagged by automatic moderation"
+BULK_REASON = "Violated community guidelines"
+
+@router.get("/terms", response_model=List[ModerationTermOut])
+def list_terms(admin: UserAccount = Depends(get_admin_user), db: Session = Depends(get_db)):
+    return db.query(ModerationTerm).order_by(ModerationTerm.term).all()
+
+@router.post("/terms")
+def add_terms(
+    payload: ModerationTermsCreate,
+    admin: UserAccount = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    added = moderation.add_terms(db, payload.terms, admin.id)
+    return {"message": "Moderation terms updated", "added": added}
+
+@router.delete("/terms/{term_id}")
+def delete_term(term_id: int, admin: UserAccount = Depends(get_admin_user), db: Session = Depends(get_db)):
+    if not moderation.remove_term(db, term_id):
+        raise HTTPException(status_code=404, detail="Term not found")
+    return {"message": "Moderation term deleted"}
+
+@router.get("/queue", response_model=List[ModerationQueueItemOut])
+def list_queue(
+    status: Literal["pending", "approved", "removed"] = "pending",
+    limit: int = Query(50, ge=1, le=200),
+    before_id: Optional[int] = None,
+    admin: UserAccount = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    query = db.query(ModerationQueueItem).filter(ModerationQueueItem.status == status)
+    if before_id is not None:
+        query = query.filter(ModerationQueueItem.id < before_id)
+    items = query.order_by(ModerationQueueItem.id.desc()).limit(limit).all()
+
+    # Post contents for the whole page in one query per table
+    contents = {"comment": {}, "reply": {}}
+    for entity, model in (("comment", Comment), ("reply", Reply)):
+        ids = [item.entity_id for item in items if item.entity == entity]
+        if ids:
+            contents[entity] = dict(db.query(model.id, model.content).filter(model.id.in_(ids)).all())
+
+    return [
+        {
+            "id": item.id,
+            "entity": item.entity,
+            "entity_id": item.entity_id,
+            "comment_id": item.comment_id,
+            "user_id": item.user_id,
+            "matched_terms": item.matched_terms,
+            "status": item.status,
+            "content": contents[item.entity].get(item.entity_id),
+            "created_at": item.created_at,
+            "reviewed_at": item.reviewed_at,
+        }
+        for item in items
+    ]
+
+def _pending_item(db: Session, item_id: int) -> ModerationQueueItem:
+    item = db.query(ModerationQueueItem).filter(ModerationQueueItem.id == item_id).first()
+    if not item:
+        raise HTTPException(status_code=404, detail="Queue entry not found")
+    if item.status != "pending":
+        raise HTTPException(status_code=409, detail="Queue entry was already reviewed")
+    return item
+
+@router.post("/queue/{item_id}/approve")
+def approve_post(item_id: int, admin: UserAccount = Depends(get_admin_user), db: Session = Depends(get_db)):
+    item = _pending_item(db, item_id)
+    moderation.mark_reviewed(item, "approved", admin.id)
+    db.commit()
+    return {"message": "Post approved"}
+
+@router.post("/queue/{item_id}/remove")
+def remove_post(
+    item_id: int,
+    removal: ModerationRemoval,
+    admin: UserAccount = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    item = _pending_item(db, item_id)
+    model = Comment if item.entity == "comment" else Reply
+    post = db.query(model).filter(model.id == item.entity_id).first()
+
+    moderation.mark_reviewed(item, "removed", admin.id)
+    if post is not None:
+        notification_service.create_comment_deletion_notification(
+            db,
+            comment_author_id=post.user_id,
+            admin=admin,
+            post_title=post.content[:50],
+            reason=removal.reason or DEFAULT_REASON
+        )
+        if item.entity == "comment":
+            community_service.remove_comment(db, post)
+        else:
+            community_service.remove_reply(db, post)
+    db.commit()
+    return {"message": "Post removed"}
+
+@router.post("/bulk-delete")
+def bulk_delete(
+    request: BulkModerationRequest,
+    admin: UserAccount = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Remove many comments and replies in one transaction and notify each
+    author once, however many of their posts were removed.
+    """
+    window = request.since is not None or request.until is not None
+    if not (request.comment_ids or request.reply_ids or request.author_id is not None or window):
+        raise HTTPException(status_code=400, detail="Select posts by id, author or time window")
+    # A window on its own must be closed, so a typo cannot wipe the whole community
+    if window and request.author_id is None and (request.since is None or request.until is None):
+        raise HTTPException(status_code=400, detail="A time window without an author needs both since and until")
+
+    comments, replies = community_service.find_posts(
+        db,
+        comment_ids=request.comment_ids,
+        reply_ids=request.reply_ids,
+        author_id=request.author_id,
+        since=request.since,
+        until=request.until
+    )
+    comment_ids = {comment.id for comment in comments}
+    replies_deleted = sum(1 for reply in replies if reply.comment_id not in comment_ids)
+    removed_per_author = community_service.bulk_remove(db, comments, replies, admin.id)
+    removed_per_author.pop(admin.id, None)
+    notified = notification_service.create_content_removal_notifications(
+        db, admin, removed_per_author, request.reason or BULK_REASON
+    )
+    db.commit()
+    return {
+        "message": "Posts removed",
+        "comments_deleted": len(comments),
+        "replies_deleted": replies_deleted,
+        "authors_notified": notified,
+    }
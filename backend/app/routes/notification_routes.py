@@ -1,19 +1,43 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from config.database import get_db
-from app.services import notification_service
-from app.schemas.notification import NotificationCreate, NotificationOut
+from app.services import notification_service, notification_templates
+from app.schemas.notification import NotificationCreate, NotificationOut, NotificationMarkRead, NotificationReadState
 from config.security import get_current_user
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
 @router.post("/", response_model=NotificationOut)
 def create(user_notification: NotificationCreate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    return notification_service.create_notification(db, user_id=current_user.id, notif=user_notification)
+    notification = notification_service.create_notification(db, user_id=current_user.id, notif=user_notification)
+    return notification_templates.to_out(notification, current_user.language)
 
 @router.get("/", response_model=list[NotificationOut])
 def get_notifications(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    return notification_service.get_user_notifications(db, user_id=current_user.id)
+    notifications = notification_service.get_user_notifications(db, user_id=current_user.id)
+    return notification_templates.render_notifications(notifications, current_user.language)
+
+@router.get("/unread-count")
+def get_unread_count(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    return {"unread_count": notification_service.count_unread(db, user_id=current_user.id)}
+
+@router.put("/mark-read", response_model=NotificationReadState)
+def mark_many_as_read(payload: NotificationMarkRead, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    if payload.ids is None and payload.up_to_id is None:
+        raise HTTPException(status_code=400, detail="Provide either ids or up_to_id")
+    if payload.ids is not None and not payload.ids:
+        updated = 0
+    else:
+        updated = notification_service.mark_many_as_read(
+            db,
+            user_id=current_user.id,
+            ids=payload.ids,
+            up_to_id=payload.up_to_id
+        )
+    return NotificationReadState(
+        updated=updated,
+        unread_count=notification_service.count_unread(db, user_id=current_user.id)
+    )
 
 @router.put("/{notification_id}/read")
 def mark_as_read(notification_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
@@ -35,12 +59,13 @@ def create_like_notification(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
-    return notification_service.create_like_notification(
+    notification = notification_service.create_like_notification(
         db, 
         post_author_id=post_author_id,
         liker=current_user,
         post_title=post_title
     )
+    return notification_templates.to_out(notification, current_user.language)
 
 @router.post("/internal/reply", response_model=NotificationOut)
 def create_reply_notification(
@@ -49,12 +74,13 @@ def create_reply_notification(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
-    return notification_service.create_reply_notification(
+    notification = notification_service.create_reply_notification(
         db,
         post_author_id=post_author_id,
         replier=current_user,
         post_title=post_title
     )
+    return notification_templates.to_out(notification, current_user.language)
 
 @router.post("/internal/nested-reply", response_model=NotificationOut)
 def create_nested_reply_notification(
@@ -63,12 +89,13 @@ def create_nested_reply_notification(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
-    return notification_service.create_nested_reply_notification(
+    notification = notification_service.create_nested_reply_notification(
         db,
         comment_author_id=comment_author_id,
         replier=current_user,
         post_title=post_title
     )
+    return notification_templates.to_out(notification, current_user.language)
 
 @router.post("/internal/post-deletion", response_model=NotificationOut)
 def create_post_deletion_notification(
@@ -80,13 +107,14 @@ def create_post_deletion_notification(
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Only admins can send deletion notifications")
-    return notification_service.create_post_deletion_notification(
+    notification = notification_service.create_post_deletion_notification(
         db,
         post_author_id=post_author_id,
         admin=current_user,
         post_title=post_title,
         reason=reason
     )
+    return notification_templates.to_out(notification, current_user.language)
 
 @router.post("/internal/comment-deletion", response_model=NotificationOut)
 def create_comment_deletion_notification(
@@ -98,10 +126,11 @@ def create_comment_deletion_notification(
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Only admins can send deletion notifications")
-    return notification_service.create_comment_deletion_notification(
+    notification = notification_service.create_comment_deletion_notification(
         db,
         comment_author_id=comment_author_id,
         admin=current_user,
         post_title=post_title,
         reason=reason
     )
+    return notification_templates.to_out(notification, current_user.language)
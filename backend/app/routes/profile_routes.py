@@ -1,34 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from sqlalchemy.orm import Session
 from typing import List
-import os
-import shutil
 from datetime import datetime
-from pathlib import Path
 
 from app.controllers.profile import get_user_profile, update_user_profile, update_profile_picture
 from app.schemas.user import UserProfile, UserProfileUpdate
-from app.schemas.document import Document as DocumentSchema
+from app.schemas.document import Document as DocumentSchema, DocumentLink
 from app.models.document import Document
 from config.database import get_db
 from config.security import get_current_user
 from app.models.user import UserAccount
+from app.services import document_storage
+from app.services.storage import storage
+from app.services.thumbnails import picture_keys, thumbnailer
+from app.utils import signed_urls, uploads
 
 router = APIRouter(
     prefix="/profile",
     tags=["profile"]
 )
 
-# Create base uploads directory
-UPLOAD_DIR = Path("uploads")
-PROFILE_PICTURES_DIR = UPLOAD_DIR / "profile_pictures"
-DOCUMENTS_DIR = UPLOAD_DIR / "documents"
-
-# Ensure directories exist
-UPLOAD_DIR.mkdir(exist_ok=True)
-PROFILE_PICTURES_DIR.mkdir(exist_ok=True)
-DOCUMENTS_DIR.mkdir(exist_ok=True)
-
 @router.get("/me", response_model=UserProfile)
 def get_my_profile(current_user: UserAccount = Depends(get_current_user), db: Session = Depends(get_db)):
     return get_user_profile(db, current_user.id)
@@ -48,69 +39,49 @@ async def upload_profile_picture(
     db: Session = Depends(get_db)
 ):
     try:
-        # Validate file type
-        if not file.content_type or not file.content_type.startswith('image/'):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid file type: {file.content_type}. File must be an image."
-            )
-        
-        # Validate file size (max 5MB)
-        MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
-        file_size = 0
-        chunk_size = 1024 * 1024  # 1MB chunks
-        
-        while chunk := await file.read(chunk_size):
-            file_size += len(chunk)
-            if file_size > MAX_FILE_SIZE:
+        async with uploads.receive(
+            file, storage.staging_dir("profile_pictures"), uploads.PICTURE_TYPES, uploads.MAX_PICTURE_SIZE
+        ) as upload:
+            # Generate unique filename
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"{current_user.id}_{timestamp}{upload.extension}"
+
+            # Save file with relative path
+            relative_path = f"profile_pictures/{filename}"
+
+            try:
+                await upload.save(storage, relative_path)
+            except OSError as e:
                 raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"File size ({file_size} bytes) exceeds maximum allowed size of 5MB"
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Could not save the file: {str(e)}"
                 )
-        await file.seek(0)  # Reset file pointer
-        
-        # Generate unique filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_extension = os.path.splitext(file.filename)[1].lower()
-        if file_extension not in ['.jpg', '.jpeg', '.png', '.gif']:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid file extension: {file_extension}. Only JPG, PNG and GIF images are allowed."
-            )
-        
-        filename = f"{current_user.id}_{timestamp}{file_extension}"
-        
-        # Save file with relative path
-        relative_path = f"profile_pictures/{filename}"
-        file_path = str(PROFILE_PICTURES_DIR / filename)
-        
-        # Save the file
-        try:
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Could not save the file: {str(e)}"
-            )
-        
+
+        previous_keys = []
+        if current_user.profile_picture != f"/static/{relative_path}":  # re-uploaded within the same second
+            previous_keys = picture_keys(current_user.profile_picture, current_user.profile_picture_variants)
         try:
             # Update user profile with relative path
             updated_user = update_profile_picture(db, current_user.id, f"/static/{relative_path}")
-            
-            # Return the user with the profile picture URL
-            return {
-                "profile_picture": f"/static/{relative_path}",
-                "user": updated_user
-            }
+            # Thumbnails are generated in the background; the original is served until then
+            thumbnailer.submit(current_user.id, f"/static/{relative_path}", relative_path)
         except Exception as e:
             # Clean up the uploaded file if database update fails
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            await storage.delete(relative_path)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to update profile picture in database: {str(e)}"
             )
+
+        # The replaced picture and its thumbnails are no longer referenced
+        for key in previous_keys:
+            await storage.delete(key)
+
+        # Return the user with the profile picture URL
+        return {
+            "profile_picture": f"/static/{relative_path}",
+            "user": updated_user
+        }
     except HTTPException:
         raise
     except Exception as e:
@@ -126,66 +97,21 @@ async def upload_document(
     db: Session = Depends(get_db)
 ):
     try:
-        # Validate file type
-        allowed_types = {
-            'application/pdf': '.pdf',
-            'application/msword': '.doc',
-            'application/vnd.openxmlformats-officedocument.wordprocessingml.document': '.docx',
-            'image/jpeg': '.jpg',
-            'image/png': '.png'
-        }
-        
-        if file.content_type not in allowed_types:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid file type: {file.content_type}. Allowed types: PDF, DOC, DOCX, JPG, PNG"
-            )
-        
-        # Validate file size (max 10MB)
-        MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
-        file_size = 0
-        chunk_size = 1024 * 1024  # 1MB chunks
-        
-        while chunk := await file.read(chunk_size):
-            file_size += len(chunk)
-            if file_size > MAX_FILE_SIZE:
+        async with uploads.receive(
+            file, storage.staging_dir("documents"), uploads.DOCUMENT_TYPES, uploads.MAX_DOCUMENT_SIZE
+        ) as upload:
+            try:
+                # Identical content already stored is only referenced again
+                document = await document_storage.store_upload(
+                    db, upload, current_user.id, current_user.id, file.filename
+                )
+            except OSError as e:
                 raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"File size ({file_size} bytes) exceeds maximum allowed size of 10MB"
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Could not save the file: {str(e)}"
                 )
-        await file.seek(0)  # Reset file pointer
-        
-        # Generate unique filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_extension = allowed_types[file.content_type]
-        filename = f"{current_user.id}_{timestamp}{file_extension}"
-        
-        # Save file
-        file_path = DOCUMENTS_DIR / filename
-        relative_path = f"documents/{filename}"
-        
-        try:
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Could not save the file: {str(e)}"
-            )
-        
-        # Create document record in database
-        document = Document(
-            user_id=current_user.id,
-            name=file.filename,
-            file_path=f"/uploads/{relative_path}",
-            content_type=file.content_type,
-            timestamp=timestamp
-        )
-        db.add(document)
-        db.commit()
-        db.refresh(document)
-        
-        return document
+
+        return signed_urls.sign_documents([document], current_user.id)[0]
         
     except HTTPException:
         raise
@@ -195,6 +121,21 @@ async def upload_document(
             detail=f"An unexpected error occurred: {str(e)}"
         )
 
+@router.post("/me/documents/link", response_model=DocumentSchema)
+def link_document(
+    link: DocumentLink,
+    current_user: UserAccount = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Add a document whose content the user already stored, by SHA-256, without uploading it again."""
+    document = document_storage.link_existing(db, link.sha256, current_user.id, current_user.id, link.name)
+    if document is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No stored document with this content"
+        )
+    return signed_urls.sign_documents([document], current_user.id)[0]
+
 @router.get("/me/documents", response_model=List[DocumentSchema])
 async def list_documents(
     current_user: UserAccount = Depends(get_current_user),
@@ -202,7 +143,7 @@ async def list_documents(
 ):
     try:
         documents = db.query(Document).filter(Document.user_id == current_user.id).all()
-        return documents
+        return signed_urls.sign_documents(documents, current_user.id)
         
     except Exception as e:
         raise HTTPException(
@@ -220,7 +161,7 @@ async def delete_document(
         # Find the document in database
         document = db.query(Document).filter(
             Document.user_id == current_user.id,
-            Document.timestamp == document_id
+            Document.public_id == document_id
         ).first()
         
         if not document:
@@ -229,21 +170,11 @@ async def delete_document(
                 detail="Document not found"
             )
         
-        # Delete the file
-        file_path = Path(document.file_path.replace("/uploads/", ""))
-        full_path = UPLOAD_DIR / file_path
-        try:
-            if full_path.exists():
-                os.remove(full_path)
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Could not delete the file: {str(e)}"
-            )
-        
-        # Delete database record
-        db.delete(document)
+        # Delete the record, then its file if no other document shares it
+        key = document_storage.release(db, document)
         db.commit()
+        if key is not None:
+            await document_storage.delete_released(db, [key])
         
         return {"message": "Document deleted successfully"}
         
@@ -0,0 +1,110 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from sqlalchemy.orm import Session
+
+from app.models import UserAccount
+from app.schemas.document import Document as DocumentSchema
+from app.schemas.upload_session import UploadSession as UploadSessionSchema, UploadSessionCreate
+from app.services import notification_service, patient_access, upload_sessions
+from app.utils import signed_urls
+from config.database import get_db
+from config.security import get_current_user
+
+router = APIRouter(
+    prefix="/upload-sessions",
+    tags=["uploads"]
+)
+
+# Resumable document uploads, for files too large or connections too flaky
+# for a single POST to /profile/me/documents or /doctor/patients/{id}/documents:
+#
+#   POST   /upload-sessions                 {name, size, sha256[, patient_id]} -> session
+#   PUT    /upload-sessions/{id}            raw chunk, Upload-Offset: <session offset>
+#   GET    /upload-sessions/{id}            current offset, to resume after a failure
+#   POST   /upload-sessions/{id}/complete   -> the stored document
+#   DELETE /upload-sessions/{id}            cancel
+
+def _check_patient_access(db: Session, doctor: UserAccount, patient_id: int):
+    if not doctor.is_doctor:
+        raise HTTPException(status_code=403, detail="Access denied. User is not a doctor.")
+    if not patient_access.has_access(db, doctor.id, patient_id):
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied. No confirmed appointment with this patient."
+        )
+
+def _get_session(db: Session, session_id: str, user: UserAccount):
+    upload_session = upload_sessions.get(db, session_id, user.id)
+    if upload_session is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    return upload_session
+
+@router.post("", response_model=UploadSessionSchema, status_code=status.HTTP_201_CREATED)
+def create_upload_session(
+    payload: UploadSessionCreate,
+    current_user: UserAccount = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    owner_id = current_user.id
+    if payload.patient_id is not None and payload.patient_id != current_user.id:
+        _check_patient_access(db, current_user, payload.patient_id)
+        owner_id = payload.patient_id
+    return upload_sessions.create(db, current_user.id, owner_id, payload.name, payload.size, payload.sha256)
+
+@router.get("/{session_id}", response_model=UploadSessionSchema)
+def get_upload_session(
+    session_id: str,
+    current_user: UserAccount = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    return _get_session(db, session_id, current_user)
+
+@router.put("/{session_id}", response_model=UploadSessionSchema)
+async def upload_chunk(
+    session_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    current_user: UserAccount = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Append the request body, streamed as it arrives, at ``Upload-Offset``."""
+    upload_session = _get_session(db, session_id, current_user)
+    return await upload_sessions.write_chunk(db, upload_session, upload_offset, request.stream())
+
+@router.post("/{session_id}/complete", response_model=DocumentSchema)
+async def complete_upload_session(
+    session_id: str,
+    current_user: UserAccount = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    upload_session = _get_session(db, session_id, current_user)
+    owner_id = upload_session.owner_id
+    if owner_id != current_user.id:
+        # The appointment may have been cancelled while the file was uploading
+        _check_patient_access(db, current_user, owner_id)
+
+    try:
+        document = await upload_sessions.complete(db, upload_session)
+    except OSError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Could not save the file: {str(e)}"
+        )
+
+    if owner_id != current_user.id:
+        notification_service.create_document_uploaded_notification(
+            db,
+            patient_id=owner_id,
+            doctor=current_user,
+            document_name=document.name
+        )
+    return signed_urls.sign_documents([document], current_user.id)[0]
+
+@router.delete("/{session_id}")
+async def cancel_upload_session(
+    session_id: str,
+    current_user: UserAccount = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    upload_session = _get_session(db, session_id, current_user)
+    await upload_sessions.abort(db, upload_session)
+    return {"message": "Upload cancelled"}
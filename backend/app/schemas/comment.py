@@ -1,12 +1,13 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class UserInfo(BaseModel):
     id: int
     first_name: str
     last_name: str
     profile_picture: Optional[str] = None
+    profile_picture_variants: Optional[Dict[str, str]] = None
     role: str
 
     class Config:
@@ -40,6 +41,9 @@ class CommentResponse(CommentBase):
     likes: int
     created_at: datetime
     replies: List[ReplyResponse] = []
+    reply_count: int = 0
+    # Cursor for GET /community/comments/{id}/replies after the preview, if more remain
+    replies_cursor: Optional[str] = None
     user: UserInfo
     is_liked: bool = False
 
@@ -48,4 +52,17 @@ class CommentResponse(CommentBase):
 
     @staticmethod
     def compute_is_liked(comment, current_user):
-        return current_user in comment.liked_by 
\ No newline at end of file
+        return current_user in comment.liked_by 
+class SearchResult(BaseModel):
+    type: str  # "comment" or "reply"
+    id: int
+    comment_id: int
+    content: str
+    user_id: int
+    created_at: datetime
+    user: UserInfo
+    rank: float
+
+class SearchResults(BaseModel):
+    results: List[SearchResult]
+    next_offset: Optional[int] = None
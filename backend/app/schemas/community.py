@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class UserBase(BaseModel):
     id: int
@@ -8,6 +8,7 @@ class UserBase(BaseModel):
     last_name: str
     role: str
     profile_picture: Optional[str] = None
+    profile_picture_variants: Optional[Dict[str, str]] = None
 
 class ReplyBase(BaseModel):
     content: str
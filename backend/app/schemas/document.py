@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import Optional
 
 class DocumentBase(BaseModel):
     name: str
@@ -8,12 +9,20 @@ class DocumentBase(BaseModel):
 class DocumentCreate(DocumentBase):
     pass
 
+class DocumentLink(BaseModel):
+    sha256: str = Field(pattern=r"^[0-9a-f]{64}$")
+    name: str
+
 class Document(DocumentBase):
     id: int
     user_id: int
     file_path: str
-    timestamp: str
+    public_id: str
+    sha256: Optional[str] = None
+    size: Optional[int] = None
+    # Signed /uploads link for the requesting user, where the route issued one
+    url: Optional[str] = None
     created_at: datetime
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
@@ -0,0 +1,38 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List, Optional
+
+class ModerationTermsCreate(BaseModel):
+    terms: List[str] = Field(..., min_length=1, max_length=10000)
+
+class ModerationTermOut(BaseModel):
+    id: int
+    term: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ModerationQueueItemOut(BaseModel):
+    id: int
+    entity: str
+    entity_id: int
+    comment_id: int
+    user_id: int
+    matched_terms: List[str]
+    status: str
+    content: Optional[str] = None  # None once the post is gone
+    created_at: datetime
+    reviewed_at: Optional[datetime] = None
+
+class ModerationRemoval(BaseModel):
+    reason: Optional[str] = None
+
+class BulkModerationRequest(BaseModel):
+    """Posts to remove: explicit ids, and/or everything by an author and/or in [since, until)."""
+    comment_ids: List[int] = []
+    reply_ids: List[int] = []
+    author_id: Optional[int] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    reason: Optional[str] = None
@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 
 class NotificationType(str, Enum):
     LIKE = "like"
@@ -12,6 +12,12 @@ class NotificationType(str, Enum):
     APPOINTMENT_REMINDER = "appointment_reminder"
     PRESCRIPTION_UPDATE = "prescription_update"
     TEST_RESULTS = "test_results"
+    APPOINTMENT_CONFIRMED = "appointment_confirmed"
+    APPOINTMENT_ASSIGNED = "appointment_assigned"
+    APPOINTMENT_REJECTED = "appointment_rejected"
+    ROLE_UPDATE = "role_update"
+    DOCUMENT_UPLOADED = "document_uploaded"
+    CONTENT_REMOVAL = "content_removal"
     SYSTEM = "system"
 
 class NotificationCreate(BaseModel):
@@ -26,6 +32,7 @@ class NotificationOut(BaseModel):
     type: NotificationType
     link: Optional[str]
     notification_metadata: Optional[dict]
+    actor_count: int = 1
     is_read: bool
     created_at: datetime
 
@@ -34,3 +41,12 @@ class NotificationOut(BaseModel):
 
 
 
+
+
+class NotificationMarkRead(BaseModel):
+    ids: Optional[List[int]] = None  # Mark exactly these notifications
+    up_to_id: Optional[int] = None  # Or every notification with id <= up_to_id
+
+class NotificationReadState(BaseModel):
+    updated: int
+    unread_count: int
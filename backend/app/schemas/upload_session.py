@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional
+
+from config import settings
+
+class UploadSessionCreate(BaseModel):
+    name: str = Field(min_length=1)
+    size: int = Field(gt=0)
+    sha256: str = Field(pattern=r"^[0-9a-f]{64}$")
+    # Doctors upload to a patient's file; omitted for the user's own documents
+    patient_id: Optional[int] = None
+
+class UploadSession(BaseModel):
+    id: str
+    name: str
+    size: int
+    offset: int
+    expires_at: datetime
+    max_chunk_size: int = settings.UPLOAD_CHUNK_MAX_MB * 1024 * 1024
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime
 
 class UserBase(BaseModel):
@@ -17,6 +17,7 @@ class UserCreate(UserBase):
 class User(UserBase):
     id: int
     profile_picture: Optional[str] = None
+    profile_picture_variants: Optional[Dict[str, str]] = None
     bio: Optional[str] = None
     address: Optional[str] = None
     city: Optional[str] = None
@@ -42,6 +43,7 @@ class UserProfile(BaseModel):
     phone: Optional[str]
     role: Optional[str] = "user"
     profile_picture: Optional[str] = None
+    profile_picture_variants: Optional[Dict[str, str]] = None
     bio: Optional[str] = None
     address: Optional[str] = None
     city: Optional[str] = None
@@ -0,0 +1,106 @@
+"""
+Cross-worker invalidation for per-worker caches.
+
+Each shared cache has a row in cache_generations. Writers call bump() inside
+the transaction that changes the cached data, so the new version becomes
+visible exactly when the change does. The row stays locked until that
+transaction commits, though, so caches written to on every request use
+bump_after_commit() instead: the row is bumped in a separate short
+transaction right after the commit, and writers no longer queue on it.
+Readers ask a GenerationWatcher for the current version; it re-reads the row
+at most once per CACHE_GENERATION_CHECK_MS, and immediately after this
+worker committed a bump.
+"""
+import logging
+import threading
+import time
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.models import CacheGeneration
+from app.utils.db import dialect_insert
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Session.info keys holding the generations bumped by the open transaction,
+# and those to bump once it commits
+SESSION_KEY = "bumped_cache_generations"
+AFTER_COMMIT_KEY = "cache_generations_to_bump"
+
+class GenerationWatcher:
+    def __init__(self, name: str, check_interval_ms: int):
+        self.name = name
+        self.interval = check_interval_ms / 1000
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def version(self, db: Session) -> int:
+        with self._lock:
+            if self._version is not None and time.monotonic() - self._checked_at < self.interval:
+                return self._version
+
+        version = db.execute(
+            select(CacheGeneration.version).where(CacheGeneration.name == self.name)
+        ).scalar() or 0
+        with self._lock:
+            self._version = version
+            self._checked_at = time.monotonic()
+        return version
+
+    def expire(self):
+        with self._lock:
+            self._version = None
+
+_watchers: dict[str, GenerationWatcher] = {}
+_watchers_lock = threading.Lock()
+
+def watcher(name: str) -> GenerationWatcher:
+    with _watchers_lock:
+        if name not in _watchers:
+            _watchers[name] = GenerationWatcher(name, settings.CACHE_GENERATION_CHECK_MS)
+        return _watchers[name]
+
+def _increment(db: Session, name: str):
+    table = CacheGeneration.__table__
+    return (
+        dialect_insert(db, table)
+        .values(name=name, version=1)
+        .on_conflict_do_update(index_elements=["name"], set_={"version": table.c.version + 1})
+    )
+
+def bump(db: Session, name: str):
+    """Invalidate ``name`` on every worker once ``db`` commits."""
+    db.execute(_increment(db, name))
+    db.info.setdefault(SESSION_KEY, set()).add(name)
+
+def bump_after_commit(db: Session, name: str):
+    """
+    Invalidate ``name`` on every worker after ``db`` commits, without
+    holding the generation row's lock in the meantime. Other workers may
+    serve the old version for the moment between the two commits.
+    """
+    db.info.setdefault(AFTER_COMMIT_KEY, set()).add(name)
+
+@event.listens_for(Session, "after_commit")
+def _expire_bumped(session):
+    for name in session.info.pop(SESSION_KEY, ()):
+        watcher(name).expire()
+    names = session.info.pop(AFTER_COMMIT_KEY, ())
+    for name in names:
+        watcher(name).expire()
+    if names:
+        try:
+            with session.get_bind().begin() as connection:
+                for name in sorted(names):
+                    connection.execute(_increment(session, name))
+        except Exception:
+            # The data is committed; other workers catch up when their cached entries expire
+            logger.exception("Bumping cache generations %s failed", ", ".join(sorted(names)))
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_bumped(session, previous_transaction):
+    session.info.pop(SESSION_KEY, None)
+    session.info.pop(AFTER_COMMIT_KEY, None)
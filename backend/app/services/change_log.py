@@ -0,0 +1,181 @@
+"""
+Change log behind GET /community/changes.
+
+Every write to comments and replies appends a CommunityChange row in the same
+transaction, so clients can catch up from a watermark instead of reloading
+the feed. The row's ``id`` is handed out at INSERT time, not at commit, so
+two writers can commit out of order; a client that had already moved past
+the later id would never see the earlier one. Writers therefore take no lock
+and leave ``seq``, the watermark, empty: sequence() numbers committed rows
+afterwards, in one short transaction at a time, before the log is read.
+A row committed later is always numbered later, so a watermark never skips
+one. Writes to different comments, and likes, no longer wait on each other.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session, selectinload
+
+from app.models import CacheGeneration, Comment, CommunityChange, Reply
+from app.utils.db import dialect_insert
+
+MAX_PAGE_SIZE = 500
+SEQUENCE_BATCH = 5000
+# Arbitrary application-wide advisory lock key ("comm"), held by sequence() only
+SEQUENCER_LOCK = 0x636F6D6D
+# cache_generations row holding the highest pruned seq
+PRUNED_MARKER = "community_changes_pruned"
+
+class ResyncRequired(Exception):
+    """The watermark is older than the retained change log."""
+
+def change(entity: str, op: str, entity_id: int, comment_id: int, likes: int = None) -> dict:
+    return {"entity": entity, "op": op, "entity_id": entity_id, "comment_id": comment_id, "likes": likes}
+
+def record(db: Session, entity: str, op: str, entity_id: int, comment_id: int, likes: int = None):
+    record_many(db, [change(entity, op, entity_id, comment_id, likes)])
+
+def record_many(db: Session, changes: list[dict]):
+    """Append changes as part of the caller's transaction."""
+    if not changes:
+        return
+    now = datetime.utcnow()
+    db.execute(insert(CommunityChange), [{**row, "created_at": now} for row in changes])
+
+def sequence(db: Session):
+    """
+    Number the committed changes that have no ``seq`` yet, in id order, in a
+    transaction of its own. On Postgres a call that finds another sequencer
+    running returns at once: whatever it would have numbered will be
+    numbered by that one or the next, after everything already numbered.
+    """
+    with db.get_bind().connect() as connection:
+        while True:
+            with connection.begin():
+                if connection.dialect.name == "postgresql" and not connection.execute(
+                    select(func.pg_try_advisory_xact_lock(SEQUENCER_LOCK))
+                ).scalar():
+                    return
+                base = max(
+                    connection.execute(select(func.max(CommunityChange.seq))).scalar() or 0,
+                    pruned_seq(connection)
+                )
+                pending = (
+                    select(
+                        CommunityChange.id,
+                        (base + func.row_number().over(order_by=CommunityChange.id)).label("seq")
+                    )
+                    .where(CommunityChange.seq.is_(None))
+                    .order_by(CommunityChange.id)
+                    .limit(SEQUENCE_BATCH)
+                    .subquery()
+                )
+                numbered = connection.execute(
+                    update(CommunityChange)
+                    .where(CommunityChange.id == pending.c.id)
+                    .values(seq=pending.c.seq)
+                ).rowcount
+            if numbered < SEQUENCE_BATCH:
+                return
+
+def latest_seq(db: Session) -> int:
+    sequence(db)
+    # The log may have been pruned empty
+    return db.execute(select(func.max(CommunityChange.seq))).scalar() or pruned_seq(db)
+
+def pruned_seq(db) -> int:
+    return db.execute(
+        select(CacheGeneration.version).where(CacheGeneration.name == PRUNED_MARKER)
+    ).scalar() or 0
+
+def changes_since(db: Session, since: int, limit: int = MAX_PAGE_SIZE, liked_ids=None):
+    """
+    Changes after ``since`` in seq order, as (changes, watermark, has_more).
+    Upserts carry the current row (None if it was deleted since, in which
+    case a tombstone follows); only the last like count per comment is kept.
+    ``liked_ids(comment_ids)`` supplies is_liked for upserted comments.
+    """
+    sequence(db)
+    if since < pruned_seq(db):
+        raise ResyncRequired()
+
+    rows = db.execute(
+        select(CommunityChange)
+        .where(CommunityChange.seq > since)
+        .order_by(CommunityChange.seq)
+        .limit(limit + 1)
+    ).scalars().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    watermark = rows[-1].seq if rows else since
+
+    last_likes = {row.comment_id: row.seq for row in rows if row.op == "likes"}
+    upserted = {"comment": set(), "reply": set()}
+    for row in rows:
+        if row.op == "upsert":
+            upserted[row.entity].add(row.entity_id)
+    reply_parents = {row.comment_id for row in rows if row.entity == "reply"}
+
+    comments = {}
+    if upserted["comment"]:
+        comments = {
+            comment.id: comment for comment in
+            db.query(Comment).options(selectinload(Comment.user)).filter(Comment.id.in_(upserted["comment"]))
+        }
+    replies = {}
+    if upserted["reply"]:
+        replies = {
+            reply.id: reply for reply in
+            db.query(Reply).options(selectinload(Reply.user)).filter(Reply.id.in_(upserted["reply"]))
+        }
+    reply_counts = {}
+    if reply_parents:
+        reply_counts = dict(db.execute(
+            select(Comment.id, Comment.reply_count).where(Comment.id.in_(reply_parents))
+        ).all())
+    liked = liked_ids(list(comments)) if liked_ids and comments else set()
+
+    changes = []
+    for row in rows:
+        if row.op == "likes" and last_likes[row.comment_id] != row.seq:
+            continue
+        item = {
+            "seq": row.seq,
+            "type": row.entity,
+            "op": row.op,
+            "id": row.entity_id,
+            "comment_id": row.comment_id,
+        }
+        if row.op == "likes":
+            item["likes"] = row.likes
+        elif row.op == "upsert":
+            if row.entity == "comment":
+                comment = comments.get(row.entity_id)
+                item["data"] = comment.to_dict(is_liked=comment.id in liked) if comment else None
+            else:
+                reply = replies.get(row.entity_id)
+                item["data"] = reply.to_dict() if reply else None
+        if row.entity == "reply":
+            # Absolute, so replaying a change twice cannot skew the count
+            item["reply_count"] = reply_counts.get(row.comment_id)
+        changes.append(item)
+    return changes, watermark, has_more
+
+def prune(db: Session, older_than: timedelta) -> int:
+    """Delete changes older than ``older_than``; returns rows deleted."""
+    sequence(db)
+    cutoff = db.execute(
+        select(func.max(CommunityChange.seq))
+        .where(CommunityChange.created_at < datetime.utcnow() - older_than)
+    ).scalar()
+    if cutoff is None:
+        return 0
+    deleted = db.execute(delete(CommunityChange).where(CommunityChange.seq <= cutoff)).rowcount
+    table = CacheGeneration.__table__
+    db.execute(
+        dialect_insert(db, table)
+        .values(name=PRUNED_MARKER, version=cutoff)
+        .on_conflict_do_update(index_elements=["name"], set_={"version": cutoff})
+    )
+    db.commit()
+    return deleted
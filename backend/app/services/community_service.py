@@ -0,0 +1,411 @@
+import base64
+import time
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import and_, case, delete, func, or_, select, tuple_, update
+from sqlalchemy.orm import Session, selectinload
+
+from app.models import Comment, Reply
+from app.models.comment import comment_likes
+from app.services import cache_generations, change_log, hot_ranking, moderation, notification_service
+from app.services.feed_cache import feed_cache
+from app.services.like_buffer import defer_like_delta, like_buffer
+from app.utils.db import dialect_insert
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Replies embedded under each feed comment; the rest come from the replies endpoint
+REPLY_PREVIEW_SIZE = 3
+
+# Generation bumped by every change that adds or removes feed entries
+FEED_GENERATION = "community_feed"
+feed_generation = cache_generations.watcher(FEED_GENERATION)
+
+# Feed orderings: sort name -> (sort key column, parser for the key in a cursor)
+FEED_SORTS = {
+    "new": (Comment.created_at, datetime.fromisoformat),
+    "hot": (Comment.hot_score, float),
+}
+
+def encode_cursor(key, row_id: int) -> str:
+    """``key`` is the row's sort key: a datetime, or a float for the hot feed."""
+    key = key.isoformat() if isinstance(key, datetime) else repr(key)
+    return base64.urlsafe_b64encode(f"{key}|{row_id}".encode()).decode()
+
+def decode_cursor(cursor: str, parse_key=datetime.fromisoformat) -> tuple:
+    """Raises ValueError for anything that is not a cursor we issued."""
+    try:
+        key, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return parse_key(key), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def liked_comment_ids(db: Session, user_id: int, comment_ids: list[int]) -> set[int]:
+    """Which of ``comment_ids`` the user has liked, in one IN query on comment_likes."""
+    if not comment_ids:
+        return set()
+    rows = db.execute(
+        select(comment_likes.c.comment_id).where(
+            comment_likes.c.user_id == user_id,
+            comment_likes.c.comment_id.in_(comment_ids)
+        )
+    )
+    return {comment_id for comment_id, in rows}
+
+def get_feed_page(db: Session, user_id: int, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None, sort: str = "new"):
+    """
+    One page of the feed, newest first (or hottest first for sort="hot"),
+    keyset-paginated on (sort key, id). Pages are served from the shared
+    feed cache when possible; only the user's liked ids are looked up per
+    request and overlaid as ``is_liked``.
+    Returns (serialized comments, cursor for the next page or None).
+    """
+    key = (sort, cursor, limit)
+    for _ in range(3):
+        flushes = like_buffer.flushes
+        items, next_cursor = _cached_feed_page(db, key, limit, cursor, sort)
+        if not like_buffer.enabled:
+            break
+        pending = like_buffer.pending_for([item["id"] for item in items])
+        # A flush that committed in between may be missing from both the
+        # stored counts and the pending deltas; read again
+        if like_buffer.flushes == flushes:
+            break
+    if like_buffer.enabled:
+        apply_pending_likes(items, pending)
+
+    liked = liked_comment_ids(db, user_id, [item["id"] for item in items])
+    for item in items:
+        item["is_liked"] = item["id"] in liked
+    return items, next_cursor
+
+def _cached_feed_page(db: Session, key, limit: int, cursor: str, sort: str):
+    generation = feed_generation.version(db) if feed_cache.enabled else None
+    page = feed_cache.get(key, generation)
+    if page is None:
+        token = feed_cache.patch_token()
+        page = _load_feed_page(db, limit, cursor, sort)
+        feed_cache.put(key, generation, *page, token=token)
+    return page
+
+def _load_feed_page(db: Session, limit: int, cursor: str = None, sort: str = "new"):
+    """
+    Authors are loaded with one batched SELECT ... IN, the reply previews of
+    the whole page with one windowed query, and likers are never loaded.
+    """
+    sort_key, parse_key = FEED_SORTS[sort]
+    query = (
+        db.query(Comment)
+        .options(selectinload(Comment.user))
+        .order_by(sort_key.desc(), Comment.id.desc())
+    )
+    if cursor:
+        key, comment_id = decode_cursor(cursor, parse_key)
+        query = query.filter(tuple_(sort_key, Comment.id) < tuple_(key, comment_id))
+
+    comments = query.limit(limit + 1).all()
+    has_more = len(comments) > limit
+    comments = comments[:limit]
+
+    previews = reply_previews(db, [comment.id for comment in comments])
+    items = []
+    for comment in comments:
+        replies = previews.get(comment.id, [])
+        replies_cursor = None
+        if comment.reply_count > len(replies):
+            replies_cursor = encode_cursor(replies[-1].created_at, replies[-1].id) if replies else None
+        items.append(comment.to_dict(replies=replies, replies_cursor=replies_cursor))
+    next_cursor = None
+    if has_more:
+        last = comments[-1]
+        next_cursor = encode_cursor(last.hot_score if sort == "hot" else last.created_at, last.id)
+    return items, next_cursor
+
+def reply_previews(db: Session, comment_ids: list[int], size: int = REPLY_PREVIEW_SIZE) -> dict[int, list]:
+    """The first ``size`` replies of each comment, oldest first, in one query."""
+    if not comment_ids:
+        return {}
+    ranked = (
+        select(
+            Reply.id,
+            func.row_number().over(
+                partition_by=Reply.comment_id,
+                order_by=(Reply.created_at, Reply.id)
+            ).label("position")
+        )
+        .where(Reply.comment_id.in_(comment_ids))
+        .subquery()
+    )
+    replies = (
+        db.query(Reply)
+        .join(ranked, ranked.c.id == Reply.id)
+        .filter(ranked.c.position <= size)
+        .options(selectinload(Reply.user))
+        .order_by(Reply.comment_id, Reply.created_at, Reply.id)
+        .all()
+    )
+    previews = {}
+    for reply in replies:
+        previews.setdefault(reply.comment_id, []).append(reply)
+    return previews
+
+def get_replies_page(db: Session, comment_id: int, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None):
+    """
+    One page of a thread, oldest first, keyset-paginated on (created_at, id).
+    Returns (serialized replies, cursor for the next page or None).
+    """
+    query = (
+        db.query(Reply)
+        .options(selectinload(Reply.user))
+        .filter(Reply.comment_id == comment_id)
+        .order_by(Reply.created_at, Reply.id)
+    )
+    if cursor:
+        created_at, reply_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Reply.created_at, Reply.id) > tuple_(created_at, reply_id))
+
+    replies = query.limit(limit + 1).all()
+    has_more = len(replies) > limit
+    replies = replies[:limit]
+    next_cursor = encode_cursor(replies[-1].created_at, replies[-1].id) if has_more else None
+    return [reply.to_dict() for reply in replies], next_cursor
+
+def adjust_reply_count(db: Session, comment_id: int, delta: int):
+    """
+    Atomic reply_count = reply_count ± n, in the caller's transaction; the
+    same UPDATE moves the hot score.
+    """
+    now = time.time()
+    new_count = case((Comment.reply_count + delta < 0, 0), else_=Comment.reply_count + delta)
+    db.execute(
+        update(Comment)
+        .where(Comment.id == comment_id)
+        .values(
+            reply_count=new_count,
+            hot_score=hot_ranking.bumped_score(delta * hot_ranking.REPLY_WEIGHT, now),
+            hot_decayed_at=now
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def refresh_reply_counts(db: Session, comment_ids):
+    """Recount replies for comments that lost replies in a bulk delete."""
+    comment_ids = list(comment_ids)
+    if not comment_ids:
+        return
+    actual = (
+        select(func.count())
+        .select_from(Reply)
+        .where(Reply.comment_id == Comment.id)
+        .scalar_subquery()
+    )
+    db.execute(
+        update(Comment)
+        .where(Comment.id.in_(comment_ids))
+        .values(reply_count=actual)
+        .execution_options(synchronize_session=False)
+    )
+
+def remove_comment(db: Session, comment: Comment):
+    """Delete a comment and everything that refers to it, in the caller's transaction."""
+    # Like/reply notifications about the comment would point nowhere
+    notification_service.withdraw_comment_notifications(db, comment.id, commit=False)
+    moderation.discard_pending(db, "comment", comment_id=comment.id)
+    db.delete(comment)
+    change_log.record(db, "comment", "delete", comment.id, comment.id)
+    invalidate_feed(db)
+
+def remove_reply(db: Session, reply: Reply):
+    """Delete a reply, in the caller's transaction."""
+    moderation.discard_pending(db, "reply", entity_id=reply.id)
+    db.delete(reply)
+    adjust_reply_count(db, reply.comment_id, -1)
+    change_log.record(db, "reply", "delete", reply.id, reply.comment_id)
+    invalidate_feed(db)
+
+def find_posts(db: Session, comment_ids=(), reply_ids=(), author_id: int = None, since: datetime = None, until: datetime = None):
+    """
+    Comments and replies picked by id, plus every one matching the author
+    and/or created_at window [since, until). Returns (comments, replies) as
+    (id, user_id) and (id, comment_id, user_id) rows.
+    """
+    def criteria(model, ids):
+        conditions = []
+        if ids:
+            conditions.append(model.id.in_(ids))
+        matching = []
+        if author_id is not None:
+            matching.append(model.user_id == author_id)
+        if since is not None:
+            matching.append(model.created_at >= since)
+        if until is not None:
+            matching.append(model.created_at < until)
+        if matching:
+            conditions.append(and_(*matching))
+        return or_(*conditions) if conditions else None
+
+    comments, replies = [], []
+    where = criteria(Comment, comment_ids)
+    if where is not None:
+        comments = db.execute(select(Comment.id, Comment.user_id).where(where)).all()
+    where = criteria(Reply, reply_ids)
+    if where is not None:
+        replies = db.execute(select(Reply.id, Reply.comment_id, Reply.user_id).where(where)).all()
+    return comments, replies
+
+def bulk_remove(db: Session, comments, replies, admin_id: int) -> dict:
+    """
+    Set-based remove_comment/remove_reply for rows from find_posts, in the
+    caller's transaction. Returns author id -> number of their posts removed.
+    """
+    comment_ids = [comment_id for comment_id, _ in comments]
+    removed_comments = set(comment_ids)
+    # Replies under removed comments go with them and need no bookkeeping of their own
+    replies = [reply for reply in replies if reply.comment_id not in removed_comments]
+    reply_ids = [reply.id for reply in replies]
+
+    removed_per_author = Counter(user_id for _, user_id in comments)
+    removed_per_author.update(reply.user_id for reply in replies)
+
+    notification_service.withdraw_comments_notifications(db, comment_ids)
+    moderation.resolve_removed(db, comment_ids, reply_ids, admin_id)
+    if reply_ids:
+        db.execute(delete(Reply).where(Reply.id.in_(reply_ids)))
+        refresh_reply_counts(db, {reply.comment_id for reply in replies})
+    if comment_ids:
+        db.execute(delete(Reply).where(Reply.comment_id.in_(comment_ids)))
+        db.execute(delete(comment_likes).where(comment_likes.c.comment_id.in_(comment_ids)))
+        db.execute(delete(Comment).where(Comment.id.in_(comment_ids)))
+
+    change_log.record_many(db, [
+        change_log.change("reply", "delete", reply.id, reply.comment_id) for reply in replies
+    ] + [
+        change_log.change("comment", "delete", comment_id, comment_id) for comment_id in comment_ids
+    ])
+    if comment_ids or reply_ids:
+        invalidate_feed(db)
+    return dict(removed_per_author)
+
+def invalidate_feed(db: Session):
+    """
+    Drop cached feed pages on every worker once ``db`` commits. Every comment
+    and reply calls this, so the generation is bumped after the commit
+    rather than locking its row for the rest of the transaction.
+    """
+    cache_generations.bump_after_commit(db, FEED_GENERATION)
+
+def publish_like_count(comment_id: int, likes: int):
+    """Patch cached pages after a committed like toggle."""
+    # With write-behind the stored count only moves when the buffer flushes,
+    # and the flush patches the cache itself
+    if not like_buffer.enabled:
+        feed_cache.patch_likes(comment_id, likes=likes)
+
+def apply_pending_likes(items: list[dict], pending: dict):
+    """Add this worker's not yet flushed like deltas to serialized comments."""
+    for item in items:
+        if item["id"] in pending:
+            item["likes"] = max(0, item["likes"] + pending[item["id"]])
+
+class CommentNotFound(Exception):
+    """The comment was deleted, e.g. between a like toggle's route check and its update."""
+
+def current_likes(db: Session, comment_id: int) -> int:
+    stored = db.execute(select(Comment.likes).where(Comment.id == comment_id)).scalar_one_or_none()
+    if stored is None:
+        raise CommentNotFound(comment_id)
+    if like_buffer.enabled:
+        return max(0, stored + like_buffer.pending(comment_id))
+    return stored
+
+def _adjust_likes(db: Session, comment_id: int, delta: int) -> int:
+    if like_buffer.enabled:
+        # Write-behind: no row lock on the comment, the buffer batches the update
+        defer_like_delta(db, comment_id, delta)
+        return max(0, current_likes(db, comment_id) + delta)
+
+    # Atomic likes = likes ± 1 in the database, never a read-modify-write
+    now = time.time()
+    new_likes = case((Comment.likes + delta < 0, 0), else_=Comment.likes + delta)
+    likes = db.execute(
+        update(Comment)
+        .where(Comment.id == comment_id)
+        .values(
+            likes=new_likes,
+            hot_score=hot_ranking.bumped_score(delta * hot_ranking.LIKE_WEIGHT, now),
+            hot_decayed_at=now
+        )
+        .returning(Comment.likes)
+    ).scalar_one_or_none()
+    if likes is None:
+        raise CommentNotFound(comment_id)
+    change_log.record(db, "comment", "likes", comment_id, comment_id, likes=likes)
+    return likes
+
+def toggle_like(db: Session, comment_id: int, user_id: int) -> tuple[bool, int]:
+    """
+    Like the comment, or unlike it if the user already did.
+    Membership is flipped with DELETE ... RETURNING / INSERT ... ON CONFLICT DO
+    NOTHING on the unique (user_id, comment_id) pair, so it costs the same no
+    matter how many likers the comment has and concurrent clicks cannot double
+    count. Returns (is_liked, likes) and leaves the commit to the caller;
+    raises CommentNotFound if the comment is gone.
+    """
+    unliked = db.execute(
+        delete(comment_likes)
+        .where(comment_likes.c.user_id == user_id, comment_likes.c.comment_id == comment_id)
+        .returning(comment_likes.c.comment_id)
+    ).first()
+    if unliked:
+        return False, _adjust_likes(db, comment_id, -1)
+
+    liked = db.execute(
+        dialect_insert(db, comment_likes)
+        .values(user_id=user_id, comment_id=comment_id)
+        .on_conflict_do_nothing(index_elements=["user_id", "comment_id"])
+        .returning(comment_likes.c.comment_id)
+    ).first()
+    if liked:
+        return True, _adjust_likes(db, comment_id, 1)
+
+    # A concurrent request from the same user inserted the like first
+    return True, current_likes(db, comment_id)
+
+class LikeDeltasPending(Exception):
+    """Write-behind like deltas may still be queued in API workers."""
+
+def reconcile_like_counts(db: Session, buffers_stopped: bool = False) -> int:
+    """
+    Repair drift between Comment.likes and the rows in comment_likes with a
+    single set-based UPDATE. Returns how many comments were corrected.
+
+    With LIKE_WRITE_BEHIND on, a committed like is already counted in
+    comment_likes while its delta waits in some worker's buffer; setting the
+    counter to the row count and then flushing that delta would count it
+    twice. Buffers live in each worker's memory, so this refuses to run
+    unless the caller says every worker has stopped (and flushed on the way
+    out), as reconcile_likes.py --workers-stopped does.
+    """
+    if like_buffer.enabled and not buffers_stopped:
+        raise LikeDeltasPending()
+    actual = (
+        select(func.count())
+        .select_from(comment_likes)
+        .where(comment_likes.c.comment_id == Comment.id)
+        .scalar_subquery()
+    )
+    repaired = db.execute(
+        update(Comment)
+        .where(Comment.likes != actual)
+        .values(likes=actual)
+        .returning(Comment.id, Comment.likes)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if repaired:
+        change_log.record_many(db, [
+            change_log.change("comment", "likes", comment_id, comment_id, likes)
+            for comment_id, likes in repaired
+        ])
+        invalidate_feed(db)
+    db.commit()
+    return len(repaired)
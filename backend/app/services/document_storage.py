@@ -0,0 +1,177 @@
+"""
+Content-addressed document storage.
+
+Files are stored under ``documents/<aa>/<sha256><ext>``, one per distinct
+content. ``document_blobs`` counts the Document rows pointing at each file:
+uploading content that is already stored only adds a row and bumps the
+count, and the file is deleted with its last reference.
+
+The count is changed with a single UPDATE/upsert. A file is only deleted
+after the transaction that released its last reference has committed, so a
+failed commit cannot leave documents pointing at nothing. The deletion then
+runs under a per-content advisory lock that store_upload also takes before
+looking for the file: either the upload references the blob again first and
+the file is kept, or the file is gone before the upload checks and it is
+written again.
+"""
+import logging
+import re
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.models import Document, DocumentBlob
+from app.services.storage import storage
+from app.utils.db import dialect_insert, is_postgresql
+from app.utils.uploads import StagedUpload
+
+logger = logging.getLogger(__name__)
+
+# Advisory lock class of the per-content locks ("blob"); the second key is the content hash
+CONTENT_LOCK = 0x626C6F62
+BLOB_KEY_RE = re.compile(r"documents/([0-9a-f]{2})/(\1[0-9a-f]{62})(\.[^/]*)?")
+
+def blob_path(sha256: str, extension: str) -> str:
+    """Storage key of a blob."""
+    return f"documents/{sha256[:2]}/{sha256}{extension}"
+
+def content_sha256(key: str):
+    """The SHA-256 a blob key is named after, or None for other keys."""
+    match = BLOB_KEY_RE.fullmatch(key)
+    return match.group(2) if match else None
+
+def _lock_content(db: Session, sha256: str):
+    """Serialize uploads and file deletions of the same content until ``db`` commits."""
+    if is_postgresql(db):
+        db.execute(select(func.pg_advisory_xact_lock(CONTENT_LOCK, func.hashtext(sha256))))
+
+def _acquire(db: Session, sha256: str, size: int, content_type: str, file_path: str) -> str:
+    """Add a reference to a blob, creating its row if needed; returns its path."""
+    _lock_content(db, sha256)
+    stmt = dialect_insert(db, DocumentBlob).values(
+        sha256=sha256, size=size, content_type=content_type, file_path=file_path, refcount=1
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DocumentBlob.sha256],
+        set_={"refcount": DocumentBlob.refcount + 1}
+    ).returning(DocumentBlob.file_path)
+    return db.execute(stmt).scalar_one()
+
+def _release(db: Session, sha256: str):
+    """Drop a reference to a blob; returns its key when that was the last one."""
+    row = db.execute(
+        update(DocumentBlob)
+        .where(DocumentBlob.sha256 == sha256)
+        .values(refcount=DocumentBlob.refcount - 1)
+        .returning(DocumentBlob.refcount, DocumentBlob.file_path)
+    ).first()
+    if row is None or row.refcount > 0:
+        return None
+    db.execute(delete(DocumentBlob).where(DocumentBlob.sha256 == sha256))
+    return row.file_path
+
+async def store_upload(db: Session, upload: StagedUpload, owner_id: int, uploaded_by: int, name: str) -> Document:
+    """
+    Create a Document for a staged upload and commit. The staged file is only
+    saved when no identical content is stored yet; otherwise it is left for
+    the caller to discard.
+    """
+    key = await run_in_threadpool(
+        _acquire, db, upload.sha256, upload.size, upload.content_type, blob_path(upload.sha256, upload.extension)
+    )
+    if not await storage.exists(key):
+        await upload.save(storage, key)
+    return await run_in_threadpool(
+        _create_document, db, owner_id, uploaded_by, name, upload.sha256, upload.size, upload.content_type, key
+    )
+
+def link_existing(db: Session, sha256: str, user_id: int, owner_id: int, name: str):
+    """
+    Metadata-only re-upload: a new Document for content ``user_id`` already
+    owns or uploaded, without sending the file again. None when the caller
+    has no such document.
+    """
+    source = db.execute(
+        select(Document.sha256)
+        .where(Document.sha256 == sha256, (Document.user_id == user_id) | (Document.uploaded_by == user_id))
+        .limit(1)
+    ).first()
+    if source is None:
+        return None
+    blob = db.execute(
+        update(DocumentBlob)
+        .where(DocumentBlob.sha256 == sha256)
+        .values(refcount=DocumentBlob.refcount + 1)
+        .returning(DocumentBlob.size, DocumentBlob.content_type, DocumentBlob.file_path)
+    ).first()
+    if blob is None:
+        return None
+    return _create_document(db, owner_id, user_id, name, sha256, blob.size, blob.content_type, blob.file_path)
+
+def _create_document(db: Session, owner_id: int, uploaded_by: int, name: str, sha256: str, size: int,
+                     content_type: str, relative_path: str) -> Document:
+    document = Document(
+        user_id=owner_id,
+        name=name,
+        file_path=f"/uploads/{relative_path}",
+        content_type=content_type,
+        sha256=sha256,
+        size=size,
+        uploaded_by=uploaded_by
+    )
+    db.add(document)
+    db.commit()
+    db.refresh(document)
+    return document
+
+def storage_key(document: Document) -> str:
+    return document.file_path.replace("/uploads/", "", 1)
+
+def release(db: Session, document: Document):
+    """
+    Delete a Document and release its blob, in the caller's transaction.
+    Returns the key of the file nobody references any more, to hand to
+    delete_released once the transaction has committed, or None.
+    """
+    db.delete(document)
+    if document.sha256 is None:
+        # Stored before deduplication: the file belongs to this row alone
+        return storage_key(document)
+    db.flush()
+    return _release(db, document.sha256)
+
+def _referenced(db: Session, key: str) -> bool:
+    sha256 = content_sha256(key)
+    if sha256 is not None:
+        _lock_content(db, sha256)
+        if db.execute(select(DocumentBlob.sha256).where(DocumentBlob.sha256 == sha256)).first() is not None:
+            return True
+    return db.execute(
+        select(Document.id).where(Document.file_path == f"/uploads/{key}").limit(1)
+    ).first() is not None
+
+async def delete_unreferenced(db: Session, key: str, remove=None) -> bool:
+    """
+    Delete the file at ``key`` (or pass it to ``remove``) unless a document
+    references it again, holding the content lock meanwhile. Runs in its own
+    transaction; returns whether the file was removed.
+    """
+    try:
+        if await run_in_threadpool(_referenced, db, key):
+            return False
+        await (remove or storage.delete)(key)
+        return True
+    finally:
+        await run_in_threadpool(db.rollback)  # nothing was written; releases the lock
+
+async def delete_released(db: Session, keys):
+    """
+    Delete the files release() returned, after the commit. A failure only
+    leaves an orphan, which collect_orphan_uploads.py removes later.
+    """
+    for key in keys:
+        try:
+            await delete_unreferenced(db, key)
+        except Exception:
+            logger.exception("Could not delete released upload %s", key)
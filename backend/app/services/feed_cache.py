@@ -0,0 +1,134 @@
+"""
+Shared cache of serialized community feed pages.
+
+Pages are stored once per worker, without the per-user ``is_liked`` flag, and
+handed out as shallow copies that the caller overlays. Structural changes
+(comments and replies created or deleted) bump the feed generation, which
+drops every cached page on every worker. Like counts are patched in place on
+this worker; other workers pick them up when their copy of the page expires.
+"""
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from config import settings
+
+# Comments whose latest like patch is remembered for put()
+PATCH_LOG_SIZE = 10_000
+
+class FeedPageCache:
+    def __init__(self, enabled: bool, max_pages: int, ttl_seconds: float):
+        self.enabled = enabled
+        self.max_pages = max_pages
+        self.ttl = ttl_seconds
+        # (cursor, limit) -> (items, next_cursor, stored_at), least recently used first
+        self._pages = OrderedDict()
+        # comment id -> keys of the cached pages it appears on
+        self._by_comment = defaultdict(set)
+        self._generation = None
+        # Like patches are numbered so that a page loaded before a patch is
+        # not cached after it: comment id -> sequence of its latest patch
+        self._patch_seq = 0
+        self._patched = OrderedDict()
+        self._forgotten_seq = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key, generation):
+        """(copied items, next_cursor) for a fresh page, or None."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            if generation != self._generation:
+                if self._generation is not None:
+                    self.invalidations += 1
+                self._clear()
+                self._generation = generation
+
+            entry = self._pages.get(key)
+            if entry is None or time.monotonic() - entry[2] > self.ttl:
+                if entry is not None:
+                    self._discard(key)
+                self.misses += 1
+                return None
+            self._pages.move_to_end(key)
+            self.hits += 1
+            items, next_cursor, _ = entry
+            return [dict(item) for item in items], next_cursor
+
+    def patch_token(self) -> int:
+        """Taken before loading a page from the database and handed to put()."""
+        with self._lock:
+            return self._patch_seq
+
+    def put(self, key, generation, items: list[dict], next_cursor, token: int = None):
+        if not self.enabled:
+            return
+        with self._lock:
+            # The feed changed while this page was being loaded
+            if generation != self._generation:
+                return
+            # A like count on the page was patched while it was being loaded
+            if token is not None and (
+                token < self._forgotten_seq
+                or any(self._patched.get(item["id"], 0) > token for item in items)
+            ):
+                return
+            if key in self._pages:
+                self._discard(key)
+            self._pages[key] = ([dict(item) for item in items], next_cursor, time.monotonic())
+            for item in items:
+                self._by_comment[item["id"]].add(key)
+            while len(self._pages) > self.max_pages:
+                self._discard(next(iter(self._pages)))
+
+    def patch_likes(self, comment_id: int, likes: int = None, delta: int = 0):
+        """Set (or shift by ``delta``) a comment's like count on every cached page."""
+        with self._lock:
+            self._patch_seq += 1
+            self._patched[comment_id] = self._patch_seq
+            self._patched.move_to_end(comment_id)
+            if len(self._patched) > PATCH_LOG_SIZE:
+                _, self._forgotten_seq = self._patched.popitem(last=False)
+            for key in self._by_comment.get(comment_id, ()):
+                for item in self._pages[key][0]:
+                    if item["id"] == comment_id:
+                        item["likes"] = likes if likes is not None else max(0, item["likes"] + delta)
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "pages": len(self._pages),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "generation": self._generation,
+            }
+
+    def _discard(self, key):
+        items = self._pages.pop(key)[0]
+        for item in items:
+            keys = self._by_comment.get(item["id"])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_comment[item["id"]]
+
+    def _clear(self):
+        self._pages.clear()
+        self._by_comment.clear()
+
+feed_cache = FeedPageCache(
+    settings.FEED_CACHE_ENABLED,
+    settings.FEED_CACHE_MAX_PAGES,
+    settings.FEED_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,92 @@
+"""
+Hot ordering for the community feed.
+
+A comment's score is the sum of its events (the post itself, likes, replies),
+each decaying exponentially with HOT_HALF_LIFE_HOURS. The stored hot_score is
+only exact as of hot_decayed_at: every like/reply event first decays the
+stored value to now and then adds its weight, in the same UPDATE that changes
+the counter, and a periodic bulk job brings all remaining scores forward.
+Between two runs scores differ from the exact ones by at most the decay of
+one interval, which is well below what changes the ordering noticeably.
+"""
+import logging
+import math
+import threading
+import time
+
+from sqlalchemy import case, func, update
+
+from app.models import Comment
+from config import settings
+from config.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+POST_WEIGHT = 1.0
+LIKE_WEIGHT = 1.0
+REPLY_WEIGHT = 2.0
+# Scores below this are zeroed and skipped by later decay runs
+MIN_SCORE = 1e-3
+
+DECAY_RATE = math.log(2) / (settings.HOT_HALF_LIFE_HOURS * 3600)
+
+def decayed_score(now: float):
+    """SQL expression for Comment.hot_score decayed up to ``now``."""
+    return Comment.hot_score * func.exp(-DECAY_RATE * (now - Comment.hot_decayed_at))
+
+def bumped_score(weight, now: float):
+    """Decay to ``now`` and add ``weight`` (a number or bind parameter), never below 0."""
+    bumped = decayed_score(now) + weight
+    return case((bumped < 0, 0.0), else_=bumped)
+
+def decay_all(db) -> int:
+    """Bring every live score forward to now in one UPDATE; returns rows touched."""
+    now = time.time()
+    decayed = decayed_score(now)
+    updated = db.execute(
+        update(Comment)
+        .where(Comment.hot_score > 0)
+        .values(
+            hot_score=case((decayed < MIN_SCORE, 0.0), else_=decayed),
+            hot_decayed_at=now
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return updated
+
+class HotScoreDecayer:
+    def __init__(self, interval_seconds: int):
+        self.interval = interval_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self) -> int:
+        db = SessionLocal()
+        try:
+            return decay_all(db)
+        finally:
+            db.close()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Decaying hot scores failed")
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="hot-score-decay", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+hot_decayer = HotScoreDecayer(settings.HOT_DECAY_INTERVAL_SECONDS)
@@ -0,0 +1,153 @@
+"""
+Write-behind buffer for Comment.likes.
+
+With LIKE_WRITE_BEHIND enabled, a like/unlike still writes its comment_likes
+row in the request, but the counter change is only queued here once that
+transaction commits. A background thread folds the queued deltas into one
+batched UPDATE every LIKE_FLUSH_INTERVAL_MS, so a viral comment takes one row
+lock per flush instead of one per click. Readers add pending() to the stored
+count. Deltas live in worker memory: a crash loses at most one interval of
+counter updates, which reconcile_likes.py --workers-stopped repairs once
+every worker is down (stop() flushes on a clean shutdown).
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import bindparam, case, event, select
+from sqlalchemy.orm import Session
+
+from app.models import Comment
+from app.services import change_log, hot_ranking
+from app.services.feed_cache import feed_cache
+from config import settings
+from config.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Session.info key holding deltas that become visible once the session commits
+SESSION_KEY = "pending_like_deltas"
+
+class LikeCounterBuffer:
+    def __init__(self, enabled: bool, interval_ms: int):
+        self.enabled = enabled
+        self.interval = interval_ms / 1000
+        self._pending = defaultdict(int)
+        # Deltas taken by a flush whose UPDATE has not committed yet; still
+        # counted by readers so counts do not dip while the flush runs
+        self._inflight = {}
+        # Completed flushes; readers compare it before and after reading
+        # stored counts and pending deltas to detect a flush in between
+        self.flushes = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, comment_id: int, delta: int):
+        with self._lock:
+            self._pending[comment_id] += delta
+
+    def pending(self, comment_id: int) -> int:
+        with self._lock:
+            return self._pending.get(comment_id, 0) + self._inflight.get(comment_id, 0)
+
+    def pending_for(self, comment_ids) -> dict:
+        with self._lock:
+            pending = {}
+            for comment_id in comment_ids:
+                delta = self._pending.get(comment_id, 0) + self._inflight.get(comment_id, 0)
+                if delta:
+                    pending[comment_id] = delta
+            return pending
+
+    def _drain(self) -> dict:
+        with self._lock:
+            deltas = {comment_id: delta for comment_id, delta in self._pending.items() if delta}
+            self._pending.clear()
+            self._inflight = deltas
+        return deltas
+
+    def flush(self) -> int:
+        """Apply every queued delta in one executemany UPDATE; returns rows touched."""
+        deltas = self._drain()
+        if not deltas:
+            return 0
+
+        table = Comment.__table__
+        now = time.time()
+        new_likes = table.c.likes + bindparam("delta")
+        stmt = (
+            table.update()
+            .where(table.c.id == bindparam("comment_id"))
+            .values(
+                likes=case((new_likes < 0, 0), else_=new_likes),
+                hot_score=hot_ranking.bumped_score(bindparam("delta") * hot_ranking.LIKE_WEIGHT, now),
+                hot_decayed_at=now
+            )
+        )
+        # Sorted so concurrent flushes from several workers lock rows in the same order
+        params = [{"comment_id": comment_id, "delta": deltas[comment_id]} for comment_id in sorted(deltas)]
+        db = SessionLocal()
+        try:
+            db.execute(stmt, params)
+            counts = db.execute(
+                select(table.c.id, table.c.likes).where(table.c.id.in_(list(deltas)))
+            ).all()
+            change_log.record_many(db, [
+                change_log.change("comment", "likes", comment_id, comment_id, likes)
+                for comment_id, likes in counts
+            ])
+            db.commit()
+            for comment_id, delta in deltas.items():
+                feed_cache.patch_likes(comment_id, delta=delta)
+        except Exception:
+            db.rollback()
+            # Put the deltas back so the next flush retries them
+            with self._lock:
+                for comment_id, delta in deltas.items():
+                    self._pending[comment_id] += delta
+            raise
+        finally:
+            with self._lock:
+                self._inflight = {}
+                self.flushes += 1
+            db.close()
+        return len(params)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing buffered like counters failed")
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="like-counter-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+like_buffer = LikeCounterBuffer(settings.LIKE_WRITE_BEHIND, settings.LIKE_FLUSH_INTERVAL_MS)
+
+def defer_like_delta(db: Session, comment_id: int, delta: int):
+    """Queue a counter change that is handed to the buffer when ``db`` commits."""
+    db.info.setdefault(SESSION_KEY, []).append((comment_id, delta))
+
+@event.listens_for(Session, "after_commit")
+def _publish_deltas(session):
+    for comment_id, delta in session.info.pop(SESSION_KEY, ()):
+        like_buffer.add(comment_id, delta)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_deltas(session, previous_transaction):
+    session.info.pop(SESSION_KEY, None)
@@ -0,0 +1,161 @@
+"""
+Automatic moderation of community posts.
+
+Admin-managed terms are compiled into one Aho–Corasick automaton per worker,
+so checking a post is a single pass over its text however many terms there
+are. The automaton is rebuilt only when the moderation_terms generation moves
+(a term added or removed on any worker). Matches count on word boundaries
+only, so "ass" does not flag "class". Flagged posts stay published and are
+queued for an admin to approve or remove.
+"""
+import threading
+import unicodedata
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models import ModerationQueueItem, ModerationTerm
+from app.services import cache_generations
+from app.utils.db import dialect_insert
+
+TERMS_GENERATION = "moderation_terms"
+
+def normalize(text: str) -> str:
+    """Case- and width-insensitive form, with runs of whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+class TermAutomaton:
+    """Aho–Corasick automaton over normalized terms."""
+
+    def __init__(self, terms):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        for term in terms:
+            node = 0
+            for char in term:
+                child = self._goto[node].get(char)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto[node][char] = child
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = child
+            self._out[node] += (term,)
+
+        # Breadth-first, so a node's failure link is final before its children need it
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] += self._out[self._fail[child]]
+
+    def find(self, text: str) -> set[str]:
+        text = normalize(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        node = 0
+        last = len(text) - 1
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for term in out[node]:
+                start = i - len(term) + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (i == last or not text[i + 1].isalnum()):
+                    found.add(term)
+        return found
+
+class ModerationFilter:
+    def __init__(self):
+        self._watcher = cache_generations.watcher(TERMS_GENERATION)
+        self._generation = None
+        self._automaton = TermAutomaton(())
+        self._lock = threading.Lock()
+
+    def check(self, db: Session, text: str) -> list[str]:
+        """Terms found in ``text``, sorted; reloads the terms if they changed."""
+        generation = self._watcher.version(db)
+        if generation != self._generation:
+            with self._lock:
+                if generation != self._generation:
+                    terms = db.execute(select(ModerationTerm.term)).scalars().all()
+                    self._automaton = TermAutomaton(terms)
+                    self._generation = generation
+        return sorted(self._automaton.find(text))
+
+moderation_filter = ModerationFilter()
+
+def screen(db: Session, entity: str, entity_id: int, comment_id: int, user_id: int, content: str) -> list[str]:
+    """Queue the post for review if it matches any term; part of the caller's transaction."""
+    matches = moderation_filter.check(db, content)
+    if matches:
+        db.add(ModerationQueueItem(
+            entity=entity,
+            entity_id=entity_id,
+            comment_id=comment_id,
+            user_id=user_id,
+            matched_terms=matches
+        ))
+    return matches
+
+def add_terms(db: Session, terms: list[str], admin_id: int) -> int:
+    """Add terms, skipping ones already listed; returns how many were new."""
+    normalized = {normalize(term) for term in terms} - {""}
+    if not normalized:
+        return 0
+    added = db.execute(
+        dialect_insert(db, ModerationTerm.__table__)
+        .values([{"term": term, "created_by": admin_id, "created_at": datetime.utcnow()} for term in sorted(normalized)])
+        .on_conflict_do_nothing(index_elements=["term"])
+        .returning(ModerationTerm.id)
+    ).all()
+    if added:
+        cache_generations.bump(db, TERMS_GENERATION)
+    db.commit()
+    return len(added)
+
+def remove_term(db: Session, term_id: int) -> bool:
+    removed = db.execute(delete(ModerationTerm).where(ModerationTerm.id == term_id)).rowcount
+    if removed:
+        cache_generations.bump(db, TERMS_GENERATION)
+    db.commit()
+    return bool(removed)
+
+def discard_pending(db: Session, entity: str, entity_id: int = None, comment_id: int = None):
+    """Drop pending queue entries for a post that is being deleted."""
+    query = delete(ModerationQueueItem).where(ModerationQueueItem.status == "pending")
+    if entity_id is not None:
+        query = query.where(ModerationQueueItem.entity == entity, ModerationQueueItem.entity_id == entity_id)
+    else:
+        # A comment takes its replies with it
+        query = query.where(ModerationQueueItem.comment_id == comment_id)
+    db.execute(query)
+
+def resolve_removed(db: Session, comment_ids: list[int], reply_ids: list[int], admin_id: int):
+    """Close pending entries for posts removed in bulk (a comment covers its replies)."""
+    conditions = []
+    if comment_ids:
+        conditions.append(ModerationQueueItem.comment_id.in_(comment_ids))
+    if reply_ids:
+        conditions.append(and_(ModerationQueueItem.entity == "reply", ModerationQueueItem.entity_id.in_(reply_ids)))
+    if not conditions:
+        return
+    db.execute(
+        update(ModerationQueueItem)
+        .where(ModerationQueueItem.status == "pending", or_(*conditions))
+        .values(status="removed", reviewed_by=admin_id, reviewed_at=datetime.utcnow())
+    )
+
+def mark_reviewed(item: ModerationQueueItem, status: str, admin_id: int):
+    item.status = status
+    item.reviewed_by = admin_id
+    item.reviewed_at = datetime.utcnow()
@@ -1,7 +1,14 @@
+from datetime import datetime
+from sqlalchemy import and_, cast, insert, or_, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Session
-from app.models.notification import Notification
+from app.models.notification import Notification, NotificationActor
 from app.schemas.notification import NotificationCreate, NotificationType
 from app.models.user import UserAccount
+from app.utils.db import dialect_insert, is_postgresql
+
+# How many of the most recent actors an aggregate notification remembers
+RECENT_ACTORS_LIMIT = 3
 
 def create_notification(db: Session, user_id: int, notif: NotificationCreate):
     db_notif = Notification(
@@ -16,157 +23,397 @@ def create_notification(db: Session, user_id: int, notif: NotificationCreate):
     db.refresh(db_notif)
     return db_notif
 
+def create_typed_notification(
+    db: Session,
+    user_id: int,
+    notif_type: NotificationType,
+    notification_metadata: dict,
+    link: str = None,
+    actor: UserAccount = None
+):
+    """
+    Store a notification as type + metadata only. The text is rendered when
+    the notification is read, in the recipient's language
+    (see notification_templates).
+    """
+    db_notif = Notification(
+        user_id=user_id,
+        actor_id=actor.id if actor else None,
+        type=notif_type,
+        message=None,
+        link=link,
+        notification_metadata=notification_metadata
+    )
+    db.add(db_notif)
+    db.commit()
+    db.refresh(db_notif)
+    return db_notif
+
+def _actor_entry(user: UserAccount) -> dict:
+    return {"id": user.id, "name": f"{user.first_name} {user.last_name}", "role": user.role}
+
+def create_aggregated_notification(
+    db: Session,
+    user_id: int,
+    group_key: str,
+    actor: UserAccount,
+    notif_type: NotificationType,
+    link: str = None,
+    notification_metadata: dict = None
+):
+    """
+    Fold a new actor into the unread notification for ``group_key`` or start a
+    new one, e.g. "Jane Doe and 41 others liked your comment".
+    The aggregate row is upserted against the partial unique index on
+    (user_id, group_key), which also locks it for the rest of the
+    transaction, so concurrent events cannot create duplicate aggregates or
+    lose increments. Actors are recorded in notification_actors and only
+    counted when that insert is new: someone who un-likes and re-likes is
+    never counted twice, however many others acted in between.
+    """
+    metadata = {**(notification_metadata or {}), "recent_actors": []}
+    # Starts at zero: the actor is counted below like any other
+    stmt = dialect_insert(db, Notification).values(
+        user_id=user_id,
+        actor_id=actor.id,
+        type=notif_type,
+        message=None,
+        link=link,
+        notification_metadata=metadata,
+        group_key=group_key,
+        actor_count=0,
+        is_read=0,
+        created_at=datetime.utcnow()
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Notification.user_id, Notification.group_key],
+        index_where=text("is_read = 0 AND group_key IS NOT NULL"),
+        # No-op update: takes the row lock and makes RETURNING yield the id
+        set_={"group_key": stmt.excluded.group_key}
+    ).returning(Notification.id)
+    notification_id = db.execute(stmt).scalar_one()
+
+    added = db.execute(
+        dialect_insert(db, NotificationActor)
+        .values(notification_id=notification_id, actor_id=actor.id)
+        .on_conflict_do_nothing()
+        .returning(NotificationActor.actor_id)
+    ).first()
+    notification = db.get(Notification, notification_id, populate_existing=True)
+    if added is not None:
+        recent_actors = (notification.notification_metadata or {}).get("recent_actors", [])
+        notification.actor_id = actor.id
+        notification.actor_count = notification.actor_count + 1
+        notification.notification_metadata = {
+            **(notification.notification_metadata or {}),
+            "recent_actors": ([_actor_entry(actor)] + recent_actors)[:RECENT_ACTORS_LIMIT]
+        }
+        notification.created_at = datetime.utcnow()
+    db.commit()
+    db.refresh(notification)
+    return notification
+
 def get_user_notifications(db: Session, user_id: int):
     return db.query(Notification).filter(Notification.user_id == user_id).order_by(Notification.created_at.desc()).all()
 
 def mark_as_read(db: Session, notification_id: int, user_id: int):
-    notification = db.query(Notification).filter(
+    updated = db.query(Notification).filter(
         Notification.id == notification_id,
         Notification.user_id == user_id
-    ).first()
-    if notification:
-        notification.is_read = True
-        db.commit()
-        return notification
-    return None
+    ).update({Notification.is_read: 1}, synchronize_session=False)
+    db.commit()
+    return updated > 0
+
+def mark_many_as_read(db: Session, user_id: int, ids: list[int] = None, up_to_id: int = None) -> int:
+    """
+    Mark a set of the user's notifications as read in one UPDATE, either by
+    explicit ids or everything up to (and including) a watermark id.
+    Returns the number of notifications that went from unread to read.
+    """
+    query = db.query(Notification).filter(
+        Notification.user_id == user_id,
+        Notification.is_read == 0
+    )
+    if ids is not None:
+        query = query.filter(Notification.id.in_(ids))
+    if up_to_id is not None:
+        query = query.filter(Notification.id <= up_to_id)
+    updated = query.update({Notification.is_read: 1}, synchronize_session=False)
+    db.commit()
+    return updated
+
+def count_unread(db: Session, user_id: int) -> int:
+    return db.query(Notification).filter(
+        Notification.user_id == user_id,
+        Notification.is_read == 0
+    ).count()
 
 def clear_all_notifications(db: Session, user_id: int):
     db.query(Notification).filter(Notification.user_id == user_id).delete()
     db.commit()
 
+# Bulk maintenance keyed on notification_metadata. On PostgreSQL these are
+# JSONB containment (@>) queries served by the GIN index on the column.
+def _metadata_filter(db: Session, match: dict):
+    if is_postgresql(db):
+        return Notification.notification_metadata.op("@>")(cast(match, JSONB))
+    conditions = []
+    for key, value in match.items():
+        field = Notification.notification_metadata[key]
+        conditions.append((field.as_integer() if isinstance(value, int) else field.as_string()) == value)
+    return and_(*conditions)
+
+def find_notifications(db: Session, types: list[NotificationType] = None, **match):
+    """Notifications whose metadata contains ``match``, e.g. comment_id=55."""
+    query = db.query(Notification).filter(_metadata_filter(db, match))
+    if types:
+        query = query.filter(Notification.type.in_(types))
+    return query
+
+def withdraw_notifications(db: Session, types: list[NotificationType] = None, commit: bool = True, **match) -> int:
+    """Delete every notification about an entity, e.g. the reminders for appointment 123."""
+    withdrawn = find_notifications(db, types, **match).delete(synchronize_session=False)
+    if commit:
+        db.commit()
+    return withdrawn
+
+def update_notifications_metadata(
+    db: Session,
+    changes: dict,
+    types: list[NotificationType] = None,
+    commit: bool = True,
+    **match
+) -> int:
+    """Merge ``changes`` into the metadata of every matching notification."""
+    query = find_notifications(db, types, **match)
+    if is_postgresql(db):
+        updated = query.update(
+            {Notification.notification_metadata: Notification.notification_metadata.op("||")(cast(changes, JSONB))},
+            synchronize_session=False
+        )
+    else:
+        notifications = query.all()
+        for notification in notifications:
+            notification.notification_metadata = {**(notification.notification_metadata or {}), **changes}
+        updated = len(notifications)
+    if commit:
+        db.commit()
+    return updated
+
+def withdraw_comment_notifications(db: Session, comment_id: int, commit: bool = True) -> int:
+    return withdraw_notifications(
+        db,
+        types=[NotificationType.LIKE, NotificationType.NESTED_REPLY],
+        commit=commit,
+        comment_id=comment_id
+    )
+
+def withdraw_comments_notifications(db: Session, comment_ids: list[int]) -> int:
+    """withdraw_comment_notifications for many comments in one DELETE; no commit."""
+    if not comment_ids:
+        return 0
+    if is_postgresql(db):
+        # One @> per id, so Postgres can OR together GIN index scans
+        about = or_(*(
+            Notification.notification_metadata.op("@>")(cast({"comment_id": comment_id}, JSONB))
+            for comment_id in comment_ids
+        ))
+    else:
+        about = Notification.notification_metadata["comment_id"].as_integer().in_(comment_ids)
+    return db.query(Notification).filter(
+        Notification.type.in_([NotificationType.LIKE, NotificationType.NESTED_REPLY]),
+        about
+    ).delete(synchronize_session=False)
+
+APPOINTMENT_NOTIFICATION_TYPES = [
+    NotificationType.APPOINTMENT_REMINDER,
+    NotificationType.APPOINTMENT_CONFIRMED,
+    NotificationType.APPOINTMENT_ASSIGNED,
+    NotificationType.APPOINTMENT_REJECTED,
+]
+
+def withdraw_appointment_notifications(db: Session, appointment_id: int, commit: bool = True) -> int:
+    return withdraw_notifications(
+        db,
+        types=[NotificationType.APPOINTMENT_REMINDER, NotificationType.APPOINTMENT_ASSIGNED],
+        commit=commit,
+        appointment_id=appointment_id
+    )
+
+def reschedule_appointment_notifications(db: Session, appointment, commit: bool = True) -> int:
+    return update_notifications_metadata(
+        db,
+        {"appointment_date": appointment.appointment_date.isoformat()},
+        types=APPOINTMENT_NOTIFICATION_TYPES,
+        commit=commit,
+        appointment_id=appointment.id
+    )
+
 # New notification functions for community interactions
-def create_like_notification(db: Session, post_author_id: int, liker: UserAccount, post_title: str):
-    role_prefix = f"[{liker.role.upper()}] " if liker.role in ['doctor', 'admin'] else ""
-    return create_notification(
+def create_like_notification(db: Session, post_author_id: int, liker: UserAccount, post_title: str, comment_id: int = None):
+    if comment_id is not None:
+        return create_aggregated_notification(
+            db,
+            post_author_id,
+            group_key=f"like:comment:{comment_id}",
+            actor=liker,
+            notif_type=NotificationType.LIKE,
+            link=f"/community/post/{comment_id}",
+            notification_metadata={"comment_id": comment_id, "post_title": post_title}
+        )
+    return create_typed_notification(
         db,
         post_author_id,
-        NotificationCreate(
-            message=f"{role_prefix}{liker.first_name} {liker.last_name} liked your post: {post_title}",
-            type=NotificationType.LIKE,
-            link=f"/community/post/{post_title}",  # You'll need to use post_id in practice
-            notification_metadata={
-                "liker_id": liker.id,
-                "liker_name": f"{liker.first_name} {liker.last_name}",
-                "liker_role": liker.role,
-                "post_title": post_title
-            }
-        )
+        NotificationType.LIKE,
+        {"recent_actors": [_actor_entry(liker)], "post_title": post_title},
+        actor=liker
     )
 
 def create_reply_notification(db: Session, post_author_id: int, replier: UserAccount, post_title: str):
-    role_prefix = f"[{replier.role.upper()}] " if replier.role in ['doctor', 'admin'] else ""
-    return create_notification(
+    return create_typed_notification(
         db,
         post_author_id,
-        NotificationCreate(
-            message=f"{role_prefix}{replier.first_name} {replier.last_name} replied to your post: {post_title}",
-            type=NotificationType.REPLY,
-            link=f"/community/post/{post_title}",  # You'll need to use post_id in practice
-            notification_metadata={
-                "replier_id": replier.id,
-                "replier_name": f"{replier.first_name} {replier.last_name}",
-                "replier_role": replier.role,
-                "post_title": post_title
-            }
-        )
+        NotificationType.REPLY,
+        {"recent_actors": [_actor_entry(replier)], "post_title": post_title},
+        actor=replier
     )
 
-def create_nested_reply_notification(db: Session, comment_author_id: int, replier: UserAccount, post_title: str):
-    role_prefix = f"[{replier.role.upper()}] " if replier.role in ['doctor', 'admin'] else ""
-    return create_notification(
+def create_nested_reply_notification(db: Session, comment_author_id: int, replier: UserAccount, post_title: str, comment_id: int = None):
+    if comment_id is not None:
+        return create_aggregated_notification(
+            db,
+            comment_author_id,
+            group_key=f"nested_reply:comment:{comment_id}",
+            actor=replier,
+            notif_type=NotificationType.NESTED_REPLY,
+            link=f"/community/post/{comment_id}",
+            notification_metadata={"comment_id": comment_id, "post_title": post_title}
+        )
+    return create_typed_notification(
         db,
         comment_author_id,
-        NotificationCreate(
-            message=f"{role_prefix}{replier.first_name} {replier.last_name} replied to your comment on: {post_title}",
-            type=NotificationType.NESTED_REPLY,
-            link=f"/community/post/{post_title}",  # You'll need to use post_id in practice
-            notification_metadata={
-                "replier_id": replier.id,
-                "replier_name": f"{replier.first_name} {replier.last_name}",
-                "replier_role": replier.role,
-                "post_title": post_title
-            }
-        )
+        NotificationType.NESTED_REPLY,
+        {"recent_actors": [_actor_entry(replier)], "post_title": post_title},
+        actor=replier
     )
 
 def create_post_deletion_notification(db: Session, post_author_id: int, admin: UserAccount, post_title: str, reason: str):
-    return create_notification(
+    return create_typed_notification(
         db,
         post_author_id,
-        NotificationCreate(
-            message=f"[ADMIN] Your post '{post_title}' was removed by {admin.first_name} {admin.last_name}. Reason: {reason}",
-            type=NotificationType.POST_DELETION,
-            notification_metadata={
-                "admin_id": admin.id,
-                "admin_name": f"{admin.first_name} {admin.last_name}",
-                "post_title": post_title,
-                "reason": reason
-            }
-        )
+        NotificationType.POST_DELETION,
+        {"admin": _actor_entry(admin), "post_title": post_title, "reason": reason},
+        actor=admin
     )
 
 def create_comment_deletion_notification(db: Session, comment_author_id: int, admin: UserAccount, post_title: str, reason: str):
-    return create_notification(
+    return create_typed_notification(
         db,
         comment_author_id,
-        NotificationCreate(
-            message=f"[ADMIN] Your comment on '{post_title}' was removed by {admin.first_name} {admin.last_name}. Reason: {reason}",
-            type=NotificationType.COMMENT_DELETION,
-            notification_metadata={
-                "admin_id": admin.id,
-                "admin_name": f"{admin.first_name} {admin.last_name}",
-                "post_title": post_title,
-                "reason": reason
-            }
-        )
+        NotificationType.COMMENT_DELETION,
+        {"admin": _actor_entry(admin), "post_title": post_title, "reason": reason},
+        actor=admin
     )
 
+def create_content_removal_notifications(db: Session, admin: UserAccount, removed_per_author: dict, reason: str) -> int:
+    """
+    One notification per author for a bulk removal, ``removed_per_author``
+    mapping author id -> number of their posts removed. Written with a
+    single multi-row INSERT and left for the caller to commit.
+    """
+    if not removed_per_author:
+        return 0
+    admin_entry = _actor_entry(admin)
+    now = datetime.utcnow()
+    db.execute(insert(Notification), [
+        {
+            "user_id": author_id,
+            "actor_id": admin.id,
+            "type": NotificationType.CONTENT_REMOVAL,
+            "message": None,
+            "link": None,
+            "notification_metadata": {"admin": admin_entry, "count": count, "reason": reason},
+            "created_at": now,
+            "is_read": 0,
+        }
+        for author_id, count in removed_per_author.items()
+    ])
+    return len(removed_per_author)
+
 # Additional helpful notifications
 def create_appointment_reminder(db: Session, user_id: int, doctor_name: str, date: str, time: str, appointment_id: int):
-    return create_notification(
+    return create_typed_notification(
         db,
         user_id,
-        NotificationCreate(
-            message=f"Reminder: You have an appointment with Dr. {doctor_name} tomorrow at {time}",
-            type=NotificationType.APPOINTMENT_REMINDER,
-            link=f"/appointments/{appointment_id}",
-            notification_metadata={
-                "appointment_id": appointment_id,
-                "doctor_name": doctor_name,
-                "date": date,
-                "time": time
-            }
-        )
+        NotificationType.APPOINTMENT_REMINDER,
+        {"appointment_id": appointment_id, "doctor_name": doctor_name, "date": date, "time": time},
+        link=f"/appointments/{appointment_id}"
+    )
+
+def create_appointment_confirmed_notification(db: Session, appointment, doctor: UserAccount):
+    return create_typed_notification(
+        db,
+        appointment.user_id,
+        NotificationType.APPOINTMENT_CONFIRMED,
+        {
+            "appointment_id": appointment.id,
+            "appointment_date": appointment.appointment_date.isoformat(),
+            "doctor_name": f"{doctor.first_name} {doctor.last_name}"
+        }
+    )
+
+def create_appointment_assigned_notification(db: Session, appointment, doctor: UserAccount):
+    return create_typed_notification(
+        db,
+        doctor.id,
+        NotificationType.APPOINTMENT_ASSIGNED,
+        {
+            "appointment_id": appointment.id,
+            "appointment_date": appointment.appointment_date.isoformat(),
+            "patient_name": f"{appointment.user.first_name} {appointment.user.last_name}"
+        }
+    )
+
+def create_appointment_rejected_notification(db: Session, appointment, reason: str):
+    return create_typed_notification(
+        db,
+        appointment.user_id,
+        NotificationType.APPOINTMENT_REJECTED,
+        {
+            "appointment_id": appointment.id,
+            "appointment_date": appointment.appointment_date.isoformat(),
+            "reason": reason
+        }
+    )
+
+def create_role_update_notification(db: Session, user_id: int, role: str):
+    return create_typed_notification(db, user_id, NotificationType.ROLE_UPDATE, {"role": role})
+
+def create_document_uploaded_notification(db: Session, patient_id: int, doctor: UserAccount, document_name: str):
+    return create_typed_notification(
+        db,
+        patient_id,
+        NotificationType.DOCUMENT_UPLOADED,
+        {"doctor_name": f"{doctor.first_name} {doctor.last_name}", "document_name": document_name},
+        actor=doctor
     )
 
 def create_prescription_notification(db: Session, user_id: int, doctor: UserAccount, prescription_id: int):
-    return create_notification(
+    return create_typed_notification(
         db,
         user_id,
-        NotificationCreate(
-            message=f"[DOCTOR] Dr. {doctor.first_name} {doctor.last_name} has updated your prescription",
-            type=NotificationType.PRESCRIPTION_UPDATE,
-            link=f"/prescriptions/{prescription_id}",
-            notification_metadata={
-                "doctor_id": doctor.id,
-                "doctor_name": f"{doctor.first_name} {doctor.last_name}",
-                "prescription_id": prescription_id
-            }
-        )
+        NotificationType.PRESCRIPTION_UPDATE,
+        {"doctor_name": f"{doctor.first_name} {doctor.last_name}", "prescription_id": prescription_id},
+        link=f"/prescriptions/{prescription_id}",
+        actor=doctor
     )
 
 def create_test_results_notification(db: Session, user_id: int, doctor: UserAccount, test_id: int):
-    return create_notification(
+    return create_typed_notification(
         db,
         user_id,
-        NotificationCreate(
-            message=f"[DOCTOR] Dr. {doctor.first_name} {doctor.last_name} has uploaded your test results",
-            type=NotificationType.TEST_RESULTS,
-            link=f"/test-results/{test_id}",
-            notification_metadata={
-                "doctor_id": doctor.id,
-                "doctor_name": f"{doctor.first_name} {doctor.last_name}",
-                "test_id": test_id
-            }
-        )
+        NotificationType.TEST_RESULTS,
+        {"doctor_name": f"{doctor.first_name} {doctor.last_name}", "test_id": test_id},
+        link=f"/test-results/{test_id}",
+        actor=doctor
     )
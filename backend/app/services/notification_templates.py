@@ -0,0 +1,204 @@
+"""
+Render-on-read notification text.
+
+Notifications are stored as ``type`` + compact ``notification_metadata``; the
+human readable message is produced when they are listed, in the recipient's
+``UserAccount.language``. Each (type, language) template is parsed once into a
+flat list of literal/field parts and cached, so rendering a notification is a
+handful of dict lookups and one ``str.join``.
+"""
+from datetime import datetime
+from functools import lru_cache
+from string import Formatter
+
+from app.schemas.notification import NotificationType
+
+DEFAULT_LANGUAGE = "en"
+
+# A template is either a single string or a (single actor, several actors)
+# pair for notifications that aggregate multiple actors.
+TEMPLATES = {
+    NotificationType.LIKE: {
+        "en": ("{actor:person} liked your post: {post_title}",
+               "{actor:person} and {others:others} liked your post: {post_title}"),
+        "fr": ("{actor:person} a aimé votre publication : {post_title}",
+               "{actor:person} et {others:others} ont aimé votre publication : {post_title}"),
+    },
+    NotificationType.REPLY: {
+        "en": "{actor:person} replied to your post: {post_title}",
+        "fr": "{actor:person} a répondu à votre publication : {post_title}",
+    },
+    NotificationType.NESTED_REPLY: {
+        "en": ("{actor:person} replied to your comment on: {post_title}",
+               "{actor:person} and {others:others} replied to your comment on: {post_title}"),
+        "fr": ("{actor:person} a répondu à votre commentaire : {post_title}",
+               "{actor:person} et {others:others} ont répondu à votre commentaire : {post_title}"),
+    },
+    NotificationType.POST_DELETION: {
+        "en": "[ADMIN] Your post '{post_title}' was removed by {admin:name}. Reason: {reason}",
+        "fr": "[ADMIN] Votre publication « {post_title} » a été supprimée par {admin:name}. Motif : {reason}",
+    },
+    NotificationType.COMMENT_DELETION: {
+        "en": "[ADMIN] Your comment on '{post_title}' was removed by {admin:name}. Reason: {reason}",
+        "fr": "[ADMIN] Votre commentaire sur « {post_title} » a été supprimé par {admin:name}. Motif : {reason}",
+    },
+    NotificationType.CONTENT_REMOVAL: {
+        "en": "[ADMIN] {admin:name} removed {count:your_posts}. Reason: {reason}",
+        "fr": "[ADMIN] {admin:name} a supprimé {count:your_posts}. Motif : {reason}",
+    },
+    NotificationType.APPOINTMENT_REMINDER: {
+        "en": "Reminder: You have an appointment with Dr. {doctor_name} tomorrow at {time}",
+        "fr": "Rappel : vous avez un rendez-vous avec le Dr {doctor_name} demain à {time}",
+    },
+    NotificationType.APPOINTMENT_CONFIRMED: {
+        "en": "Your appointment scheduled for {appointment_date:datetime} has been confirmed with Dr. {doctor_name}.",
+        "fr": "Votre rendez-vous prévu le {appointment_date:datetime} a été confirmé avec le Dr {doctor_name}.",
+    },
+    NotificationType.APPOINTMENT_ASSIGNED: {
+        "en": "You have been assigned to an appointment on {appointment_date:datetime} with {patient_name}.",
+        "fr": "Un rendez-vous le {appointment_date:datetime} avec {patient_name} vous a été attribué.",
+    },
+    NotificationType.APPOINTMENT_REJECTED: {
+        "en": "Your appointment scheduled for {appointment_date:datetime} has been rejected. Reason: {reason}",
+        "fr": "Votre rendez-vous prévu le {appointment_date:datetime} a été refusé. Motif : {reason}",
+    },
+    NotificationType.ROLE_UPDATE: {
+        "en": "Your account role has been updated to {role}.",
+        "fr": "Le rôle de votre compte est désormais : {role}.",
+    },
+    NotificationType.DOCUMENT_UPLOADED: {
+        "en": "Dr. {doctor_name} has uploaded a document: {document_name}",
+        "fr": "Le Dr {doctor_name} a ajouté un document : {document_name}",
+    },
+    NotificationType.PRESCRIPTION_UPDATE: {
+        "en": "[DOCTOR] Dr. {doctor_name} has updated your prescription",
+        "fr": "[MÉDECIN] Le Dr {doctor_name} a mis à jour votre ordonnance",
+    },
+    NotificationType.TEST_RESULTS: {
+        "en": "[DOCTOR] Dr. {doctor_name} has uploaded your test results",
+        "fr": "[MÉDECIN] Le Dr {doctor_name} a ajouté vos résultats d'analyses",
+    },
+}
+
+ROLE_LABELS = {
+    "en": {"doctor": "[DOCTOR] ", "admin": "[ADMIN] "},
+    "fr": {"doctor": "[MÉDECIN] ", "admin": "[ADMIN] "},
+}
+
+FRENCH_MONTHS = [
+    "janvier", "février", "mars", "avril", "mai", "juin",
+    "juillet", "août", "septembre", "octobre", "novembre", "décembre"
+]
+
+def _format_datetime_en(value):
+    return datetime.fromisoformat(value).strftime('%B %d, %Y at %I:%M %p')
+
+def _format_datetime_fr(value):
+    moment = datetime.fromisoformat(value)
+    return f"{moment.day} {FRENCH_MONTHS[moment.month - 1]} {moment.year} à {moment.hour:02d}h{moment.minute:02d}"
+
+def _person(language):
+    labels = ROLE_LABELS[language]
+    return lambda entry: f"{labels.get(entry.get('role'), '')}{entry.get('name', '')}"
+
+def _others(singular, plural):
+    return lambda count: f"1 {singular}" if count == 1 else f"{count} {plural}"
+
+def _your_posts(singular, plural):
+    return lambda count: singular if count == 1 else plural.format(count)
+
+FORMATTERS = {
+    "en": {
+        "person": _person("en"),
+        "name": lambda entry: entry.get("name", ""),
+        "others": _others("other", "others"),
+        "your_posts": _your_posts("your post", "{} of your posts"),
+        "datetime": _format_datetime_en,
+    },
+    "fr": {
+        "person": _person("fr"),
+        "name": lambda entry: entry.get("name", ""),
+        "others": _others("autre", "autres"),
+        "your_posts": _your_posts("votre publication", "{} de vos publications"),
+        "datetime": _format_datetime_fr,
+    },
+}
+
+LANGUAGES = frozenset(FORMATTERS)
+
+class CompiledTemplate:
+    """A template pre-split into (literal, field, formatter) parts."""
+
+    __slots__ = ("_parts",)
+
+    def __init__(self, source: str, formatters: dict):
+        parts = []
+        for literal, field, spec, _ in Formatter().parse(source):
+            formatter = formatters[spec] if spec else str
+            parts.append((literal, field, formatter))
+        self._parts = tuple(parts)
+
+    def render(self, context: dict) -> str:
+        out = []
+        for literal, field, formatter in self._parts:
+            out.append(literal)
+            if field is not None:
+                value = context.get(field)
+                if value is not None:
+                    out.append(formatter(value))
+        return "".join(out)
+
+@lru_cache(maxsize=None)
+def get_template(notif_type: str, language: str):
+    """
+    Compiled (single, aggregate) templates for a notification type in a
+    language, or None when the type has no template (free-text notifications).
+    """
+    by_language = TEMPLATES.get(notif_type)
+    if by_language is None:
+        return None
+    source = by_language.get(language) or by_language[DEFAULT_LANGUAGE]
+    single, aggregate = source if isinstance(source, tuple) else (source, source)
+    formatters = FORMATTERS[language]
+    return CompiledTemplate(single, formatters), CompiledTemplate(aggregate, formatters)
+
+def normalize_language(language: str) -> str:
+    return language if language in LANGUAGES else DEFAULT_LANGUAGE
+
+def render_message(notification, language: str = DEFAULT_LANGUAGE) -> str:
+    # Rows written before render-on-read (and free-text system messages)
+    # carry their final text
+    if notification.message is not None:
+        return notification.message
+
+    templates = get_template(notification.type, normalize_language(language))
+    if templates is None:
+        return ""
+
+    metadata = notification.notification_metadata or {}
+    actor_count = notification.actor_count or 1
+    context = dict(metadata)
+    recent_actors = metadata.get("recent_actors")
+    if recent_actors:
+        context["actor"] = recent_actors[0]
+    context["others"] = actor_count - 1
+
+    single, aggregate = templates
+    return (aggregate if actor_count > 1 else single).render(context)
+
+def to_out(notification, language: str = DEFAULT_LANGUAGE) -> dict:
+    """Shape a Notification row like NotificationOut with its rendered message."""
+    return {
+        "id": notification.id,
+        "message": render_message(notification, language),
+        "type": notification.type,
+        "link": notification.link,
+        "notification_metadata": notification.notification_metadata,
+        "actor_count": notification.actor_count or 1,
+        "is_read": bool(notification.is_read),
+        "created_at": notification.created_at,
+    }
+
+def render_notifications(notifications, language: str = DEFAULT_LANGUAGE) -> list[dict]:
+    language = normalize_language(language)
+    return [to_out(notification, language) for notification in notifications]
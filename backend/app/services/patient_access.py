@@ -0,0 +1,89 @@
+"""
+Cached doctor -> patient document access decisions.
+
+A doctor may see and add to a patient's documents while they have a
+confirmed appointment with them. Each worker remembers the answer per
+(doctor, patient) pair, granted or not, so repeated document views skip the
+appointment query. Anything that confirms, rejects, reassigns or deletes an
+appointment calls invalidate() in its transaction, which drops every cached
+decision on every worker through cache_generations: immediately on the
+worker that committed, within CACHE_GENERATION_CHECK_MS on the others.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Appointment
+from app.services import cache_generations
+from config import settings
+
+ACCESS_GENERATION = "patient_access"
+access_generation = cache_generations.watcher(ACCESS_GENERATION)
+
+class AccessCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        # (doctor_id, patient_id) -> (granted, stored_at), least recently used first
+        self._decisions = OrderedDict()
+        self._generation = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, generation):
+        """The cached decision, or None."""
+        with self._lock:
+            if generation != self._generation:
+                self._decisions.clear()
+                self._generation = generation
+            entry = self._decisions.get(key)
+            if entry is None or time.monotonic() - entry[1] > self.ttl:
+                self.misses += 1
+                return None
+            self._decisions.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, generation, granted: bool):
+        with self._lock:
+            # Appointments changed while the decision was being made
+            if generation != self._generation:
+                return
+            self._decisions[key] = (granted, time.monotonic())
+            self._decisions.move_to_end(key)
+            while len(self._decisions) > self.max_entries:
+                self._decisions.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._decisions), "hits": self.hits, "misses": self.misses}
+
+access_cache = AccessCache(settings.ACCESS_CACHE_MAX_ENTRIES, settings.ACCESS_CACHE_TTL_SECONDS)
+
+def has_access(db: Session, doctor_id: int, patient_id: int) -> bool:
+    """Whether the doctor has a confirmed appointment with the patient."""
+    generation = access_generation.version(db)
+    key = (doctor_id, patient_id)
+    granted = access_cache.get(key, generation)
+    if granted is None:
+        granted = db.execute(
+            select(Appointment.id).where(
+                Appointment.doctor_id == doctor_id,
+                Appointment.user_id == patient_id,
+                Appointment.status == "confirmed"
+            ).limit(1)
+        ).first() is not None
+        access_cache.put(key, generation, granted)
+    return granted
+
+def has_access_to_any(db: Session, doctor_id: int, patient_ids: Iterable[int]) -> bool:
+    return any(has_access(db, doctor_id, patient_id) for patient_id in patient_ids)
+
+def invalidate(db: Session):
+    """Drop cached decisions on every worker once ``db`` commits."""
+    cache_generations.bump(db, ACCESS_GENERATION)
@@ -0,0 +1,215 @@
+"""
+Full-text search over community comments and replies.
+
+On Postgres the generated ``search_vector`` columns (see app/models/comment.py)
+are matched with websearch_to_tsquery through their GIN indexes and ordered by
+ts_rank. Other databases (the SQLite test setups) use a per-worker in-memory
+inverted index. It is built once, then kept current from the community change
+log: when the feed generation moves, only the comments and replies upserted
+or deleted since the last seq it applied are re-read. It is rebuilt only if
+that seq has been pruned from the log. The fallback is meant for development
+and tests; performance targets are for the Postgres path.
+"""
+import math
+import re
+import threading
+from collections import Counter
+
+from sqlalchemy import func, literal, literal_column, null, select, union_all
+from sqlalchemy.orm import Session, selectinload
+
+from app.models import Comment, CommunityChange, Reply
+from app.models.comment import SEARCH_CONFIG
+from app.services import change_log, community_service
+from app.utils.db import is_postgresql
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+# Ranking has to score every match, so deep pages are refused
+MAX_OFFSET = 1000
+
+TOKEN_RE = re.compile(r"\w+")
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(text.lower())
+
+def search(db: Session, query: str, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0):
+    """
+    Comments and replies matching every term of ``query``, best match first.
+    Returns (serialized results, offset of the next page or None).
+    """
+    if is_postgresql(db):
+        hits = _search_postgresql(db, query, limit + 1, offset)
+    else:
+        hits = fallback_index.search(db, query, limit + 1, offset)
+    has_more = len(hits) > limit
+    results = _hydrate(db, hits[:limit])
+    return results, offset + limit if has_more else None
+
+def _search_postgresql(db: Session, query: str, limit: int, offset: int):
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+    branches = []
+    for kind, model in (("comment", Comment), ("reply", Reply)):
+        vector = literal_column(f"{model.__tablename__}.search_vector")
+        branches.append(
+            select(
+                literal(kind).label("kind"),
+                model.id.label("id"),
+                func.ts_rank(vector, tsquery).label("rank"),
+                model.created_at.label("created_at")
+            ).where(vector.op("@@")(tsquery))
+        )
+    matches = union_all(*branches).subquery()
+    rows = db.execute(
+        select(matches.c.kind, matches.c.id, matches.c.rank)
+        .order_by(matches.c.rank.desc(), matches.c.created_at.desc(), matches.c.id.desc())
+        .offset(offset)
+        .limit(limit)
+    )
+    return [(kind, row_id, float(rank)) for kind, row_id, rank in rows]
+
+def _hydrate(db: Session, hits) -> list[dict]:
+    ids = {"comment": [], "reply": []}
+    for kind, row_id, _ in hits:
+        ids[kind].append(row_id)
+    rows = {"comment": {}, "reply": {}}
+    for kind, model in (("comment", Comment), ("reply", Reply)):
+        if ids[kind]:
+            rows[kind] = {
+                row.id: row for row in
+                db.query(model).options(selectinload(model.user)).filter(model.id.in_(ids[kind]))
+            }
+
+    results = []
+    for kind, row_id, rank in hits:
+        row = rows[kind].get(row_id)
+        if row is None:  # deleted since it was matched
+            continue
+        serialized = row.to_dict()
+        results.append({
+            "type": kind,
+            "id": row.id,
+            "comment_id": row.comment_id if kind == "reply" else row.id,
+            "content": serialized["content"],
+            "user_id": serialized["user_id"],
+            "created_at": serialized["created_at"],
+            "user": serialized["user"],
+            "rank": rank,
+        })
+    return results
+
+class InvertedIndex:
+    """Term -> {(kind, id): term frequency} over all comments and replies."""
+
+    def __init__(self):
+        self.generation = None
+        # Last change log seq applied; None until the first build
+        self.seq = None
+        self._postings = {}
+        # (kind, id) -> (created_at, token count, terms)
+        self._documents = {}
+        # comment id -> its reply ids; deleting a comment cascades to them
+        # without a change log row of their own
+        self._replies = {}
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, row_id: int, content: str, created_at, comment_id: int = None):
+        key = (kind, row_id)
+        self.remove(kind, row_id)
+        if kind == "reply":
+            self._replies.setdefault(comment_id, set()).add(row_id)
+        tokens = tokenize(content)
+        counts = Counter(tokens)
+        self._documents[key] = (created_at, len(tokens), tuple(counts))
+        for term, count in counts.items():
+            self._postings.setdefault(term, {})[key] = count
+
+    def remove(self, kind: str, row_id: int):
+        key = (kind, row_id)
+        if kind == "comment":
+            for reply_id in self._replies.pop(row_id, ()):
+                self.remove("reply", reply_id)
+        document = self._documents.pop(key, None)
+        if document is None:
+            return
+        for term in document[2]:
+            posting = self._postings[term]
+            del posting[key]
+            if not posting:
+                del self._postings[term]
+
+    def rebuild(self, db: Session):
+        # Read first: changes committed during the scan are replayed by the
+        # next sync, which is harmless as applying a change is idempotent
+        seq = change_log.latest_seq(db)
+        self._postings = {}
+        self._documents = {}
+        self._replies = {}
+        for kind, model in (("comment", Comment), ("reply", Reply)):
+            rows = db.execute(
+                select(model.id, model.content, model.created_at, model.comment_id if kind == "reply" else null())
+            ).yield_per(1000)
+            for row in rows:
+                self.add(kind, *row)
+        self.seq = seq
+
+    def sync(self, db: Session):
+        """Apply the upserts and deletions logged since ``seq``."""
+        if self.seq is None or self.seq < change_log.pruned_seq(db):
+            self.rebuild(db)
+            return
+        change_log.sequence(db)
+        changes = db.execute(
+            select(CommunityChange.seq, CommunityChange.entity, CommunityChange.entity_id, CommunityChange.op)
+            .where(CommunityChange.seq > self.seq, CommunityChange.op != "likes")
+            .order_by(CommunityChange.seq)
+        ).all()
+        if not changes:
+            return
+        # Only the last change per row matters
+        latest = {(entity, entity_id): op for _, entity, entity_id, op in changes}
+        for kind, model in (("comment", Comment), ("reply", Reply)):
+            ids = [row_id for (entity, row_id), op in latest.items() if entity == kind]
+            upserted = [row_id for row_id in ids if latest[(kind, row_id)] == "upsert"]
+            rows = {}
+            if upserted:
+                rows = {
+                    row[0]: row[1:] for row in db.execute(
+                        select(model.id, model.content, model.created_at, model.comment_id if kind == "reply" else null())
+                        .where(model.id.in_(upserted))
+                    )
+                }
+            for row_id in ids:
+                if row_id in rows:
+                    self.add(kind, row_id, *rows[row_id])
+                else:  # deleted, possibly after the change was read
+                    self.remove(kind, row_id)
+        self.seq = changes[-1][0]
+
+    def search(self, db: Session, query: str, limit: int, offset: int):
+        generation = community_service.feed_generation.version(db)
+        with self._lock:
+            if generation != self.generation:
+                self.sync(db)
+                self.generation = generation
+            return self._rank(set(tokenize(query)), limit, offset)
+
+    def _rank(self, terms: set, limit: int, offset: int):
+        if not terms:
+            return []
+        postings = sorted((self._postings.get(term, {}) for term in terms), key=len)
+        matches = set(postings[0])
+        for posting in postings[1:]:
+            matches &= posting.keys()
+            if not matches:
+                return []
+
+        scored = []
+        for key in matches:
+            created_at, length, _ = self._documents[key]
+            frequency = sum(posting[key] for posting in postings)
+            scored.append((frequency / (1 + math.log(length)), created_at, key))
+        scored.sort(key=lambda hit: (hit[0], hit[1], hit[2][1]), reverse=True)
+        return [(kind, row_id, rank) for rank, _, (kind, row_id) in scored[offset:offset + limit]]
+
+fallback_index = InvertedIndex()
@@ -0,0 +1,280 @@
+"""
+Where uploaded files live.
+
+Every upload is addressed by a key relative to the storage root, e.g.
+``documents/ab/ab12....pdf`` or ``profile_pictures/7_20250101_120000.png``.
+Routes and services go through the ``storage`` singleton instead of touching
+paths, so the backend can be switched with ``STORAGE_BACKEND``:
+
+* ``local`` (default): a directory (``UPLOAD_DIR``) on this node.
+* ``s3``: an S3-compatible bucket (AWS, MinIO...), shared by every node.
+  Needs boto3 (requirements-s3.txt); uploads above ``S3_MULTIPART_THRESHOLD_MB`` go up as
+  multipart uploads, and one pooled client is shared by all requests.
+
+All operations are async; blocking I/O runs on worker threads.
+"""
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Optional, Tuple
+
+import anyio
+
+from config import settings
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+except ImportError:  # optional dependency, only needed for STORAGE_BACKEND=s3
+    boto3 = None
+
+CHUNK_SIZE = 256 * 1024
+
+@dataclass(frozen=True)
+class ObjectInfo:
+    size: int
+    modified: float  # unix time
+
+class Storage:
+    """Async interface of a storage backend."""
+
+    # Directory on this node holding the files, when the backend has one
+    local_root: Optional[Path] = None
+
+    def ensure(self, *prefixes: str):
+        """Prepare the backend (and the given top-level prefixes) at startup."""
+
+    def staging_dir(self, prefix: str) -> Path:
+        """Directory to write incoming uploads to before ``put``."""
+        raise NotImplementedError
+
+    async def put(self, key: str, source: Path):
+        """Store the file at ``source`` under ``key``, taking ownership of it."""
+        raise NotImplementedError
+
+    def get_stream(self, key: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Bytes ``start``..``end`` (inclusive, default to the end) of an object."""
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        """Delete an object; missing objects are ignored."""
+        raise NotImplementedError
+
+    async def stat(self, key: str) -> Optional[ObjectInfo]:
+        raise NotImplementedError
+
+    async def exists(self, key: str) -> bool:
+        return await self.stat(key) is not None
+
+    async def move(self, key: str, new_key: str):
+        """Rename an object."""
+        raise NotImplementedError
+
+    def iter_objects(self, prefix: str) -> AsyncIterator[Tuple[str, ObjectInfo]]:
+        """Every object under ``prefix``, with its size and modification time, in no particular order."""
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Path of an object on this node's filesystem, for sendfile-style serving."""
+        return None
+
+class LocalStorage(Storage):
+    def __init__(self, root: Path):
+        self.local_root = Path(root)
+
+    def ensure(self, *prefixes: str):
+        """Create the root and the given top-level directories if missing."""
+        for directory in (self.local_root, *(self.local_root / prefix for prefix in prefixes)):
+            directory.mkdir(exist_ok=True, mode=0o755)
+            if not os.access(directory, os.W_OK):
+                raise RuntimeError(f"Upload directory {directory} is not writable")
+
+    def local_path(self, key: str) -> Path:
+        relative = Path(key)
+        if relative.is_absolute() or ".." in relative.parts:
+            raise ValueError(f"Invalid storage key {key!r}")
+        return self.local_root / relative
+
+    def staging_dir(self, prefix: str) -> Path:
+        # Same filesystem as the destination, so put() is an atomic rename
+        return self.local_root / prefix
+
+    async def put(self, key: str, source: Path):
+        destination = self.local_path(key)
+
+        def move():
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(source, destination)
+
+        await anyio.to_thread.run_sync(move)
+
+    async def get_stream(self, key: str, start: int = 0, end: Optional[int] = None):
+        file = await anyio.open_file(self.local_path(key), "rb")
+        try:
+            await file.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = await file.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await file.aclose()
+
+    async def delete(self, key: str):
+        def unlink():
+            try:
+                os.unlink(self.local_path(key))
+            except FileNotFoundError:
+                pass
+
+        await anyio.to_thread.run_sync(unlink)
+
+    async def stat(self, key: str) -> Optional[ObjectInfo]:
+        try:
+            result = await anyio.to_thread.run_sync(os.stat, self.local_path(key))
+        except (FileNotFoundError, NotADirectoryError, ValueError):
+            return None
+        return ObjectInfo(result.st_size, result.st_mtime)
+
+    async def move(self, key: str, new_key: str):
+        await self.put(new_key, self.local_path(key))
+
+    async def iter_objects(self, prefix: str):
+        # One directory listing at a time, so memory does not grow with the tree
+        pending = [prefix]
+        while pending:
+            directory = pending.pop()
+            entries = await anyio.to_thread.run_sync(_list_dir, self.local_root / directory)
+            for name, is_dir, info in entries:
+                key = f"{directory}/{name}"
+                if is_dir:
+                    pending.append(key)
+                else:
+                    yield key, info
+
+class S3Storage(Storage):
+    def __init__(self, bucket: str, endpoint_url: str = None, region: str = None, access_key_id: str = None,
+                 secret_access_key: str = None, max_pool_connections: int = 32,
+                 multipart_threshold: int = 16 * 1024 * 1024, multipart_chunk_size: int = 8 * 1024 * 1024,
+                 staging_dir: Path = None):
+        if boto3 is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 (pip install -r requirements-s3.txt)")
+        self.bucket = bucket
+        # boto3 clients are thread-safe; one client keeps one connection pool
+        self.client = boto3.session.Session().client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            config=BotoConfig(max_pool_connections=max_pool_connections, retries={"mode": "standard"})
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunk_size,
+            max_concurrency=4
+        )
+        # Shared by every worker process on the node: a resumable upload's
+        # chunks may reach any of them
+        self._staging = staging_dir or Path(tempfile.gettempdir()) / "uploads-staging"
+        self._staging.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    def staging_dir(self, prefix: str) -> Path:
+        return self._staging
+
+    async def put(self, key: str, source: Path):
+        def upload():
+            try:
+                self.client.upload_file(os.fspath(source), self.bucket, key, Config=self.transfer_config)
+            finally:
+                try:
+                    os.unlink(source)
+                except FileNotFoundError:
+                    pass
+
+        await anyio.to_thread.run_sync(upload)
+
+    async def get_stream(self, key: str, start: int = 0, end: Optional[int] = None):
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        response = await anyio.to_thread.run_sync(
+            lambda: self.client.get_object(Bucket=self.bucket, Key=key, Range=byte_range)
+        )
+        body = response["Body"]
+        try:
+            chunks = body.iter_chunks(CHUNK_SIZE)
+            while chunk := await anyio.to_thread.run_sync(next, chunks, b""):
+                yield chunk
+        finally:
+            body.close()
+
+    async def delete(self, key: str):
+        await anyio.to_thread.run_sync(lambda: self.client.delete_object(Bucket=self.bucket, Key=key))
+
+    async def move(self, key: str, new_key: str):
+        def copy_and_delete():
+            self.client.copy({"Bucket": self.bucket, "Key": key}, self.bucket, new_key, Config=self.transfer_config)
+            self.client.delete_object(Bucket=self.bucket, Key=key)
+
+        await anyio.to_thread.run_sync(copy_and_delete)
+
+    async def iter_objects(self, prefix: str):
+        pages = iter(self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=f"{prefix}/"))
+        while page := await anyio.to_thread.run_sync(next, pages, None):
+            for item in page.get("Contents", ()):
+                yield item["Key"], ObjectInfo(item["Size"], item["LastModified"].timestamp())
+
+    async def stat(self, key: str) -> Optional[ObjectInfo]:
+        def head():
+            try:
+                return self.client.head_object(Bucket=self.bucket, Key=key)
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                    return None
+                raise
+
+        response = await anyio.to_thread.run_sync(head)
+        if response is None:
+            return None
+        return ObjectInfo(response["ContentLength"], response["LastModified"].timestamp())
+
+def _list_dir(path: Path):
+    try:
+        with os.scandir(path) as entries:
+            listing = []
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    listing.append((entry.name, True, None))
+                elif entry.is_file(follow_symlinks=False):
+                    try:
+                        result = entry.stat(follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+                    listing.append((entry.name, False, ObjectInfo(result.st_size, result.st_mtime)))
+            return listing
+    except FileNotFoundError:
+        return []
+
+def build_storage() -> Storage:
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage(
+            bucket=settings.S3_BUCKET,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+            multipart_threshold=settings.S3_MULTIPART_THRESHOLD_MB * 1024 * 1024,
+            multipart_chunk_size=settings.S3_MULTIPART_CHUNK_MB * 1024 * 1024,
+            staging_dir=settings.STAGING_DIR
+        )
+    if settings.STORAGE_BACKEND != "local":
+        raise RuntimeError(f"Unknown STORAGE_BACKEND {settings.STORAGE_BACKEND!r}")
+    return LocalStorage(settings.UPLOAD_DIR)
+
+storage = build_storage()
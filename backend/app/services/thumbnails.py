@@ -0,0 +1,134 @@
+"""
+Profile picture derivatives.
+
+upload_profile_picture stores the original and queues it here. A small worker
+pool, off the request path, decodes it once and writes square WebP
+thumbnails for each of SIZES, re-encoded without EXIF/ICC metadata, then
+records their URLs in UserAccount.profile_picture_variants. Until that lands
+(or when Pillow is not installed) clients fall back to the original.
+"""
+import io
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import anyio
+from sqlalchemy import update
+
+from app.models import UserAccount
+from app.services import community_service
+from app.services.storage import storage
+from config import settings
+from config.database import SessionLocal
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional dependency; without it only originals are served
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+SIZES = (48, 128, 512)
+WEBP_QUALITY = 80
+
+def variant_key(original_key: str, size: int) -> str:
+    stem = os.path.splitext(os.path.basename(original_key))[0]
+    return f"profile_pictures/thumbs/{stem}_{size}.webp"
+
+def picture_keys(picture_url, variants) -> list[str]:
+    """Storage keys of an uploaded profile picture and its thumbnails."""
+    urls = [picture_url, *(variants or {}).values()]
+    return [
+        url.removeprefix("/static/") for url in urls
+        if url and url.startswith("/static/profile_pictures/")
+    ]
+
+def render(data: bytes) -> dict[int, bytes]:
+    """WebP thumbnails of an image, largest first, keyed by edge size."""
+    with Image.open(io.BytesIO(data)) as source:
+        # JPEGs can be decoded at a reduced scale straight from the DCT
+        source.draft("RGB", (max(SIZES) * 2, max(SIZES) * 2))
+        image = ImageOps.exif_transpose(source)
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    thumbnails = {}
+    for size in sorted(SIZES, reverse=True):
+        # Each size is resampled from the previous, larger one
+        image = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4)
+        thumbnails[size] = buffer.getvalue()
+    return thumbnails
+
+class ThumbnailWorker:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._pool = None
+
+    @property
+    def enabled(self) -> bool:
+        return Image is not None and self.workers > 0
+
+    def start(self):
+        if Image is None and self.workers > 0:
+            logger.warning("Pillow is not installed: profile picture thumbnails are disabled")
+        if not self.enabled or self._pool is not None:
+            return
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="thumbnails")
+
+    def stop(self):
+        if self._pool is None:
+            return
+        self._pool.shutdown(wait=True)
+        self._pool = None
+
+    def submit(self, user_id: int, picture_url: str, key: str) -> bool:
+        """Queue thumbnails for ``key``, the picture now at ``picture_url`` on the user's profile."""
+        if self._pool is None:
+            return False
+        self._pool.submit(self._run, user_id, picture_url, key)
+        return True
+
+    def _run(self, user_id: int, picture_url: str, key: str):
+        try:
+            anyio.run(self.process, user_id, picture_url, key)
+        except Exception:
+            logger.exception("Generating thumbnails for %s failed", key)
+
+    async def process(self, user_id: int, picture_url: str, key: str):
+        data = b"".join([chunk async for chunk in storage.get_stream(key)])
+        variants = {}
+        for size, body in render(data).items():
+            variant = variant_key(key, size)
+            await storage.put(variant, _spill(body))
+            variants[str(size)] = f"/static/{variant}"
+
+        db = SessionLocal()
+        try:
+            # Only if the user has not replaced the picture in the meantime
+            updated = db.execute(
+                update(UserAccount)
+                .where(UserAccount.id == user_id, UserAccount.profile_picture == picture_url)
+                .values(profile_picture_variants=variants)
+            ).rowcount
+            if updated:
+                community_service.invalidate_feed(db)
+            db.commit()
+        finally:
+            db.close()
+        if not updated:
+            for size in SIZES:
+                await storage.delete(variant_key(key, size))
+
+def _spill(body: bytes):
+    """Write a rendered thumbnail to a staging file for storage.put."""
+    with tempfile.NamedTemporaryFile(
+        dir=storage.staging_dir("profile_pictures"), prefix=".thumb-", suffix=".part", delete=False
+    ) as file:
+        file.write(body)
+    return Path(file.name)
+
+thumbnailer = ThumbnailWorker(settings.THUMBNAIL_WORKERS)
@@ -0,0 +1,138 @@
+"""
+Mark-and-sweep collection of uploaded files nothing references any more:
+pictures left behind by failed requests, staging files of crashed uploads,
+documents whose database commit failed after the file was written.
+
+Referenced keys come from:
+
+* ``documents`` / ``document_blobs`` file paths, looked up a batch of
+  scanned keys at a time;
+* ``upload_sessions``, for their ``.session-<id>.part`` staging files;
+* every user's ``profile_picture`` and its thumbnails, marked up front
+  (one row per user with a picture).
+
+Files modified within the grace period are never touched, which covers
+uploads whose row is not committed yet. Orphans are deleted, or moved under
+``quarantine/<date>/`` for inspection, in batches; a dry run only reports
+them. Each document orphan is checked again right before it goes, under the
+content lock store_upload takes, since the same content may have been
+uploaded again after its batch was looked up.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Iterable, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Document, DocumentBlob, UploadSession, UserAccount
+from app.services import document_storage
+from app.services.storage import ObjectInfo, storage
+from app.services.thumbnails import picture_keys
+
+logger = logging.getLogger(__name__)
+
+PREFIXES = ("documents", "profile_pictures")
+QUARANTINE_PREFIX = "quarantine"
+BATCH_SIZE = 500
+SESSION_PREFIX = ".session-"
+
+@dataclass
+class CollectionReport:
+    scanned: int = 0
+    recent: int = 0  # skipped, inside the grace period
+    orphans: int = 0
+    orphan_bytes: int = 0
+    dry_run: bool = False
+    quarantined: bool = False
+
+def _referenced_pictures(db: Session) -> set:
+    referenced = set()
+    rows = db.execute(
+        select(UserAccount.profile_picture, UserAccount.profile_picture_variants)
+        .where(UserAccount.profile_picture.isnot(None))
+        .execution_options(yield_per=1000)
+    )
+    for picture, variants in rows:
+        referenced.update(picture_keys(picture, variants))
+    return referenced
+
+def _session_id(key: str):
+    name = key.rsplit("/", 1)[-1]
+    if name.startswith(SESSION_PREFIX) and name.endswith(".part"):
+        return name[len(SESSION_PREFIX):-len(".part")]
+    return None
+
+def _referenced_documents(db: Session, keys: List[str]) -> set:
+    """The keys among ``keys`` a document, blob or upload session still uses."""
+    referenced = set(db.execute(
+        select(DocumentBlob.file_path).where(DocumentBlob.file_path.in_(keys))
+    ).scalars())
+    # Files stored before deduplication are only known to their Document row
+    referenced.update(
+        path.replace("/uploads/", "", 1) for path in db.execute(
+            select(Document.file_path).where(Document.file_path.in_([f"/uploads/{key}" for key in keys]))
+        ).scalars()
+    )
+    sessions = {session_id: key for key in keys if (session_id := _session_id(key))}
+    if sessions:
+        referenced.update(sessions[session_id] for session_id in db.execute(
+            select(UploadSession.id).where(UploadSession.id.in_(list(sessions)))
+        ).scalars())
+    return referenced
+
+async def _batches(objects: AsyncIterator[Tuple[str, ObjectInfo]], size: int):
+    batch = []
+    async for item in objects:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _remover(quarantine_prefix):
+    if quarantine_prefix:
+        return lambda key: storage.move(key, f"{quarantine_prefix}/{key}")
+    return storage.delete
+
+async def _sweep(keys: Iterable[str], quarantine_prefix):
+    remove = _remover(quarantine_prefix)
+    for key in keys:
+        await remove(key)
+
+async def _sweep_documents(db: Session, keys: Iterable[str], quarantine_prefix) -> List[str]:
+    """Remove the keys still unreferenced when rechecked; returns those removed."""
+    remove = _remover(quarantine_prefix)
+    return [key for key in keys if await document_storage.delete_unreferenced(db, key, remove)]
+
+async def collect(db: Session, grace: timedelta, dry_run: bool = False, quarantine: bool = False) -> CollectionReport:
+    report = CollectionReport(dry_run=dry_run, quarantined=quarantine)
+    cutoff = time.time() - grace.total_seconds()
+    quarantine_prefix = f"{QUARANTINE_PREFIX}/{datetime.utcnow():%Y%m%d}" if quarantine else None
+    pictures = _referenced_pictures(db)
+
+    for prefix in PREFIXES:
+        async for batch in _batches(storage.iter_objects(prefix), BATCH_SIZE):
+            report.scanned += len(batch)
+            candidates = {key: info for key, info in batch if info.modified < cutoff}
+            report.recent += len(batch) - len(candidates)
+            if not candidates:
+                continue
+            if prefix == "documents":
+                referenced = _referenced_documents(db, list(candidates))
+                db.rollback()  # don't hold a snapshot open across the sweep
+            else:
+                referenced = pictures
+            orphans = [key for key in candidates if key not in referenced]
+            if orphans and not dry_run:
+                if prefix == "documents":
+                    orphans = await _sweep_documents(db, orphans, quarantine_prefix)
+                else:
+                    await _sweep(orphans, quarantine_prefix)
+                logger.info("Removed %d orphaned uploads under %s", len(orphans), prefix)
+            report.orphans += len(orphans)
+            report.orphan_bytes += sum(candidates[key].size for key in orphans)
+    return report
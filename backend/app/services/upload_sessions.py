@@ -0,0 +1,273 @@
+"""
+Resumable document uploads.
+
+A client opens a session with the document's name, size and SHA-256, then
+PUTs the bytes in chunks at the session's current offset. After a dropped
+connection it reads the offset back and carries on from there instead of
+starting over; bytes that reached the server before the drop are kept.
+Chunks are streamed from the request into a staging file
+(``.session-<id>.part`` in the documents staging directory), so memory use
+does not depend on the chunk or document size. Completing the session reads
+the file once to check the SHA-256 and hands it to document_storage like a
+single-request upload.
+
+One chunk per session is written at a time: a PUT takes a short lease
+(``locked_until``) with a conditional UPDATE on the expected offset and
+releases it with the new offset. Staging files live in the node's staging
+directory (``UPLOAD_DIR/documents``, or ``STAGING_DIR`` with S3), which all
+of its worker processes share. With several API nodes a session's requests
+must reach the same node, unless that directory is on a volume they share.
+"""
+import hashlib
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator
+
+import anyio
+from fastapi import HTTPException
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.models import Document, UploadSession
+from app.services import document_storage
+from app.services.storage import storage
+from app.utils import uploads
+from config import settings
+
+MB = 1024 * 1024
+MAX_UPLOAD_SIZE = settings.MAX_RESUMABLE_UPLOAD_MB * MB
+MAX_CHUNK_SIZE = settings.UPLOAD_CHUNK_MAX_MB * MB
+MAX_OPEN_SESSIONS = 10  # per user
+CHUNK_LEASE = timedelta(minutes=5)
+EXPIRED_BATCH = 100
+
+def staging_path(session_id: str) -> Path:
+    return storage.staging_dir("documents") / f".session-{session_id}.part"
+
+def _conflict(offset: int, detail: str) -> HTTPException:
+    # The client resumes from Upload-Offset
+    return HTTPException(status_code=409, detail=detail, headers={"Upload-Offset": str(offset)})
+
+def _gone() -> HTTPException:
+    # The staging file is missing, e.g. the request reached another node
+    return HTTPException(
+        status_code=410,
+        detail="The data uploaded so far is no longer available. Start a new upload."
+    )
+
+def _unlink(path: Path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+def expire(db: Session) -> int:
+    """Delete a batch of abandoned sessions and their staging files."""
+    expired = db.execute(
+        select(UploadSession.id)
+        .where(UploadSession.expires_at < datetime.utcnow())
+        .limit(EXPIRED_BATCH)
+    ).scalars().all()
+    if not expired:
+        return 0
+    db.execute(delete(UploadSession).where(UploadSession.id.in_(expired)))
+    db.commit()
+    for session_id in expired:
+        _unlink(staging_path(session_id))
+    return len(expired)
+
+def create(db: Session, user_id: int, owner_id: int, name: str, size: int, sha256: str) -> UploadSession:
+    expire(db)
+    if size > MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File size exceeds maximum allowed size of {uploads.size_label(MAX_UPLOAD_SIZE)}"
+        )
+    open_sessions = db.execute(
+        select(func.count()).select_from(UploadSession).where(UploadSession.user_id == user_id)
+    ).scalar_one()
+    if open_sessions >= MAX_OPEN_SESSIONS:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many unfinished uploads. Complete or cancel one first."
+        )
+    now = datetime.utcnow()
+    upload_session = UploadSession(
+        user_id=user_id,
+        owner_id=owner_id,
+        name=name,
+        size=size,
+        sha256=sha256,
+        created_at=now,
+        expires_at=now + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+    )
+    db.add(upload_session)
+    db.commit()
+    db.refresh(upload_session)
+    return upload_session
+
+def get(db: Session, session_id: str, user_id: int):
+    """The caller's session, or None."""
+    return db.execute(
+        select(UploadSession).where(UploadSession.id == session_id, UploadSession.user_id == user_id)
+    ).scalar_one_or_none()
+
+def _claim(db: Session, upload_session: UploadSession, offset: int) -> datetime:
+    """Take the session's write lease at ``offset``; returns the lease expiry."""
+    now = datetime.utcnow()
+    lease = now + CHUNK_LEASE
+    claimed = db.execute(
+        update(UploadSession)
+        .where(
+            UploadSession.id == upload_session.id,
+            UploadSession.offset == offset,
+            or_(UploadSession.locked_until.is_(None), UploadSession.locked_until < now)
+        )
+        .values(locked_until=lease)
+    ).rowcount
+    db.commit()
+    if not claimed:
+        db.refresh(upload_session)
+        if upload_session.offset != offset:
+            raise _conflict(upload_session.offset, "Offset does not match the upload")
+        raise _conflict(upload_session.offset, "Another chunk of this upload is in progress")
+    return lease
+
+def _release(db: Session, upload_session: UploadSession, lease: datetime, **values) -> bool:
+    released = db.execute(
+        update(UploadSession)
+        .where(UploadSession.id == upload_session.id, UploadSession.locked_until == lease)
+        .values(locked_until=None, **values)
+    ).rowcount
+    db.commit()
+    if not released:
+        return False
+    db.refresh(upload_session)
+    return True
+
+async def write_chunk(db: Session, upload_session: UploadSession, offset: int,
+                      chunks: AsyncIterator[bytes]) -> UploadSession:
+    """
+    Append a request body at ``offset``. On a dropped connection the bytes
+    received so far are kept and the session's offset moves past them.
+    """
+    if offset != upload_session.offset:
+        raise _conflict(upload_session.offset, "Offset does not match the upload")
+    lease = await run_in_threadpool(_claim, db, upload_session, offset)
+
+    limit = min(upload_session.size - offset, MAX_CHUNK_SIZE)
+    content_type = upload_session.content_type
+    head = b""
+    written = 0
+    file = None
+    try:
+        try:
+            # A retried first chunk starts the file over
+            file = await anyio.open_file(staging_path(upload_session.id), "r+b" if offset else "wb")
+        except FileNotFoundError:
+            if not offset:
+                raise
+            # The bytes received so far are lost, so the session cannot be resumed
+            await abort(db, upload_session)
+            raise _gone()
+        await file.seek(offset)
+        async for chunk in chunks:
+            if content_type is None:
+                # Hold back the first bytes until the content type is known
+                head += chunk
+                if len(head) < uploads.SNIFF_SIZE:
+                    continue
+                content_type = uploads.check_type(head, uploads.DOCUMENT_TYPES)
+                chunk, head = head, b""
+            if written + len(chunk) > limit:
+                written = 0
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Chunk is larger than the rest of the upload or the maximum chunk size "
+                           f"of {uploads.size_label(MAX_CHUNK_SIZE)}"
+                )
+            await file.write(chunk)
+            written += len(chunk)
+        if head:
+            # A whole upload shorter than the sniffed prefix
+            content_type = uploads.check_type(head, uploads.DOCUMENT_TYPES)
+            if len(head) > limit:
+                raise HTTPException(status_code=413, detail="Chunk is larger than the rest of the upload")
+            await file.write(head)
+            written += len(head)
+    finally:
+        try:
+            if file is not None:
+                try:
+                    # Drop anything past the acknowledged bytes, e.g. from a rejected chunk
+                    await file.truncate(offset + written)
+                finally:
+                    await file.aclose()
+        finally:
+            released = await run_in_threadpool(
+                _release, db, upload_session, lease,
+                offset=offset + written,
+                content_type=content_type if offset + written else None,
+                expires_at=datetime.utcnow() + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+            )
+    if not released:
+        raise _conflict(upload_session.offset, "The chunk took too long and was superseded")
+    return upload_session
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(uploads.CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+async def complete(db: Session, upload_session: UploadSession) -> Document:
+    """Check the assembled file against the declared SHA-256 and store it as a Document."""
+    if upload_session.offset != upload_session.size:
+        raise _conflict(upload_session.offset, "Upload is not complete")
+    await run_in_threadpool(_claim, db, upload_session, upload_session.offset)
+
+    path = staging_path(upload_session.id)
+    try:
+        sha256 = await run_in_threadpool(_sha256, path)
+    except FileNotFoundError:
+        await abort(db, upload_session)
+        raise _gone()
+    if sha256 != upload_session.sha256:
+        await abort(db, upload_session)
+        raise HTTPException(
+            status_code=422,
+            detail="Checksum mismatch: the uploaded file is corrupt. Start a new upload."
+        )
+    try:
+        # Only the first bytes were sniffed while the chunks came in
+        await run_in_threadpool(uploads.check_container, path, upload_session.content_type, uploads.DOCUMENT_TYPES)
+    except HTTPException:
+        await abort(db, upload_session)
+        raise
+
+    upload = uploads.StagedUpload(
+        path, upload_session.size, upload_session.sha256, upload_session.content_type,
+        uploads.DOCUMENT_TYPES[upload_session.content_type]
+    )
+    try:
+        # Identical content already stored is only referenced again
+        document = await document_storage.store_upload(
+            db, upload, upload_session.owner_id, upload_session.user_id, upload_session.name
+        )
+    finally:
+        # The staging file is gone either way, so the session is too
+        await run_in_threadpool(upload.discard)
+        await abort(db, upload_session)
+    return document
+
+async def abort(db: Session, upload_session: UploadSession):
+    """Delete a session and whatever it has received."""
+    await run_in_threadpool(_delete, db, upload_session.id)
+
+def _delete(db: Session, session_id: str):
+    db.execute(delete(UploadSession).where(UploadSession.id == session_id))
+    db.commit()
+    _unlink(staging_path(session_id))
@@ -0,0 +1,205 @@
+"""
+FileResponse with conditional requests and zero-copy sends.
+
+Starlette's FileResponse already answers ``Range``/``If-Range`` with 206s.
+On top of that this answers ``If-None-Match``/``If-Modified-Since`` with
+304s, uses the SHA-256 in a content-addressed file's name as a strong ETag
+(and marks such files immutable), and hands whole-file bodies to the server
+via the ASGI ``http.response.pathsend`` / ``zerocopysend`` extensions
+(``sendfile``) when the server offers them; otherwise, and for ranges, the
+body is streamed in large chunks.
+
+Objects in a remote storage backend are streamed by StoredObjectResponse
+with the same validators, 304s and (single) ranges.
+"""
+import hashlib
+import os
+import re
+import stat
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from mimetypes import guess_type
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+CONTENT_HASH = re.compile(r"^[0-9a-f]{64}$")
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+DEFAULT_MAX_AGE = 3600
+
+def content_hash(path) -> str | None:
+    """The SHA-256 a content-addressed file is named after, if it is one."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return stem if CONTENT_HASH.match(stem) else None
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def _not_modified_since(if_modified_since: str, mtime: float) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return since is not None and int(mtime) <= since.timestamp()
+
+def _cache_control(immutable: bool, private: bool, max_age: int | None) -> str:
+    scope = "private" if private else "public"
+    if immutable:
+        return f"{scope}, max-age={IMMUTABLE_MAX_AGE if max_age is None else max_age}, immutable"
+    return f"{scope}, max-age={DEFAULT_MAX_AGE if max_age is None else max_age}"
+
+def _not_modified(request_headers: Headers, etag: str, mtime: float) -> bool:
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is not None:
+        return _not_modified_since(if_modified_since, mtime)
+    return False
+
+async def _send_not_modified(headers, scope: Scope, receive: Receive, send: Send) -> None:
+    keep = ("etag", "last-modified", "cache-control", "vary", "access-control-allow-origin")
+    response = Response(
+        status_code=304,
+        headers={name: headers[name] for name in keep if name in headers}
+    )
+    await response(scope, receive, send)
+
+class CachedFileResponse(FileResponse):
+    chunk_size = 256 * 1024
+
+    def __init__(self, path, private: bool = True, max_age: int | None = None, **kwargs):
+        """
+        Content-addressed files are cached as immutable, for a year unless
+        ``max_age`` says otherwise (e.g. until a signed link expires); other
+        files for ``max_age`` or an hour.
+        """
+        super().__init__(path, **kwargs)
+        self.content_hash = content_hash(path)
+        self.headers.setdefault("cache-control", _cache_control(self.content_hash is not None, private, max_age))
+
+    def set_stat_headers(self, stat_result: os.stat_result) -> None:
+        if self.content_hash is not None:
+            self.headers.setdefault("etag", f'"{self.content_hash}"')
+        super().set_stat_headers(stat_result)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.stat_result is None:
+            try:
+                self.stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+            except FileNotFoundError:
+                raise RuntimeError(f"File at path {self.path} does not exist.")
+            if not stat.S_ISREG(self.stat_result.st_mode):
+                raise RuntimeError(f"File at path {self.path} is not a file.")
+            self.set_stat_headers(self.stat_result)
+
+        headers = Headers(scope=scope)
+        if _not_modified(headers, self.headers["etag"], self.stat_result.st_mtime):
+            await _send_not_modified(self.headers, scope, receive, send)
+            return
+
+        extensions = scope.get("extensions") or {}
+        zero_copy = "http.response.pathsend" in extensions or "http.response.zerocopysend" in extensions
+        if zero_copy and scope["method"].upper() != "HEAD" and "range" not in headers:
+            await self._send_zero_copy(send, extensions)
+            if self.background is not None:
+                await self.background()
+            return
+
+        await super().__call__(scope, receive, send)
+
+    async def _send_zero_copy(self, send: Send, extensions: dict) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": os.fspath(self.path)})
+            return
+        with open(self.path, "rb") as file:
+            await send({
+                "type": "http.response.zerocopysend",
+                "file": file,
+                "count": self.stat_result.st_size,
+            })
+
+class StoredObjectResponse(Response):
+    """An object streamed from a storage backend that has no local files."""
+
+    def __init__(self, storage, key: str, info, private: bool = True, max_age: int | None = None,
+                 headers: dict | None = None, media_type: str | None = None):
+        self.storage = storage
+        self.key = key
+        self.info = info
+        self.status_code = 200
+        self.media_type = media_type or guess_type(key)[0] or "application/octet-stream"
+        self.background = None
+        self.init_headers(headers)
+        digest = content_hash(key)
+        if digest is None:
+            digest = hashlib.md5(f"{info.modified}-{info.size}".encode(), usedforsecurity=False).hexdigest()
+        self.headers.setdefault("etag", f'"{digest}"')
+        self.headers.setdefault("last-modified", formatdate(info.modified, usegmt=True))
+        self.headers.setdefault("accept-ranges", "bytes")
+        self.headers.setdefault("cache-control", _cache_control(content_hash(key) is not None, private, max_age))
+
+    def _requested_range(self, request_headers: Headers):
+        """(start, end) for a satisfiable single range, else None to send the whole object."""
+        http_range = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if http_range is None or (if_range is not None and if_range != self.headers["etag"]):
+            return None
+        unit, _, spec = http_range.partition("=")
+        if unit.strip() != "bytes" or "," in spec:
+            return None
+        first, _, last = spec.strip().partition("-")
+        size = self.info.size
+        try:
+            if first:
+                start, end = int(first), int(last) if last else size - 1
+            else:
+                start, end = max(0, size - int(last)), size - 1
+        except ValueError:
+            return None
+        if start > end or start >= size:
+            return None
+        return start, min(end, size - 1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        request_headers = Headers(scope=scope)
+        if _not_modified(request_headers, self.headers["etag"], self.info.modified):
+            await _send_not_modified(self.headers, scope, receive, send)
+            return
+
+        byte_range = self._requested_range(request_headers)
+        if byte_range is None:
+            start, end, status = 0, self.info.size - 1, 200
+        else:
+            (start, end), status = byte_range, 206
+            self.headers["content-range"] = f"bytes {start}-{end}/{self.info.size}"
+        self.headers["content-length"] = str(end - start + 1)
+
+        await send({"type": "http.response.start", "status": status, "headers": self.raw_headers})
+        if scope["method"].upper() != "HEAD" and self.info.size:
+            async for chunk in self.storage.get_stream(self.key, start, end):
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+async def storage_response(storage, key: str, **kwargs):
+    """
+    Response serving ``key`` from ``storage`` (sendfile-capable when the file
+    is on this node), or None when there is no such object.
+    """
+    info = await storage.stat(key)
+    if info is None:
+        return None
+    path = storage.local_path(key)
+    if path is not None:
+        return CachedFileResponse(path, **kwargs)
+    return StoredObjectResponse(storage, key, info, **kwargs)
+
+def max_age_until(expires: int) -> int:
+    """Seconds a signed link has left, for Cache-Control max-age."""
+    return max(0, expires - int(time.time()))
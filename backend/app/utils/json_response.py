@@ -0,0 +1,41 @@
+"""
+Single-pass JSON responses for payloads that are already plain, JSON-ready
+dicts (the community serializers). Returning one of these from a route skips
+FastAPI's response_model validation and jsonable_encoder pass; the route's
+response_model is still used for the OpenAPI schema.
+
+orjson (in requirements.txt) is used when installed; otherwise the standard
+library encoder, with a warning at startup.
+"""
+import json
+import logging
+from datetime import date, datetime
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+def check_encoder():
+    if orjson is None:
+        logger.warning("orjson is not installed: community responses use the slower standard library encoder")
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,49 @@
+"""
+HMAC-signed, expiring URLs for files under /uploads.
+
+A URL is issued to one user, at the moment the API has decided that user may
+read the file (listing their documents, or a doctor's confirmed
+appointments), and carries ``exp``, ``uid`` and ``sig``:
+
+    /uploads/documents/ab/ab12....pdf?exp=1760000000&uid=7&sig=...
+
+The signature covers the exact path (its scope), the user and the expiry.
+The file endpoint checks it in constant time and compares ``uid`` with the
+claim in the caller's access token, so serving the file needs no database
+access and a leaked URL is useless without the matching session.
+"""
+import base64
+import hashlib
+import hmac
+import time
+from urllib.parse import urlencode
+
+from config.security import SECRET_KEY
+from config.settings import SIGNED_URL_TTL_SECONDS
+
+# Derived so the signing key is never usable as a JWT secret and vice versa
+_KEY = hmac.new(SECRET_KEY.encode(), b"signed-upload-urls", hashlib.sha256).digest()
+
+def _signature(path: str, user_id: int, expires: int) -> str:
+    message = f"{path}\n{user_id}\n{expires}".encode()
+    digest = hmac.new(_KEY, message, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+def sign(path: str, user_id: int, now: float = None) -> str:
+    """Signed URL for ``path`` (e.g. "/uploads/documents/..."), bound to ``user_id``."""
+    now = time.time() if now is None else now
+    expires = (int(now) // SIGNED_URL_TTL_SECONDS + 2) * SIGNED_URL_TTL_SECONDS
+    query = urlencode({"exp": expires, "uid": user_id, "sig": _signature(path, user_id, expires)})
+    return f"{path}?{query}"
+
+def verify(path: str, user_id: int, expires: int, signature: str, now: float = None) -> bool:
+    now = time.time() if now is None else now
+    if expires < now:
+        return False
+    return hmac.compare_digest(_signature(path, user_id, expires), signature)
+
+def sign_documents(documents, user_id: int):
+    """Attach a signed ``url`` to Document rows the user was just authorized to read."""
+    for document in documents:
+        document.url = sign(document.file_path, user_id)
+    return documents
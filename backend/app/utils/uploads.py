@@ -0,0 +1,233 @@
+"""
+Single-pass upload pipeline shared by the upload routes.
+
+The request body is pumped in chunks from the spooled ``UploadFile`` into a
+temporary file in the storage backend's staging directory, on the threadpool
+so the event loop never waits on disk. The same pass enforces the size limit,
+sniffs the real content type from the leading bytes and computes the SHA-256.
+ZIP and OLE2 magic bytes are shared by many formats, so a file sniffed as
+DOCX or DOC is opened once written to check it really is a Word document.
+The caller then hands the temp file to the storage backend (an atomic
+``os.replace`` on local storage), so readers never see a half-written file.
+"""
+import hashlib
+import os
+import struct
+import tempfile
+import zipfile
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+CHUNK_SIZE = 1024 * 1024  # 1MB
+SNIFF_SIZE = 16
+
+MAX_DOCUMENT_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_PICTURE_SIZE = 5 * 1024 * 1024  # 5MB
+
+# Sniffed content type -> stored extension
+DOCUMENT_TYPES = {
+    'application/pdf': '.pdf',
+    'application/msword': '.doc',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': '.docx',
+    'image/jpeg': '.jpg',
+    'image/png': '.png'
+}
+PICTURE_TYPES = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif'
+}
+
+DOCX_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+DOCX_MAIN_PART = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml'
+MAX_CONTENT_TYPES_SIZE = 1024 * 1024
+
+SIGNATURES = (
+    (b"%PDF-", 'application/pdf'),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", 'application/msword'),
+    (b"PK\x03\x04", DOCX_TYPE),
+    (b"\xff\xd8\xff", 'image/jpeg'),
+    (b"\x89PNG\r\n\x1a\n", 'image/png'),
+    (b"GIF87a", 'image/gif'),
+    (b"GIF89a", 'image/gif'),
+)
+
+def sniff(head: bytes):
+    """Content type from a file's magic bytes, or None when unrecognised."""
+    for signature, content_type in SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return None
+
+class StagedUpload:
+    """An upload written to a temp file, waiting to be saved to storage."""
+
+    def __init__(self, temp_path: Path, size: int, sha256: str, content_type: str, extension: str):
+        self.temp_path = temp_path
+        self.size = size
+        self.sha256 = sha256
+        self.content_type = content_type
+        self.extension = extension
+        self.committed = False
+
+    async def save(self, storage, key: str):
+        """Store the upload under ``key`` in ``storage``, which takes over the temp file."""
+        await storage.put(key, self.temp_path)
+        self.committed = True
+
+    def discard(self):
+        if not self.committed:
+            try:
+                os.unlink(self.temp_path)
+            except FileNotFoundError:
+                pass
+
+def _invalid_type(label: str, allowed_types: dict) -> HTTPException:
+    return HTTPException(
+        status_code=400,
+        detail=f"Invalid file type: {label}. "
+               f"Allowed types: {', '.join(ext.lstrip('.').upper() for ext in sorted(set(allowed_types.values())))}"
+    )
+
+def check_type(head: bytes, allowed_types: dict) -> str:
+    """Sniff the content type from a file's first bytes, rejecting types not in ``allowed_types``."""
+    content_type = sniff(head[:SNIFF_SIZE])
+    if content_type not in allowed_types:
+        raise _invalid_type(content_type or 'unrecognised content', allowed_types)
+    return content_type
+
+def _is_docx(path: Path) -> bool:
+    """Whether a ZIP file is an OOXML package whose main part is a Word document."""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            info = archive.getinfo("[Content_Types].xml")
+            if info.file_size > MAX_CONTENT_TYPES_SIZE:
+                return False
+            content_types = archive.read(info)
+    except (KeyError, zipfile.BadZipFile, OSError, RuntimeError, NotImplementedError):
+        return False
+    return DOCX_MAIN_PART.encode() in content_types
+
+def _is_word_binary(path: Path) -> bool:
+    """Whether an OLE2 compound file has the WordDocument stream of a .doc."""
+    free, end_of_chain = 0xFFFFFFFF, 0xFFFFFFFE
+    try:
+        with open(path, "rb") as file:
+            header = file.read(512)
+            size = os.fstat(file.fileno()).st_size
+            sector_shift, = struct.unpack_from("<H", header, 0x1E)
+            if not 7 <= sector_shift <= 16:
+                return False
+            sector_size = 1 << sector_shift
+            max_sectors = size // sector_size + 1
+
+            def read_sector(sector: int) -> bytes:
+                file.seek((sector + 1) * sector_size)
+                data = file.read(sector_size)
+                if len(data) != sector_size:
+                    raise ValueError("truncated compound file")
+                return data
+
+            # The FAT's sectors are listed in the header, then in a chain of DIFAT sectors
+            first_directory, = struct.unpack_from("<I", header, 0x30)
+            difat_sector, difat_count = struct.unpack_from("<II", header, 0x44)
+            fat_sectors = [s for s in struct.unpack_from("<109I", header, 0x4C) if s != free]
+            entries_per_sector = sector_size // 4
+            while difat_sector not in (free, end_of_chain) and difat_count > 0:
+                entries = struct.unpack(f"<{entries_per_sector}I", read_sector(difat_sector))
+                fat_sectors.extend(s for s in entries[:-1] if s != free)
+                difat_sector, difat_count = entries[-1], difat_count - 1
+            fat = []
+            for sector in fat_sectors[:max_sectors]:
+                fat.extend(struct.unpack(f"<{entries_per_sector}I", read_sector(sector)))
+
+            sector = first_directory
+            for _ in range(max_sectors):
+                if sector == end_of_chain or sector >= len(fat):
+                    return False
+                data = read_sector(sector)
+                for offset in range(0, sector_size, 128):
+                    name_length, entry_type = struct.unpack_from("<HB", data, offset + 64)
+                    name = data[offset:offset + max(0, min(name_length, 64) - 2)].decode("utf-16-le", "replace")
+                    if entry_type == 2 and name == "WordDocument":
+                        return True
+                sector = fat[sector]
+    except (OSError, ValueError, struct.error):
+        return False
+    return False
+
+# Content types whose magic bytes only identify a container format
+CONTAINER_CHECKS = {
+    'application/msword': _is_word_binary,
+    DOCX_TYPE: _is_docx
+}
+
+def check_container(path: Path, content_type: str, allowed_types: dict):
+    """Reject a ZIP or OLE2 file that is not the Word document its magic bytes suggested."""
+    check = CONTAINER_CHECKS.get(content_type)
+    if check is not None and not check(path):
+        raise _invalid_type("not a Word document", allowed_types)
+
+def _pump(source, target, digest) -> bytes:
+    chunk = source.read(CHUNK_SIZE)
+    if chunk:
+        digest.update(chunk)
+        target.write(chunk)
+    return chunk
+
+def size_label(limit: int) -> str:
+    return f"{limit // (1024 * 1024)}MB"
+
+async def _stage(file: UploadFile, directory: Path, allowed_types: dict, max_size: int) -> StagedUpload:
+    handle = await run_in_threadpool(
+        tempfile.NamedTemporaryFile, dir=directory, prefix=".upload-", suffix=".part", delete=False
+    )
+    temp_path = Path(handle.name)
+    try:
+        digest = hashlib.sha256()
+        size = 0
+        content_type = None
+        await file.seek(0)
+        while chunk := await run_in_threadpool(_pump, file.file, handle, digest):
+            if size == 0:
+                content_type = check_type(chunk, allowed_types)
+            size += len(chunk)
+            if size > max_size:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"File size exceeds maximum allowed size of {size_label(max_size)}"
+                )
+        if size == 0:
+            raise HTTPException(status_code=400, detail="File is empty")
+        await run_in_threadpool(handle.close)
+        await run_in_threadpool(check_container, temp_path, content_type, allowed_types)
+        return StagedUpload(temp_path, size, digest.hexdigest(), content_type, allowed_types[content_type])
+    except BaseException:
+        await run_in_threadpool(_remove, handle, temp_path)
+        raise
+
+def _remove(handle, path: Path):
+    handle.close()
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+@asynccontextmanager
+async def receive(file: UploadFile, directory: Path, allowed_types: dict, max_size: int):
+    """
+    Stage ``file`` in ``directory`` and yield the StagedUpload; whatever the
+    caller has not saved by the end of the block is deleted.
+
+        async with uploads.receive(file, storage.staging_dir("documents"), uploads.DOCUMENT_TYPES,
+                                   uploads.MAX_DOCUMENT_SIZE) as upload:
+            await upload.save(storage, f"documents/{name}")
+    """
+    upload = await _stage(file, directory, allowed_types, max_size)
+    try:
+        yield upload
+    finally:
+        await run_in_threadpool(upload.discard)
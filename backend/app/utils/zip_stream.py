@@ -0,0 +1,97 @@
+"""
+ZIP archives streamed as they are built.
+
+zipfile writes to a sink that cannot seek, so every member gets a data
+descriptor after its data instead of sizes patched into its header, and the
+archive is never held anywhere: each chunk read from storage is written to
+the current member and whatever zipfile produced is yielded straight away.
+Memory stays at about one storage chunk whatever the archive size, and the
+first bytes leave before the first file has been read to the end.
+"""
+import io
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Optional
+
+import anyio
+
+# Already compressed formats are stored as is; deflating them costs CPU for nothing
+COMPRESSED_TYPES = {
+    'application/pdf',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'image/jpeg',
+    'image/png',
+    'image/gif'
+}
+
+@dataclass
+class ZipEntry:
+    name: str
+    key: str  # storage key
+    content_type: str
+    modified: Optional[datetime] = None
+
+class _Sink(io.RawIOBase):
+    """Write-only, unseekable buffer that zipfile writes the archive into."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def unique_names(names: Iterable[str]):
+    """Archive member names, without directories, with duplicates numbered like "scan (2).pdf"."""
+    seen = set()
+    for name in names:
+        name = name.replace("\\", "/").rsplit("/", 1)[-1] or "document"
+        candidate, counter = name, 1
+        stem, dot, extension = name.rpartition(".")
+        if not stem:
+            stem, dot, extension = name, "", ""
+        while candidate.lower() in seen:
+            counter += 1
+            candidate = f"{stem} ({counter}){dot}{extension}"
+        seen.add(candidate.lower())
+        yield candidate
+
+async def stream_zip(storage, entries: Iterable[ZipEntry]):
+    """Yield a ZIP archive of ``entries`` read from ``storage``, chunk by chunk."""
+    sink = _Sink()
+    archive = zipfile.ZipFile(sink, mode="w")
+    for entry in entries:
+        stored = await storage.stat(entry.key)
+        if stored is None:
+            # A missing file would leave a truncated member; leave it out instead
+            continue
+        info = zipfile.ZipInfo(entry.name, date_time=(entry.modified or datetime.now()).timetuple()[:6])
+        compress = entry.content_type not in COMPRESSED_TYPES
+        info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        # Lets zipfile decide up front whether the member needs ZIP64 fields
+        info.file_size = stored.size
+        with archive.open(info, mode="w") as member:
+            async for chunk in storage.get_stream(entry.key):
+                if compress:
+                    await anyio.to_thread.run_sync(member.write, chunk)
+                else:
+                    member.write(chunk)
+                if data := sink.drain():
+                    yield data
+        yield sink.drain()
+    archive.close()
+    yield sink.drain()
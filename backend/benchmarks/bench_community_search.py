@@ -0,0 +1,101 @@
+"""
+Benchmark: community full-text search.
+
+Against a disposable PostgreSQL database the comments table is topped up to
+POSTS rows with one INSERT ... SELECT over generate_series, then the GIN-backed
+search is timed (target: under 50 ms per query at a million posts):
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_community_search
+
+With any other DATABASE_URL only the in-memory fallback index is timed, over
+FALLBACK_POSTS synthetic posts, along with applying one edited post to it as a
+change log sync would. The fallback is for development setups; the target
+above is for PostgreSQL only.
+"""
+import random
+import sys
+import time
+import uuid
+
+from sqlalchemy import func, select, text
+
+from config.database import Base, SessionLocal, engine
+from app.models import Comment, UserAccount
+from app.services import search_service
+from app.utils.db import is_postgresql
+
+POSTS = 1_000_000
+FALLBACK_POSTS = 200_000
+WORDS_PER_POST = 12
+REPEAT = 20
+
+TOPICS = ["sleep", "stress", "diet", "asthma", "migraine", "insulin", "allergy", "fever",
+          "sommeil", "douleur", "vaccin", "grossesse", "tension", "cholesterol"]
+# Filler vocabulary so the topic words are reasonably selective
+VOCABULARY = TOPICS + [f"word{i}" for i in range(5000)]
+QUERIES = ["sleep", "stress diet", "migraine fever", "grossesse vaccin", "word42", "nomatch"]
+
+def seed_postgresql(db):
+    present = db.execute(select(func.count()).select_from(Comment)).scalar()
+    missing = POSTS - present
+    if missing <= 0:
+        return
+    run = uuid.uuid4().hex[:8]
+    user = UserAccount(cin=f"bench-{run}", first_name="Bench", last_name="Search",
+                       email=f"bench-{run}@example.com", password="x")
+    db.add(user)
+    db.commit()
+    print(f"seeding {missing} posts...")
+    db.execute(text("""
+        INSERT INTO comments (content, user_id, likes, reply_count, created_at)
+        SELECT (
+            SELECT string_agg(words[1 + floor(random() * array_length(words, 1))::int], ' ')
+            FROM generate_series(1, :per_post) AS w
+            WHERE g IS NOT NULL
+        ), :user_id, 0, 0, now() - g * interval '1 second'
+        FROM generate_series(1, :missing) AS g, (SELECT CAST(:vocabulary AS text[]) AS words) AS v
+    """), {"per_post": WORDS_PER_POST, "user_id": user.id, "missing": missing, "vocabulary": VOCABULARY})
+    db.commit()
+    db.execute(text("ANALYZE comments"))
+
+def time_queries(run):
+    for query in QUERIES:
+        run(query)  # warm up
+        timings = []
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            results = run(query)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(f"{query!r:20} {len(results):3} results  median {timings[len(timings) // 2] * 1000:7.2f} ms  "
+              f"worst {timings[-1] * 1000:7.2f} ms")
+
+def bench_postgresql(db):
+    seed_postgresql(db)
+    time_queries(lambda query: search_service.search(db, query)[0])
+
+def bench_fallback():
+    index = search_service.InvertedIndex()
+    start = time.perf_counter()
+    for i in range(FALLBACK_POSTS):
+        index.add("comment", i, " ".join(random.choices(VOCABULARY, k=WORDS_PER_POST)), i)
+    print(f"indexed {FALLBACK_POSTS} posts in {time.perf_counter() - start:.1f} s")
+    start = time.perf_counter()
+    index.add("comment", 0, " ".join(random.choices(VOCABULARY, k=WORDS_PER_POST)), 0)
+    print(f"re-indexed one edited post in {(time.perf_counter() - start) * 1000:.3f} ms")
+    time_queries(lambda query: index._rank(set(search_service.tokenize(query)), 21, 0))
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if is_postgresql(db):
+            bench_postgresql(db)
+        else:
+            print("not PostgreSQL, timing the in-memory fallback only", file=sys.stderr)
+            bench_fallback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
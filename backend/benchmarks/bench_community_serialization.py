@@ -0,0 +1,63 @@
+"""
+Benchmark: serializing a 10,000 comment feed.
+
+Compares the previous path (to_dict, then FastAPI's response_model
+validation against List[CommentResponse], jsonable dump and json.dumps) with
+the single-pass path (to_dict straight into app.utils.json_response.dumps).
+Run from the backend directory:
+    python -m benchmarks.bench_community_serialization
+"""
+import json
+import timeit
+from datetime import datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.models import Comment, Reply, UserAccount
+from app.schemas.comment import CommentResponse
+from app.utils import json_response
+
+COUNT = 10_000
+REPLIES_PER_COMMENT = 3
+REPEAT = 5
+
+def build_feed(count: int) -> list[dict]:
+    users = [
+        UserAccount(id=i, first_name=f"First{i}", last_name=f"Last{i}", role="doctor" if i % 10 == 0 else "user",
+                    profile_picture=f"/uploads/profile_pictures/{i}.jpg")
+        for i in range(50)
+    ]
+    now = datetime.utcnow()
+    feed = []
+    for i in range(count):
+        comment = Comment(id=i, content="How do you manage stress before exams? " * 3, user_id=i % 50,
+                          likes=i % 37, reply_count=REPLIES_PER_COMMENT, created_at=now - timedelta(minutes=i))
+        comment.user = users[i % 50]
+        replies = []
+        for j in range(REPLIES_PER_COMMENT):
+            reply = Reply(id=i * 10 + j, content="Breathing exercises help.", comment_id=i,
+                          user_id=j, created_at=now - timedelta(minutes=i, seconds=j))
+            reply.user = users[j]
+            replies.append(reply)
+        feed.append(comment.to_dict(is_liked=i % 2 == 0, replies=replies))
+    return feed
+
+def main():
+    feed = build_feed(COUNT)
+    adapter = TypeAdapter(List[CommentResponse])
+
+    def validated():
+        # What FastAPI does for a response_model: validate, dump to JSON-able, encode
+        return json.dumps(adapter.dump_python(adapter.validate_python(feed), mode="json")).encode()
+
+    def single_pass():
+        return json_response.dumps(feed)
+
+    encoder = "orjson" if json_response.orjson is not None else "json"
+    for name, run in (("response_model", validated), (f"single pass ({encoder})", single_pass)):
+        best = min(timeit.repeat(run, number=1, repeat=REPEAT))
+        print(f"{name:24} {COUNT} comments {best * 1000:8.1f} ms ({best / COUNT * 1e6:.2f} us/comment)")
+
+if __name__ == "__main__":
+    main()
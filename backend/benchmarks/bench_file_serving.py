@@ -0,0 +1,103 @@
+"""
+Benchmark: many concurrent clients fetching a large PDF through a signed
+/uploads link, as full downloads, 1MB range requests and ETag
+revalidations (304s). Starts the app under uvicorn on a local port; signed
+links need no database, so a throwaway SQLite file is used unless
+DATABASE_URL is set.
+
+Run from the backend directory:
+    python -m benchmarks.bench_file_serving
+"""
+import hashlib
+import http.client
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.getcwd()
+WORK_DIR = tempfile.mkdtemp(prefix="bench-files-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{WORK_DIR}/bench.db")
+os.chdir(WORK_DIR)
+
+import uvicorn
+
+from config import settings
+from config.security import create_access_token
+from app.utils import signed_urls
+from main import app
+
+PORT = 8765
+FILE_SIZE = 20 * 1024 * 1024
+CLIENTS = 32
+REQUESTS_PER_CLIENT = 8
+RANGE_SIZE = 1024 * 1024
+
+def make_pdf() -> str:
+    body = b"%PDF-1.7\n" + os.urandom(FILE_SIZE)
+    sha256 = hashlib.sha256(body).hexdigest()
+    path = f"documents/{sha256[:2]}/{sha256}.pdf"
+    target = settings.UPLOAD_DIR / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with open(target, "wb") as file:
+        file.write(body)
+    return f"/uploads/{path}"
+
+def fetch(url: str, headers: dict) -> tuple[int, int]:
+    connection = http.client.HTTPConnection("127.0.0.1", PORT, timeout=60)
+    try:
+        connection.request("GET", url, headers=headers)
+        response = connection.getresponse()
+        return response.status, len(response.read())
+    finally:
+        connection.close()
+
+def run(label: str, url: str, headers: dict, expected_status: int):
+    def client(_):
+        received = 0
+        for _ in range(REQUESTS_PER_CLIENT):
+            status, size = fetch(url, headers)
+            assert status == expected_status, f"{label}: expected {expected_status}, got {status}"
+            received += size
+        return received
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CLIENTS) as pool:
+        received = sum(pool.map(client, range(CLIENTS)))
+    elapsed = time.perf_counter() - started
+    requests = CLIENTS * REQUESTS_PER_CLIENT
+    print(f"{label:<12} {requests} requests in {elapsed * 1000:7.0f} ms: "
+          f"{requests / elapsed:8.1f} req/s, {received / elapsed / 1e6:8.1f} MB/s")
+
+def main():
+    path = make_pdf()
+    url = signed_urls.sign(path, 1)
+    token = create_access_token({"sub": "bench@example.com", "uid": 1})
+    auth = {"Authorization": f"Bearer {token}"}
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=PORT, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    try:
+        connection = http.client.HTTPConnection("127.0.0.1", PORT)
+        connection.request("GET", url, headers={**auth, "Range": "bytes=0-0"})
+        probe = connection.getresponse()
+        probe.read()
+        etag = probe.getheader("etag")
+        connection.close()
+
+        print(f"{FILE_SIZE // (1024 * 1024)}MB PDF, {CLIENTS} concurrent clients")
+        run("full", url, auth, 200)
+        run("range 1MB", url, {**auth, "Range": f"bytes=0-{RANGE_SIZE - 1}"}, 206)
+        run("revalidate", url, {**auth, "If-None-Match": etag}, 304)
+    finally:
+        server.should_exit = True
+        thread.join()
+        os.chdir(BACKEND_DIR)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Concurrency check for the like toggle: hundreds of users like the same
+comment at once, then every third of them unlikes it while the others click
+again, and after each round the counter must equal the number of
+comment_likes rows. Exits non-zero when it does not. Run against a
+disposable PostgreSQL database:
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_like_concurrency
+"""
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func, select
+
+from config.database import Base, SessionLocal, engine
+from app.models import Comment, UserAccount
+from app.models.comment import comment_likes
+from app.services import community_service
+from app.services.like_buffer import like_buffer
+
+USERS = 300
+WORKERS = 50
+
+def setup():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    run = uuid.uuid4().hex[:8]
+    users = [
+        UserAccount(cin=f"bench-{run}-{i}", first_name="Bench", last_name=str(i),
+                    email=f"bench-{run}-{i}@example.com", password="x")
+        for i in range(USERS)
+    ]
+    db.add_all(users)
+    db.flush()
+    comment = Comment(content="viral", user_id=users[0].id)
+    db.add(comment)
+    db.commit()
+    ids = [user.id for user in users]
+    comment_id = comment.id
+    db.close()
+    return comment_id, ids
+
+def like(comment_id: int, user_id: int):
+    db = SessionLocal()
+    try:
+        community_service.toggle_like(db, comment_id, user_id)
+        db.commit()
+    finally:
+        db.close()
+
+def toggle_all(comment_id: int, user_ids) -> float:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        list(pool.map(lambda user_id: like(comment_id, user_id), user_ids))
+    return time.perf_counter() - started
+
+def check(comment_id: int, expected: int, label: str, elapsed: float) -> bool:
+    if like_buffer.enabled:
+        # Buffered deltas have not reached Comment.likes yet
+        like_buffer.flush()
+    db = SessionLocal()
+    likes = db.execute(select(Comment.likes).where(Comment.id == comment_id)).scalar_one()
+    rows = db.execute(
+        select(func.count()).select_from(comment_likes).where(comment_likes.c.comment_id == comment_id)
+    ).scalar_one()
+    db.close()
+
+    print(f"{label} in {elapsed * 1000:.0f} ms: likes={likes}, rows={rows}, expected={expected}")
+    return likes == rows == expected
+
+def main():
+    comment_id, user_ids = setup()
+    ok = check(comment_id, USERS, f"{USERS} concurrent likes", toggle_all(comment_id, user_ids))
+
+    # Unlikes race with users who toggle twice (unlike, then like again)
+    unlikers = set(user_ids[::3])
+    relikers = [user_id for user_id in user_ids if user_id not in unlikers]
+    second_round = list(unlikers) + relikers * 2
+    elapsed = toggle_all(comment_id, second_round)
+    ok = check(comment_id, USERS - len(unlikers), "mixed unlikes and re-likes", elapsed) and ok
+
+    if not ok:
+        print("like counter drifted from comment_likes under concurrency", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Benchmark: render 1,000 stored notifications through the cached templates.
+
+Run from the backend directory:
+    python -m benchmarks.bench_notification_render
+"""
+import random
+import timeit
+from datetime import datetime
+
+from app.models.notification import Notification
+from app.schemas.notification import NotificationType
+from app.services import notification_templates
+
+COUNT = 1000
+REPEAT = 20
+
+def build_notifications(count: int):
+    actor = {"id": 7, "name": "Jane Doe", "role": "doctor"}
+    samples = [
+        (NotificationType.LIKE, {"comment_id": 1, "post_title": "Best way to manage stress?", "recent_actors": [actor]}),
+        (NotificationType.NESTED_REPLY, {"comment_id": 2, "post_title": "Sleep schedule tips", "recent_actors": [actor]}),
+        (NotificationType.APPOINTMENT_CONFIRMED, {"appointment_id": 3, "appointment_date": "2025-06-01T14:30:00", "doctor_name": "John Smith"}),
+        (NotificationType.COMMENT_DELETION, {"admin": actor, "post_title": "spam", "reason": "Violated community guidelines"}),
+    ]
+    notifications = []
+    for i in range(count):
+        notif_type, metadata = random.choice(samples)
+        notifications.append(Notification(
+            id=i,
+            type=notif_type,
+            message=None,
+            notification_metadata=metadata,
+            actor_count=random.choice([1, 1, 2, 42]),
+            is_read=0,
+            created_at=datetime.utcnow()
+        ))
+    return notifications
+
+def main():
+    notifications = build_notifications(COUNT)
+    for language in ("en", "fr"):
+        notification_templates.get_template.cache_clear()
+        cold = timeit.timeit(lambda: notification_templates.render_notifications(notifications, language), number=1)
+        warm = min(timeit.repeat(
+            lambda: notification_templates.render_notifications(notifications, language),
+            number=1,
+            repeat=REPEAT
+        ))
+        print(f"{language}: {COUNT} notifications cold {cold * 1000:.2f} ms, warm {warm * 1000:.2f} ms "
+              f"({warm / COUNT * 1e6:.2f} us/notification)")
+
+if __name__ == "__main__":
+    main()
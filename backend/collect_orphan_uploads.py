@@ -0,0 +1,29 @@
+import argparse
+from datetime import timedelta
+
+import anyio
+
+from config import settings
+from config.database import SessionLocal
+from app.services.upload_gc import collect
+
+def collect_orphan_uploads(dry_run: bool = False, quarantine: bool = False, grace_hours: float = None):
+    db = SessionLocal()
+    try:
+        grace = timedelta(hours=settings.UPLOAD_GC_GRACE_HOURS if grace_hours is None else grace_hours)
+        return anyio.run(lambda: collect(db, grace, dry_run=dry_run, quarantine=quarantine))
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete uploaded files no longer referenced by the database")
+    parser.add_argument("--dry-run", action="store_true", help="only report orphaned files")
+    parser.add_argument("--quarantine", action="store_true", help="move orphans under quarantine/ instead of deleting")
+    parser.add_argument("--grace-hours", type=float, default=None,
+                        help=f"skip files modified more recently (default {settings.UPLOAD_GC_GRACE_HOURS:g})")
+    args = parser.parse_args()
+
+    report = collect_orphan_uploads(args.dry_run, args.quarantine, args.grace_hours)
+    action = "Found" if report.dry_run else ("Quarantined" if report.quarantined else "Deleted")
+    print(f"Scanned {report.scanned} files ({report.recent} within the grace period). "
+          f"{action} {report.orphans} orphaned files, {report.orphan_bytes / (1024 * 1024):.1f}MB")
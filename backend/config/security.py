@@ -33,19 +33,27 @@ def get_db():
     finally:
         db.close()
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+def get_token_claims(token: str = Depends(oauth2_scheme)) -> dict:
+    """Verified access token claims, without loading the user."""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
+        raise _credentials_exception()
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    return user_from_claims(db, get_token_claims(token))
+
+def user_from_claims(db: Session, payload: dict):
+    credentials_exception = _credentials_exception()
+    email: str = payload.get("sub")
+    if email is None:
         raise credentials_exception
 
     user = db.query(UserAccount).filter(UserAccount.email == email).first()
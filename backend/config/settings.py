@@ -0,0 +1,74 @@
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def _flag(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+# Write-behind like counters: likes are recorded immediately, but the
+# Comment.likes deltas are buffered per worker and flushed in batches.
+LIKE_WRITE_BEHIND = _flag("LIKE_WRITE_BEHIND")
+LIKE_FLUSH_INTERVAL_MS = int(os.getenv("LIKE_FLUSH_INTERVAL_MS", "300"))
+
+# Shared community feed page cache (per worker). Structural changes are
+# propagated between workers through cache_generations, checked at most once
+# per CACHE_GENERATION_CHECK_MS; like counts on cached pages from other
+# workers may lag by up to FEED_CACHE_TTL_SECONDS.
+FEED_CACHE_ENABLED = _flag("FEED_CACHE_ENABLED", "true")
+FEED_CACHE_MAX_PAGES = int(os.getenv("FEED_CACHE_MAX_PAGES", "256"))
+FEED_CACHE_TTL_SECONDS = float(os.getenv("FEED_CACHE_TTL_SECONDS", "10"))
+CACHE_GENERATION_CHECK_MS = int(os.getenv("CACHE_GENERATION_CHECK_MS", "1000"))
+
+# Per-worker cache of doctor -> patient document access decisions, dropped
+# whenever an appointment is confirmed, rejected or deleted (see
+# app/services/patient_access.py).
+ACCESS_CACHE_MAX_ENTRIES = int(os.getenv("ACCESS_CACHE_MAX_ENTRIES", "10000"))
+ACCESS_CACHE_TTL_SECONDS = float(os.getenv("ACCESS_CACHE_TTL_SECONDS", "300"))
+
+# Hot feed ordering: scores halve every HOT_HALF_LIFE_HOURS and are decayed
+# in bulk every HOT_DECAY_INTERVAL_SECONDS (0 disables the background job).
+HOT_HALF_LIFE_HOURS = float(os.getenv("HOT_HALF_LIFE_HOURS", "12"))
+HOT_DECAY_INTERVAL_SECONDS = int(os.getenv("HOT_DECAY_INTERVAL_SECONDS", "300"))
+
+# Community change log rows older than this are pruned by
+# prune_community_changes.py; clients with an older watermark resync.
+CHANGE_RETENTION_HOURS = int(os.getenv("CHANGE_RETENTION_HOURS", "72"))
+
+# Signed /uploads URLs stay valid for between one and two of these windows;
+# expiries are rounded up to a window so URLs are stable between listings.
+SIGNED_URL_TTL_SECONDS = int(os.getenv("SIGNED_URL_TTL_SECONDS", "3600"))
+
+# Where uploads are stored: "local" keeps them under UPLOAD_DIR on this node,
+# "s3" in an S3-compatible bucket shared by all nodes (requires boto3; set
+# S3_ENDPOINT_URL for MinIO). Uploads above the threshold use multipart.
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").strip().lower()
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "uploads"))
+S3_BUCKET = os.getenv("S3_BUCKET", "uploads")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+S3_REGION = os.getenv("S3_REGION") or None
+S3_ACCESS_KEY_ID = os.getenv("S3_ACCESS_KEY_ID") or None
+S3_SECRET_ACCESS_KEY = os.getenv("S3_SECRET_ACCESS_KEY") or None
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "32"))
+S3_MULTIPART_THRESHOLD_MB = int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "16"))
+S3_MULTIPART_CHUNK_MB = int(os.getenv("S3_MULTIPART_CHUNK_MB", "8"))
+# With S3, where uploads are written before they go to the bucket, including
+# resumable uploads in progress. Every worker process on a node must use the
+# same directory (default: uploads-staging in the system temp directory).
+STAGING_DIR = Path(os.environ["STAGING_DIR"]) if os.getenv("STAGING_DIR") else None
+
+# Worker threads generating profile picture thumbnails (needs Pillow; 0
+# disables thumbnailing and clients keep using the original picture).
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+
+# Resumable document uploads (/upload-sessions): largest document accepted,
+# largest single chunk, and how long an unfinished session is kept.
+MAX_RESUMABLE_UPLOAD_MB = int(os.getenv("MAX_RESUMABLE_UPLOAD_MB", "100"))
+UPLOAD_CHUNK_MAX_MB = int(os.getenv("UPLOAD_CHUNK_MAX_MB", "8"))
+UPLOAD_SESSION_TTL_HOURS = int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))
+
+# collect_orphan_uploads.py leaves files younger than this alone, so uploads
+# whose database row is not committed yet are never collected.
+UPLOAD_GC_GRACE_HOURS = float(os.getenv("UPLOAD_GC_GRACE_HOURS", "24"))
@@ -1,7 +1,8 @@
+import posixpath
+
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
 from config.database import engine, Base, get_db
 from app.routes.user_routes import router as user_router
 from app.routes.appointment_routes import router as appointment_router
@@ -10,32 +11,23 @@ from app.routes.profile_routes import router as profile_router
 from app.routes.settings_routes import router as settings_router
 from app.routes.doctor_routes import router as doctor_router
 from app.routes import admin_routes
+from app.routes.moderation_routes import router as moderation_router
 from app.routes.notification_routes import router as notification_router
-from app.models import Document, UserAccount, Appointment  # Import Appointment model
-from config.security import get_current_user
+from app.routes.upload_session_routes import router as upload_session_router
+from app.models import Document, UserAccount
+from app.services.like_buffer import like_buffer
+from app.services.hot_ranking import hot_decayer
+from app.services.thumbnails import thumbnailer
+from config.security import get_current_user, get_token_claims, user_from_claims
+from app.utils import json_response, signed_urls
+from app.utils.file_response import max_age_until, storage_response
+from app.services import patient_access
+from app.services.storage import storage
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
-from pathlib import Path
-import os
-
-# Create base uploads directory
-UPLOAD_DIR = Path("uploads")
-PROFILE_PICTURES_DIR = UPLOAD_DIR / "profile_pictures"
-DOCUMENTS_DIR = UPLOAD_DIR / "documents"
-
-# Ensure directories exist with proper permissions
-UPLOAD_DIR.mkdir(exist_ok=True, mode=0o755)
-PROFILE_PICTURES_DIR.mkdir(exist_ok=True, mode=0o755)
-DOCUMENTS_DIR.mkdir(exist_ok=True, mode=0o755)
-
-# Ensure directories are writable
-if not os.access(UPLOAD_DIR, os.W_OK):
-    raise RuntimeError(f"Upload directory {UPLOAD_DIR} is not writable")
-if not os.access(PROFILE_PICTURES_DIR, os.W_OK):
-    raise RuntimeError(f"Profile pictures directory {PROFILE_PICTURES_DIR} is not writable")
-if not os.access(DOCUMENTS_DIR, os.W_OK):
-    raise RuntimeError(f"Documents directory {DOCUMENTS_DIR} is not writable")
+# Ensure upload directories exist (local storage) with proper permissions
+storage.ensure("profile_pictures", "documents")
 
 # Create all tables
 Base.metadata.create_all(bind=engine)
@@ -49,27 +41,61 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Content-Type", "Content-Length"]
+    expose_headers=["Content-Type", "Content-Length", "X-Next-Cursor"]
 )
 
-# Mount the uploads directory
-app.mount("/static", StaticFiles(directory="uploads"), name="static")
+# Mount the uploads directory; remote storage serves profile pictures through a route instead
+if storage.local_root is not None:
+    app.mount("/static", StaticFiles(directory=storage.local_root), name="static")
+else:
+    @app.get("/static/profile_pictures/{file_name:path}")
+    async def get_profile_picture(file_name: str):
+        # Thumbnails live under profile_pictures/thumbs/; nothing may resolve outside the prefix
+        key = f"profile_pictures/{file_name}"
+        if posixpath.normpath(key) != key or "\\" in key:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+        response = await storage_response(storage, key, private=False)
+        if response is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+        return response
 
 # Create a route to serve files with authentication
 @app.get("/uploads/{file_path:path}")
 async def get_file(
     file_path: str,
-    current_user: UserAccount = Depends(get_current_user),
+    exp: int | None = None,
+    uid: int | None = None,
+    sig: str | None = None,
+    claims: dict = Depends(get_token_claims),
     db: Session = Depends(get_db)
 ):
-    # Check if the file exists
-    file_location = UPLOAD_DIR / file_path
-    if not file_location.exists():
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="File not found"
+    # Signed URLs were authorized when they were issued: checking the
+    # signature and the caller's token claims needs no database access.
+    # Tokens issued before the uid claim go through the checks below instead.
+    if sig is not None and "uid" in claims:
+        if (
+            exp is None or uid is None or claims.get("uid") != uid
+            or not signed_urls.verify(f"/uploads/{file_path}", uid, exp, sig)
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Invalid or expired link"
+            )
+        response = await storage_response(
+            storage,
+            file_path,
+            max_age=max_age_until(exp),
+            headers={"Access-Control-Allow-Origin": "http://localhost:3000"}
         )
-    
+        if response is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File not found"
+            )
+        return response
+
+    current_user = user_from_claims(db, claims)
+
     # For profile pictures, check if it belongs to the user
     if file_path.startswith("profile_pictures/"):
         user = db.query(UserAccount).filter(
@@ -84,28 +110,25 @@ async def get_file(
     
     # For documents, check if it belongs to the user or if the user is a doctor with access
     elif file_path.startswith("documents/"):
-        document = db.query(Document).filter(
-            Document.file_path == f"/uploads/{file_path}"
-        ).first()
-        
-        if not document:
+        # Deduplicated files are shared by every document with the same content
+        owners = {
+            owner_id for (owner_id,) in db.query(Document.user_id).filter(
+                Document.file_path == f"/uploads/{file_path}"
+            )
+        }
+
+        if not owners:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Document not found"
             )
 
         # Allow access if the user owns the document
-        if document.user_id == current_user.id:
+        if current_user.id in owners:
             pass
         # Allow access if the user is a doctor with a confirmed appointment with the patient
         elif current_user.role == "doctor":
-            appointment = db.query(Appointment).filter(
-                Appointment.doctor_id == current_user.id,
-                Appointment.user_id == document.user_id,
-                Appointment.status == "confirmed"
-            ).first()
-            
-            if not appointment:
+            if not patient_access.has_access_to_any(db, current_user.id, owners):
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="Access denied. No confirmed appointment with this patient."
@@ -117,13 +140,31 @@ async def get_file(
             )
     
     # Return the file with appropriate headers
-    return FileResponse(
-        file_location,
-        headers={
-            "Cache-Control": "public, max-age=3600",
-            "Access-Control-Allow-Origin": "http://localhost:3000"
-        }
+    response = await storage_response(
+        storage,
+        file_path,
+        headers={"Access-Control-Allow-Origin": "http://localhost:3000"}
     )
+    if response is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+    return response
+
+@app.on_event("startup")
+def start_background_workers():
+    like_buffer.start()
+    hot_decayer.start()
+    thumbnailer.start()
+    json_response.check_encoder()
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    # Flushes whatever like deltas are still buffered
+    like_buffer.stop()
+    hot_decayer.stop()
+    thumbnailer.stop()
 
 # Include routers
 app.include_router(user_router)
@@ -133,7 +174,9 @@ app.include_router(profile_router)
 app.include_router(notification_router)
 app.include_router(settings_router)
 app.include_router(admin_routes.router)
+app.include_router(moderation_router)
 app.include_router(doctor_router)
+app.include_router(upload_session_router)
 
 # Add community router
 from app.routes.community_routes import router as community_router
@@ -158,10 +201,10 @@ async def get_document(
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    file_location = f"uploads/documents/{file_path}"
-    if not os.path.isfile(file_location):
+    response = await storage_response(storage, f"documents/{file_path}")
+    if response is None:
         raise HTTPException(status_code=404, detail="File not found")
         
-    return FileResponse(file_location)
+    return response
 
 
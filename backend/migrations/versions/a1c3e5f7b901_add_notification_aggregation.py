@@ -0,0 +1,37 @@
+"""add notification aggregation
+
+Revision ID: a1c3e5f7b901
+Revises: 53e1590fa9f4
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c3e5f7b901'
+down_revision: Union[str, None] = '53e1590fa9f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notifications', sa.Column('group_key', sa.String(), nullable=True))
+    op.add_column('notifications', sa.Column('actor_count', sa.Integer(), server_default='1', nullable=False))
+    op.create_index(
+        'uq_notifications_unread_group',
+        'notifications',
+        ['user_id', 'group_key'],
+        unique=True,
+        postgresql_where=sa.text('is_read = 0 AND group_key IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_notifications_unread_group', table_name='notifications')
+    op.drop_column('notifications', 'actor_count')
+    op.drop_column('notifications', 'group_key')
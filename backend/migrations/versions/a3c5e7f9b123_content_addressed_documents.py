@@ -0,0 +1,61 @@
+"""content addressed documents
+
+Revision ID: a3c5e7f9b123
+Revises: f2b4d6e8a012
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c5e7f9b123'
+down_revision: Union[str, None] = 'f2b4d6e8a012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'document_blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('content_type', sa.String(), nullable=False),
+        sa.Column('file_path', sa.String(), nullable=False),
+        sa.Column('refcount', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('sha256')
+    )
+    op.add_column('documents', sa.Column('public_id', sa.String(), nullable=True))
+    op.add_column('documents', sa.Column('sha256', sa.String(length=64), nullable=True))
+    op.add_column('documents', sa.Column('size', sa.Integer(), nullable=True))
+    op.add_column('documents', sa.Column('uploaded_by', sa.Integer(), nullable=True))
+    # Timestamps were not unique; suffixing the row id keeps old ids recognisable
+    op.execute("UPDATE documents SET public_id = timestamp || '-' || id")
+    op.alter_column('documents', 'public_id', nullable=False)
+    op.create_unique_constraint('uq_documents_public_id', 'documents', ['public_id'])
+    op.create_index(op.f('ix_documents_sha256'), 'documents', ['sha256'], unique=False)
+    op.create_foreign_key('fk_documents_sha256', 'documents', 'document_blobs', ['sha256'], ['sha256'])
+    op.create_foreign_key(
+        'fk_documents_uploaded_by', 'documents', 'user_account', ['uploaded_by'], ['id'], ondelete='SET NULL'
+    )
+    op.drop_column('documents', 'timestamp')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('documents', sa.Column('timestamp', sa.String(), nullable=True))
+    op.execute("UPDATE documents SET timestamp = public_id")
+    op.alter_column('documents', 'timestamp', nullable=False)
+    op.drop_constraint('fk_documents_uploaded_by', 'documents', type_='foreignkey')
+    op.drop_constraint('fk_documents_sha256', 'documents', type_='foreignkey')
+    op.drop_index(op.f('ix_documents_sha256'), table_name='documents')
+    op.drop_constraint('uq_documents_public_id', 'documents', type_='unique')
+    op.drop_column('documents', 'uploaded_by')
+    op.drop_column('documents', 'size')
+    op.drop_column('documents', 'sha256')
+    op.drop_column('documents', 'public_id')
+    op.drop_table('document_blobs')
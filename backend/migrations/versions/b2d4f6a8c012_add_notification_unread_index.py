@@ -0,0 +1,27 @@
+"""add notification unread index
+
+Revision ID: b2d4f6a8c012
+Revises: a1c3e5f7b901
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d4f6a8c012'
+down_revision: Union[str, None] = 'a1c3e5f7b901'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_notifications_user_unread', 'notifications', ['user_id', 'is_read'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_notifications_user_unread', table_name='notifications')
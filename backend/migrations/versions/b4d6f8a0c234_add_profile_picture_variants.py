@@ -0,0 +1,27 @@
+"""add profile picture variants
+
+Revision ID: b4d6f8a0c234
+Revises: a3c5e7f9b123
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d6f8a0c234'
+down_revision: Union[str, None] = 'a3c5e7f9b123'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user_account', sa.Column('profile_picture_variants', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user_account', 'profile_picture_variants')
@@ -0,0 +1,31 @@
+"""add comment reply count
+
+Revision ID: b8d0f2a4c678
+Revises: a7c9e1f3b567
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d0f2a4c678'
+down_revision: Union[str, None] = 'a7c9e1f3b567'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('comments', sa.Column('reply_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute("""
+        UPDATE comments c
+        SET reply_count = (SELECT count(*) FROM replies r WHERE r.comment_id = c.id)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('comments', 'reply_count')
@@ -0,0 +1,29 @@
+"""make notification message nullable
+
+Revision ID: c3e5a7b9d123
+Revises: b2d4f6a8c012
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e5a7b9d123'
+down_revision: Union[str, None] = 'b2d4f6a8c012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Typed notifications are rendered on read and no longer store their text
+    op.alter_column('notifications', 'message', existing_type=sa.String(), nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("UPDATE notifications SET message = '' WHERE message IS NULL")
+    op.alter_column('notifications', 'message', existing_type=sa.String(), nullable=False)
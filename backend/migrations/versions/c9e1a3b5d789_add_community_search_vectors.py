@@ -0,0 +1,35 @@
+"""add community search vectors
+
+Revision ID: c9e1a3b5d789
+Revises: b8d0f2a4c678
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e1a3b5d789'
+down_revision: Union[str, None] = 'b8d0f2a4c678'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ('comments', 'replies'):
+        # Generated column: Postgres recomputes it on every insert/update
+        op.execute(f"""
+            ALTER TABLE {table} ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (to_tsvector('simple', content)) STORED
+        """)
+        op.execute(f"CREATE INDEX ix_{table}_search_vector ON {table} USING gin (search_vector)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ('comments', 'replies'):
+        op.drop_index(f'ix_{table}_search_vector', table_name=table)
+        op.drop_column(table, 'search_vector')
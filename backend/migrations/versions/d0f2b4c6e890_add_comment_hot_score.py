@@ -0,0 +1,39 @@
+"""add comment hot score
+
+Revision ID: d0f2b4c6e890
+Revises: c9e1a3b5d789
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd0f2b4c6e890'
+down_revision: Union[str, None] = 'c9e1a3b5d789'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('comments', sa.Column('hot_score', sa.Float(), server_default='1', nullable=False))
+    op.add_column('comments', sa.Column('hot_decayed_at', sa.Float(), server_default='0', nullable=False))
+    # Seed from the existing counters, as if every like and reply happened
+    # when the comment was posted (12 hour half-life)
+    op.execute("""
+        UPDATE comments
+        SET hot_score = (1 + likes + 2 * reply_count)
+                        * exp(-ln(2) / 43200 * extract(epoch FROM now() - created_at)),
+            hot_decayed_at = extract(epoch FROM now())
+    """)
+    op.create_index('ix_comments_hot_score_id', 'comments', ['hot_score', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_comments_hot_score_id', table_name='comments')
+    op.drop_column('comments', 'hot_decayed_at')
+    op.drop_column('comments', 'hot_score')
@@ -0,0 +1,49 @@
+"""notification metadata jsonb
+
+Revision ID: d4f6b8c0e234
+Revises: c3e5a7b9d123
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f6b8c0e234'
+down_revision: Union[str, None] = 'c3e5a7b9d123'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column(
+        'notifications',
+        'notification_metadata',
+        existing_type=sa.JSON(),
+        type_=postgresql.JSONB(),
+        postgresql_using='notification_metadata::jsonb'
+    )
+    op.create_index(
+        'ix_notifications_metadata',
+        'notifications',
+        ['notification_metadata'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'notification_metadata': 'jsonb_path_ops'}
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_notifications_metadata', table_name='notifications')
+    op.alter_column(
+        'notifications',
+        'notification_metadata',
+        existing_type=postgresql.JSONB(),
+        type_=sa.JSON(),
+        postgresql_using='notification_metadata::json'
+    )
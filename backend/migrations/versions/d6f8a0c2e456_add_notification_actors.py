@@ -0,0 +1,44 @@
+"""add notification actors
+
+Revision ID: d6f8a0c2e456
+Revises: c5e7f9b1d345
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6f8a0c2e456'
+down_revision: Union[str, None] = 'c5e7f9b1d345'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'notification_actors',
+        sa.Column('notification_id', sa.Integer(), nullable=False),
+        sa.Column('actor_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['notification_id'], ['notifications.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['actor_id'], ['user_account.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('notification_id', 'actor_id')
+    )
+    # Open aggregates only remember their most recent actors; those are the
+    # ones a repeat event is most likely to come from
+    op.execute("""
+        INSERT INTO notification_actors (notification_id, actor_id)
+        SELECT DISTINCT n.id, u.id
+        FROM notifications n
+        CROSS JOIN LATERAL jsonb_array_elements(n.notification_metadata -> 'recent_actors') AS actor
+        JOIN user_account u ON u.id = (actor ->> 'id')::int
+        WHERE n.group_key IS NOT NULL AND n.is_read = 0
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('notification_actors')
@@ -0,0 +1,37 @@
+"""add community changes
+
+Revision ID: e1a3c5d7f901
+Revises: d0f2b4c6e890
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a3c5d7f901'
+down_revision: Union[str, None] = 'd0f2b4c6e890'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'community_changes',
+        sa.Column('seq', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('comment_id', sa.Integer(), nullable=False),
+        sa.Column('op', sa.String(), nullable=False),
+        sa.Column('likes', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('seq')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('community_changes')
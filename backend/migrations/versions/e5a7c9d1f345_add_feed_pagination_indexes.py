@@ -0,0 +1,29 @@
+"""add feed pagination indexes
+
+Revision ID: e5a7c9d1f345
+Revises: d4f6b8c0e234
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a7c9d1f345'
+down_revision: Union[str, None] = 'd4f6b8c0e234'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_comments_created_at_id', 'comments', ['created_at', 'id'], unique=False)
+    op.create_index('ix_replies_comment_id_created_at', 'replies', ['comment_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_replies_comment_id_created_at', table_name='replies')
+    op.drop_index('ix_comments_created_at_id', table_name='comments')
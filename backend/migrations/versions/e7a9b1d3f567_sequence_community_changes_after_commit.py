@@ -0,0 +1,40 @@
+"""sequence community changes after commit
+
+Revision ID: e7a9b1d3f567
+Revises: d6f8a0c2e456
+Create Date: 2026-10-20 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a9b1d3f567'
+down_revision: Union[str, None] = 'd6f8a0c2e456'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The insert-time counter becomes the row id; seq is now numbered after commit
+    op.alter_column('community_changes', 'seq', new_column_name='id')
+    op.add_column('community_changes', sa.Column('seq', sa.BigInteger(), nullable=True))
+    # Rows so far were appended under a global lock, so id order is commit
+    # order and the watermarks clients hold stay valid
+    op.execute("UPDATE community_changes SET seq = id")
+    op.create_index('ix_community_changes_seq', 'community_changes', ['seq'], unique=True)
+    op.create_index(
+        'ix_community_changes_unsequenced', 'community_changes', ['id'],
+        postgresql_where=sa.text('seq IS NULL')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_community_changes_unsequenced', table_name='community_changes')
+    op.drop_index('ix_community_changes_seq', table_name='community_changes')
+    op.drop_column('community_changes', 'seq')
+    op.alter_column('community_changes', 'id', new_column_name='seq')
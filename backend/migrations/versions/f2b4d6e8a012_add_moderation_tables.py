@@ -0,0 +1,61 @@
+"""add moderation tables
+
+Revision ID: f2b4d6e8a012
+Revises: e1a3c5d7f901
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b4d6e8a012'
+down_revision: Union[str, None] = 'e1a3c5d7f901'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'moderation_terms',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('term', sa.String(), nullable=False),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['created_by'], ['user_account.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('term')
+    )
+    op.create_index(op.f('ix_moderation_terms_id'), 'moderation_terms', ['id'], unique=False)
+    op.create_table(
+        'moderation_queue',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('comment_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('matched_terms', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('reviewed_by', sa.Integer(), nullable=True),
+        sa.Column('reviewed_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user_account.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['reviewed_by'], ['user_account.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_moderation_queue_id'), 'moderation_queue', ['id'], unique=False)
+    op.create_index('uq_moderation_queue_entity', 'moderation_queue', ['entity', 'entity_id'], unique=True)
+    op.create_index('ix_moderation_queue_status_id', 'moderation_queue', ['status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_moderation_queue_status_id', table_name='moderation_queue')
+    op.drop_index('uq_moderation_queue_entity', table_name='moderation_queue')
+    op.drop_index(op.f('ix_moderation_queue_id'), table_name='moderation_queue')
+    op.drop_table('moderation_queue')
+    op.drop_index(op.f('ix_moderation_terms_id'), table_name='moderation_terms')
+    op.drop_table('moderation_terms')
@@ -0,0 +1,40 @@
+"""unique comment likes
+
+Revision ID: f6b8d0e2a456
+Revises: e5a7c9d1f345
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6b8d0e2a456'
+down_revision: Union[str, None] = 'e5a7c9d1f345'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Drop duplicate likes left by the old read-modify-write toggle
+    op.execute("""
+        DELETE FROM comment_likes a
+        USING comment_likes b
+        WHERE a.ctid < b.ctid
+          AND a.user_id = b.user_id
+          AND a.comment_id = b.comment_id
+    """)
+    op.create_index('uq_comment_likes_user_comment', 'comment_likes', ['user_id', 'comment_id'], unique=True)
+    # Bring the denormalized counters back in line with the deduplicated rows
+    op.execute("""
+        UPDATE comments c
+        SET likes = (SELECT count(*) FROM comment_likes l WHERE l.comment_id = c.id)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_comment_likes_user_comment', table_name='comment_likes')
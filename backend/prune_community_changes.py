@@ -0,0 +1,16 @@
+from datetime import timedelta
+
+from config import settings
+from config.database import SessionLocal
+from app.services.change_log import prune
+
+def prune_community_changes():
+    db = SessionLocal()
+    try:
+        return prune(db, timedelta(hours=settings.CHANGE_RETENTION_HOURS))
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    deleted = prune_community_changes()
+    print(f"Pruned {deleted} community changes")
@@ -0,0 +1,23 @@
+import argparse
+
+from config.database import SessionLocal
+from app.services.community_service import LikeDeltasPending, reconcile_like_counts
+
+def reconcile_likes(workers_stopped: bool = False):
+    db = SessionLocal()
+    try:
+        return reconcile_like_counts(db, buffers_stopped=workers_stopped)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Set every comment's like counter to its comment_likes row count")
+    parser.add_argument("--workers-stopped", action="store_true",
+                        help="every API worker is stopped, so no write-behind like deltas are pending")
+    args = parser.parse_args()
+
+    try:
+        repaired = reconcile_likes(args.workers_stopped)
+    except LikeDeltasPending:
+        raise SystemExit("LIKE_WRITE_BEHIND is on: stop the API workers, then rerun with --workers-stopped")
+    print(f"Like counters reconciled ({repaired} comments repaired)")
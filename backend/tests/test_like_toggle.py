@@ -0,0 +1,90 @@
+"""
+Concurrent like toggles must leave Comment.likes equal to the number of
+comment_likes rows. Runs against TEST_DATABASE_URL when set (a disposable
+PostgreSQL database, where the toggles really overlap), otherwise against a
+temporary SQLite file, where they are serialized by the database lock:
+
+    TEST_DATABASE_URL=postgresql://... python -m pytest tests/test_like_toggle.py
+"""
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from config.database import Base
+from app.models import Comment, UserAccount
+from app.models.comment import comment_likes
+from app.services import community_service
+from app.services.like_buffer import like_buffer
+
+USERS = 300
+WORKERS = 50
+
+@pytest.fixture
+def session_factory(tmp_path):
+    url = os.getenv("TEST_DATABASE_URL") or f"sqlite:///{tmp_path}/likes.db"
+    if url.startswith("sqlite"):
+        engine = create_engine(url, connect_args={"timeout": 60}, pool_size=WORKERS)
+    else:
+        engine = create_engine(url, pool_size=WORKERS)
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+@pytest.fixture
+def comment(session_factory):
+    db = session_factory()
+    run = uuid.uuid4().hex[:8]
+    users = [
+        UserAccount(cin=f"likes-{run}-{i}", first_name="Like", last_name=str(i),
+                    email=f"likes-{run}-{i}@example.com", password="x")
+        for i in range(USERS)
+    ]
+    db.add_all(users)
+    db.flush()
+    comment = Comment(content="viral", user_id=users[0].id)
+    db.add(comment)
+    db.commit()
+    ids = comment.id, [user.id for user in users]
+    db.close()
+    return ids
+
+def _toggle_all(session_factory, comment_id: int, user_ids):
+    def toggle(user_id: int):
+        db = session_factory()
+        try:
+            community_service.toggle_like(db, comment_id, user_id)
+            db.commit()
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        list(pool.map(toggle, user_ids))
+
+def _counts(session_factory, comment_id: int):
+    db = session_factory()
+    try:
+        likes = db.execute(select(Comment.likes).where(Comment.id == comment_id)).scalar_one()
+        rows = db.execute(
+            select(func.count()).select_from(comment_likes).where(comment_likes.c.comment_id == comment_id)
+        ).scalar_one()
+        return likes, rows
+    finally:
+        db.close()
+
+@pytest.mark.skipif(like_buffer.enabled, reason="counters are flushed in batches with LIKE_WRITE_BEHIND on")
+def test_concurrent_toggles_keep_counter_in_step(session_factory, comment):
+    comment_id, user_ids = comment
+
+    _toggle_all(session_factory, comment_id, user_ids)
+    assert _counts(session_factory, comment_id) == (USERS, USERS)
+
+    # Unlikes race with users double-clicking (unlike, then like again)
+    unlikers = set(user_ids[::3])
+    relikers = [user_id for user_id in user_ids if user_id not in unlikers]
+    _toggle_all(session_factory, comment_id, list(unlikers) + relikers * 2)
+    expected = USERS - len(unlikers)
+    assert _counts(session_factory, comment_id) == (expected, expected)
@@ -1,35 +1,60 @@
 import { NextRequest, NextResponse } from 'next/server';
 
+// Request headers that make the backend answer with 206 / 304
+const FORWARDED_REQUEST_HEADERS = ['range', 'if-range', 'if-none-match', 'if-modified-since'];
+const FORWARDED_RESPONSE_HEADERS = [
+  'content-type',
+  'content-length',
+  'content-range',
+  'accept-ranges',
+  'etag',
+  'last-modified',
+  'cache-control',
+];
+
 export async function GET(request: NextRequest, { params }: { params: { path: string[] } }) {
   try {
     const token = request.headers.get('Authorization')?.split(' ')[1] || request.cookies.get('token')?.value;
-    
+
     if (!token) {
       return new NextResponse('Unauthorized', { status: 401 });
     }
 
     const path = params.path.join('/');
-    const response = await fetch(`http://localhost:8000/uploads/${path}`, {
-      headers: {
-        'Authorization': `Bearer ${token}`
-      }
+    const headers: Record<string, string> = {
+      'Authorization': `Bearer ${token}`
+    };
+    for (const name of FORWARDED_REQUEST_HEADERS) {
+      const value = request.headers.get(name);
+      if (value) headers[name] = value;
+    }
+
+    // Keep the query string: signed links carry exp / uid / sig
+    const response = await fetch(`http://localhost:8000/uploads/${path}${request.nextUrl.search}`, {
+      headers,
+      cache: 'no-store'
     });
 
+    const responseHeaders = new Headers();
+    for (const name of FORWARDED_RESPONSE_HEADERS) {
+      const value = response.headers.get(name);
+      if (value) responseHeaders.set(name, value);
+    }
+
+    if (response.status === 304) {
+      return new NextResponse(null, { status: 304, headers: responseHeaders });
+    }
     if (!response.ok) {
       return new NextResponse(null, { status: response.status });
     }
 
-    const contentType = response.headers.get('content-type');
-    const buffer = await response.arrayBuffer();
-
-    return new NextResponse(buffer, {
-      headers: {
-        'Content-Type': contentType || 'application/octet-stream',
-        'Cache-Control': 'public, max-age=3600'
-      }
+    // Stream the body through instead of buffering the whole file
+    return new NextResponse(response.body, {
+      status: response.status,
+      headers: responseHeaders
     });
   } catch (error) {
     console.error('Error fetching file:', error);
     return new NextResponse('Internal Server Error', { status: 500 });
   }
-} 
\ No newline at end of file
+}
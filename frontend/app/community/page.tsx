@@ -1,9 +1,10 @@
 'use client';
 
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useAuth } from '../context/AuthContext';
 import { useLanguage } from '../context/LanguageContext';
 import { fetchWithAuth } from '../utils/api';
+import { avatarUrl } from '../utils/avatar';
 import { Badge } from '../components/ui/badge';
 import { Button } from '../components/ui/button';
 import { Textarea } from '../components/ui/textarea';
@@ -29,6 +30,7 @@ interface User {
   last_name: string;
   role: string;
   profile_picture: string | null;
+  profile_picture_variants?: Record<string, string> | null;
 }
 
 interface Comment {
@@ -38,10 +40,23 @@ interface Comment {
   user_id: number;
   user: User;
   replies: Reply[];
+  reply_count: number;
+  replies_cursor: string | null;
   likes: number;
   is_liked: boolean;
 }
 
+interface Change {
+  seq: number;
+  type: 'comment' | 'reply';
+  op: 'upsert' | 'delete' | 'likes';
+  id: number;
+  comment_id: number;
+  likes?: number;
+  reply_count?: number | null;
+  data?: any;
+}
+
 interface Reply {
   id: number;
   content: string;
@@ -57,6 +72,12 @@ export default function CommunityPage() {
   const [replyContent, setReplyContent] = useState<{ [key: number]: string }>({});
   const [replyingTo, setReplyingTo] = useState<number | null>(null);
   const [isLoading, setIsLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
+  const [loadingRepliesFor, setLoadingRepliesFor] = useState<number | null>(null);
+  const [sort, setSort] = useState<'new' | 'hot'>('new');
+  // Change-log position the loaded feed is current up to
+  const watermark = useRef<number | null>(null);
   const [searchQuery, setSearchQuery] = useState('');
   const [deleteReason, setDeleteReason] = useState('');
   const { translations } = useLanguage();
@@ -64,8 +85,12 @@ export default function CommunityPage() {
 
   const fetchComments = async () => {
     try {
-      const response = await fetchWithAuth('http://localhost:8000/community/comments');
+      // Read the watermark first: changes made while the feed loads are replayed, never missed
+      const changesResponse = await fetchWithAuth('http://localhost:8000/community/changes');
+      const changes = changesResponse ? await changesResponse.json() : null;
+      const response = await fetchWithAuth(`http://localhost:8000/community/comments?sort=${sort}`);
       if (!response) throw new Error('Failed to fetch comments');
+      watermark.current = changes?.watermark ?? null;
       const data = await response.json();
       console.log('Current user in community page:', user);
       console.log('Comments data:', data);
@@ -76,6 +101,7 @@ export default function CommunityPage() {
         content: comment.content.substring(0, 50) + '...'
       })));
       setComments(data);
+      setNextCursor(response.headers.get('X-Next-Cursor'));
     } catch (error) {
       console.error('Error fetching comments:', error);
       toast.error(translations.failedToLoad);
@@ -84,10 +110,115 @@ export default function CommunityPage() {
     }
   };
 
+  const applyChange = (prevComments: Comment[], change: Change): Comment[] => {
+    if (change.type === 'comment') {
+      if (change.op === 'delete') {
+        return prevComments.filter(c => c.id !== change.id);
+      }
+      if (change.op === 'likes') {
+        return prevComments.map(c => c.id === change.id ? { ...c, likes: change.likes ?? c.likes } : c);
+      }
+      if (!change.data) return prevComments;
+      if (prevComments.some(c => c.id === change.id)) {
+        return prevComments.map(c => c.id === change.id ? { ...change.data, replies: c.replies, replies_cursor: c.replies_cursor } : c);
+      }
+      return [change.data, ...prevComments];
+    }
+
+    return prevComments.map(c => {
+      if (c.id !== change.comment_id) return c;
+      const replyCount = change.reply_count ?? c.reply_count;
+      if (change.op === 'delete') {
+        return { ...c, reply_count: replyCount, replies: c.replies.filter(r => r.id !== change.id) };
+      }
+      if (!change.data || c.replies.some(r => r.id === change.id)) {
+        return { ...c, reply_count: replyCount };
+      }
+      // Only extend threads that are fully loaded; otherwise "show more" will fetch it
+      return c.replies_cursor
+        ? { ...c, reply_count: replyCount }
+        : { ...c, reply_count: replyCount, replies: [...c.replies, change.data] };
+    });
+  };
+
+  const syncChanges = async () => {
+    if (watermark.current === null) {
+      fetchComments();
+      return;
+    }
+    try {
+      let hasMore = true;
+      while (hasMore) {
+        const response = await fetchWithAuth(`http://localhost:8000/community/changes?since=${watermark.current}`);
+        if (!response) return;
+        if (response.status === 410) {
+          // Too far behind the retained change log
+          fetchComments();
+          return;
+        }
+        const data = await response.json();
+        const changes: Change[] = data.changes;
+        if (changes.length > 0) {
+          setComments(prevComments => changes.reduce(applyChange, prevComments));
+        }
+        watermark.current = data.watermark;
+        hasMore = data.has_more;
+      }
+    } catch (error) {
+      console.error('Error syncing comments:', error);
+    }
+  };
+
+  const loadMoreComments = async () => {
+    if (!nextCursor) return;
+    setIsLoadingMore(true);
+    try {
+      const response = await fetchWithAuth(`http://localhost:8000/community/comments?sort=${sort}&cursor=${encodeURIComponent(nextCursor)}`);
+      if (!response) throw new Error('Failed to fetch comments');
+      const data = await response.json();
+      setComments(prevComments => [...prevComments, ...data]);
+      setNextCursor(response.headers.get('X-Next-Cursor'));
+    } catch (error) {
+      console.error('Error fetching comments:', error);
+      toast.error(translations.failedToLoad);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
+  const loadMoreReplies = async (comment: Comment) => {
+    if (!comment.replies_cursor) return;
+    setLoadingRepliesFor(comment.id);
+    try {
+      const response = await fetchWithAuth(
+        `http://localhost:8000/community/comments/${comment.id}/replies?cursor=${encodeURIComponent(comment.replies_cursor)}`
+      );
+      if (!response) throw new Error('Failed to fetch replies');
+      const data: Reply[] = await response.json();
+      const repliesCursor = response.headers.get('X-Next-Cursor');
+      setComments(prevComments => prevComments.map(c =>
+        c.id === comment.id
+          ? { ...c, replies: [...c.replies, ...data], replies_cursor: repliesCursor }
+          : c
+      ));
+    } catch (error) {
+      console.error('Error fetching replies:', error);
+      toast.error(translations.failedToLoad);
+    } finally {
+      setLoadingRepliesFor(null);
+    }
+  };
+
   useEffect(() => {
     if (isLoggedIn) {
       fetchComments();
     }
+  }, [isLoggedIn, sort]);
+
+  useEffect(() => {
+    if (!isLoggedIn) return;
+    const interval = setInterval(syncChanges, 15000);
+    return () => clearInterval(interval);
   }, [isLoggedIn]);
 
   const handleSubmitComment = async () => {
@@ -105,7 +236,7 @@ export default function CommunityPage() {
       if (!response) throw new Error('Failed to post comment');
       
       setNewComment('');
-      fetchComments();
+      syncChanges();
       toast.success(translations.commentPosted);
     } catch (error) {
       console.error('Error posting comment:', error);
@@ -133,7 +264,7 @@ export default function CommunityPage() {
       if (!response) throw new Error('Failed to delete comment');
       
       setDeleteReason(''); // Reset the reason after successful deletion
-      fetchComments();
+      syncChanges();
       toast.success(translations.commentDeleted);
     } catch (error) {
       console.error('Error deleting comment:', error);
@@ -149,7 +280,7 @@ export default function CommunityPage() {
 
       if (!response) throw new Error('Failed to delete reply');
       
-      fetchComments();
+      syncChanges();
       toast.success(translations.replyDeleted);
     } catch (error) {
       console.error('Error deleting reply:', error);
@@ -173,7 +304,7 @@ export default function CommunityPage() {
 
       setReplyContent({ ...replyContent, [commentId]: '' });
       setReplyingTo(null);
-      fetchComments();
+      syncChanges();
       toast.success(translations.replyPosted);
     } catch (error) {
       console.error('Error posting reply:', error);
@@ -338,18 +469,27 @@ export default function CommunityPage() {
         </div>
       </div>
 
-     
+      {/* Feed ordering */}
+      <div className="mb-4 flex gap-2">
+        {(['new', 'hot'] as const).map((option) => (
+          <Button
+            key={option}
+            variant="ghost"
+            size="sm"
+            onClick={() => setSort(option)}
+            className={sort === option ? 'text-blue-500' : 'text-gray-400 hover:text-gray-300'}
+          >
+            {option === 'new' ? (translations.sortNew || "Newest") : (translations.sortHot || "Hot")}
+          </Button>
+        ))}
+      </div>
 
       {/* New Comment Form */}
       <div className="mb-8 bg-gray-900/50 p-6 rounded-lg shadow-lg">
         <div className="flex items-start gap-4">
           <Avatar className="h-10 w-10 border-2 border-gray-700">
             <AvatarImage 
-              src={user?.profile_picture 
-                ? (user.profile_picture.startsWith('http') 
-                  ? user.profile_picture 
-                  : `http://localhost:8000${user.profile_picture}`)
-                : "/default-avatar.png"} 
+              src={avatarUrl(user, 40) || "/default-avatar.png"}
               alt={`${user?.first_name} ${user?.last_name}`} 
             />
             <AvatarFallback>{user?.first_name?.[0]}{user?.last_name?.[0]}</AvatarFallback>
@@ -384,11 +524,7 @@ export default function CommunityPage() {
               <div className="flex items-start gap-4">
                 <Avatar className="h-10 w-10 border-2 border-gray-700">
                   <AvatarImage 
-                    src={comment.user.profile_picture 
-                      ? (comment.user.profile_picture.startsWith('http') 
-                        ? comment.user.profile_picture 
-                        : `http://localhost:8000${comment.user.profile_picture}`)
-                      : "/default-avatar.png"} 
+                    src={avatarUrl(comment.user, 40) || "/default-avatar.png"}
                     alt={`${comment.user.first_name} ${comment.user.last_name}`} 
                   />
                   <AvatarFallback>{comment.user.first_name[0]}{comment.user.last_name[0]}</AvatarFallback>
@@ -472,7 +608,7 @@ export default function CommunityPage() {
                   className="text-gray-400 hover:text-gray-300 gap-2"
                 >
                   <MessageCircle className="h-4 w-4" />
-                  {translations.reply}
+                  {translations.reply}{comment.reply_count > 0 && ` (${comment.reply_count})`}
                 </Button>
               </div>
 
@@ -482,11 +618,7 @@ export default function CommunityPage() {
                   <div className="flex items-start gap-4">
                     <Avatar className="h-8 w-8 border-2 border-gray-700">
                       <AvatarImage 
-                        src={user?.profile_picture 
-                          ? (user.profile_picture.startsWith('http') 
-                            ? user.profile_picture 
-                            : `http://localhost:8000${user.profile_picture}`)
-                          : "/default-avatar.png"} 
+                        src={avatarUrl(user, 32) || "/default-avatar.png"}
                         alt={`${user?.first_name} ${user?.last_name}`} 
                       />
                       <AvatarFallback>{user?.first_name?.[0]}{user?.last_name?.[0]}</AvatarFallback>
@@ -519,11 +651,7 @@ export default function CommunityPage() {
                       <div className="flex items-start gap-4">
                         <Avatar className="h-8 w-8 border-2 border-gray-700">
                           <AvatarImage 
-                            src={reply.user.profile_picture 
-                              ? (reply.user.profile_picture.startsWith('http') 
-                                ? reply.user.profile_picture 
-                                : `http://localhost:8000${reply.user.profile_picture}`)
-                              : "/default-avatar.png"} 
+                            src={avatarUrl(reply.user, 32) || "/default-avatar.png"}
                             alt={`${reply.user.first_name} ${reply.user.last_name}`} 
                           />
                           <AvatarFallback>{reply.user.first_name[0]}{reply.user.last_name[0]}</AvatarFallback>
@@ -575,10 +703,33 @@ export default function CommunityPage() {
                       </div>
                     </div>
                   ))}
+                  {comment.replies_cursor && (
+                    <Button
+                      variant="ghost"
+                      size="sm"
+                      onClick={() => loadMoreReplies(comment)}
+                      disabled={loadingRepliesFor === comment.id}
+                      className="text-gray-400 hover:text-gray-300"
+                    >
+                      {translations.showMoreReplies || "Show more replies"} ({comment.reply_count - comment.replies.length})
+                    </Button>
+                  )}
                 </div>
               )}
             </div>
           ))}
+          {nextCursor && (
+            <div className="text-center">
+              <Button
+                variant="ghost"
+                onClick={loadMoreComments}
+                disabled={isLoadingMore}
+                className="text-gray-400 hover:text-gray-300"
+              >
+                {translations.loadMore || "Load more"}
+              </Button>
+            </div>
+          )}
         </div>
       )}
     </div>
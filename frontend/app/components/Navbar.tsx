@@ -7,6 +7,7 @@ import { useAuth } from "@/app/context/AuthContext";
 import { useLanguage } from "@/app/context/LanguageContext";
 import ProfilePopUp from "./ProfilePopUp";
 import { fetchWithAuth } from '../utils/api';
+import { avatarUrl } from '../utils/avatar';
 
 interface NavLink {
   href: string;
@@ -17,6 +18,7 @@ interface NavLink {
 
 interface UserProfile {
   profile_picture: string | null;
+  profile_picture_variants?: Record<string, string> | null;
 }
 
 const Navbar = () => {
@@ -33,11 +35,10 @@ const Navbar = () => {
   const fetchNotifications = async () => {
     if (isLoggedIn) {
       try {
-        const response = await fetchWithAuth("http://localhost:8000/notifications");
+        const response = await fetchWithAuth("http://localhost:8000/notifications/unread-count");
         if (!response) return;
         const data = await response.json();
-        const unreadNotifications = (data || []).filter((n: any) => !n.is_read);
-        setUnreadCount(unreadNotifications.length);
+        setUnreadCount(data?.unread_count || 0);
       } catch (err) {
         console.error("Error fetching notifications:", err);
         setUnreadCount(0);
@@ -139,11 +140,7 @@ const Navbar = () => {
                       <div className="relative">
                         <div className="w-8 h-8 rounded-full overflow-hidden border-2 border-white group-hover:border-blue-400 transition-all duration-300 ring-2 ring-transparent group-hover:ring-blue-500/50">
                           <Image
-                            src={profile?.profile_picture 
-                              ? (profile.profile_picture.startsWith('http') 
-                                ? profile.profile_picture 
-                                : `http://localhost:8000${profile.profile_picture}`)
-                              : defaultAvatar}
+                            src={avatarUrl(profile, 32) || defaultAvatar}
                             alt="Profile"
                             width={32}
                             height={32}
@@ -240,11 +237,7 @@ const Navbar = () => {
                   <div className="relative mr-2">
                     <div className="w-8 h-8 rounded-full overflow-hidden border-2 border-white hover:border-blue-400 transition-all duration-300 ring-2 ring-transparent hover:ring-blue-500/50">
                       <Image
-                        src={profile?.profile_picture 
-                          ? (profile.profile_picture.startsWith('http') 
-                            ? profile.profile_picture 
-                            : `http://localhost:8000${profile.profile_picture}`)
-                          : defaultAvatar}
+                        src={avatarUrl(profile, 32) || defaultAvatar}
                         alt="Profile"
                         width={32}
                         height={32}
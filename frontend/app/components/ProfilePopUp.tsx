@@ -65,10 +65,12 @@ export default function ProfilePopUp({ isOpen, onClose, anchorRef }: ProfilePopU
 
   const markAsRead = async (notificationId: number) => {
     try {
-      await fetchWithAuth(`http://localhost:8000/notifications/${notificationId}/read`, {
+      await fetchWithAuth("http://localhost:8000/notifications/mark-read", {
         method: "PUT",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ ids: [notificationId] }),
       });
-      fetchNotifications();
+      setNotifications(prev => prev.map(n => n.id === notificationId ? { ...n, is_read: true } : n));
     } catch (err) {
       console.error("Error marking notification as read:", err);
       setNotificationsError("Failed to mark notification as read");
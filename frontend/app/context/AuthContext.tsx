@@ -9,6 +9,7 @@ interface User {
   last_name: string;
   role: string;
   profile_picture: string | null;
+  profile_picture_variants?: Record<string, string> | null;
 }
 
 interface AuthContextType {
@@ -54,7 +55,8 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
         first_name: data.first_name,
         last_name: data.last_name,
         role: userRole,
-        profile_picture: data.profile_picture
+        profile_picture: data.profile_picture,
+        profile_picture_variants: data.profile_picture_variants
       };
       
       console.log('Setting user data:', userData);
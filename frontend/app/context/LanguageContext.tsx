@@ -69,6 +69,10 @@ const translations = {
     noNotifications: "No notifications",
     markAllAsRead: "Mark all as read",
     failedToLoad: "Failed to load",
+    loadMore: "Load more",
+    showMoreReplies: "Show more replies",
+    sortNew: "Newest",
+    sortHot: "Hot",
 
     // Footer
     footerFacebookAria: "Visit our Facebook page",
@@ -219,6 +223,10 @@ const translations = {
     noNotifications: "Aucune notification",
     markAllAsRead: "Tout marquer comme lu",
     failedToLoad: "Échec du chargement",
+    loadMore: "Charger plus",
+    showMoreReplies: "Afficher plus de réponses",
+    sortNew: "Plus récents",
+    sortHot: "Tendances",
 
     // Footer
     footerFacebookAria: "Voir notre page Facebook",
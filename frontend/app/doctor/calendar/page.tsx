@@ -12,7 +12,8 @@ interface Document {
   name: string;
   file_path: string;
   content_type: string;
-  timestamp: string;
+  public_id: string;
+  url?: string;
   created_at: string;
 }
 
@@ -82,6 +83,21 @@ export default function DoctorCalendar() {
     }
   };
 
+  const handleDownloadAll = async (patientId: number) => {
+    try {
+      const response = await fetchWithAuth(`http://localhost:8000/doctor/patients/${patientId}/documents.zip`);
+      if (!response || !response.ok) throw new Error('Failed to download documents');
+      const url = window.URL.createObjectURL(await response.blob());
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = `patient-${patientId}-documents.zip`;
+      link.click();
+      window.URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error('Error downloading documents:', error);
+    }
+  };
+
   const handleUploadDocument = async (e: React.ChangeEvent<HTMLInputElement>, patientId: number) => {
     e.preventDefault();
     e.stopPropagation();
@@ -262,7 +278,19 @@ export default function DoctorCalendar() {
                     <div>
                       <div className="flex justify-between items-center mb-4">
                         <h4 className="text-lg font-semibold">Patient Documents</h4>
-                        <div className="relative">
+                        <div className="relative flex items-center gap-2">
+                          {appointment.user.documents.length > 1 && (
+                            <button
+                              onClick={(e) => {
+                                e.preventDefault();
+                                e.stopPropagation();
+                                handleDownloadAll(appointment.user.id);
+                              }}
+                              className="text-blue-500 hover:text-blue-400 text-sm"
+                            >
+                              Download All
+                            </button>
+                          )}
                           <input
                             type="file"
                             onChange={(e) => handleUploadDocument(e, appointment.user.id)}
@@ -307,7 +335,7 @@ export default function DoctorCalendar() {
                                 onClick={(e) => {
                                   e.preventDefault();
                                   e.stopPropagation();
-                                  handleOpenDocument(doc.file_path);
+                                  handleOpenDocument(doc.url ?? doc.file_path);
                                 }}
                                 className="text-blue-500 hover:text-blue-400 text-sm"
                               >
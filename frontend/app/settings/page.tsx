@@ -4,6 +4,7 @@ import { useEffect, useState } from 'react';
 import { useLanguage } from '../context/LanguageContext';
 import { useAuth } from '../context/AuthContext';
 import { fetchWithAuth } from '../utils/api';
+import { SINGLE_UPLOAD_LIMIT, uploadDocumentResumable } from '../utils/resumableUpload';
 import Image from 'next/image';
 import { toast } from 'react-hot-toast';
 
@@ -35,7 +36,8 @@ interface Document {
   name: string;
   content_type: string;
   file_path: string;
-  timestamp: string;
+  public_id: string;
+  url?: string;
   created_at: string;
 }
 
@@ -160,6 +162,14 @@ export default function Settings() {
         return;
       }
 
+      if (file.size > SINGLE_UPLOAD_LIMIT) {
+        const newDoc = await uploadDocumentResumable(file);
+        setDocuments([...documents, newDoc]);
+        toast.success('Document uploaded successfully');
+        e.target.value = '';
+        return;
+      }
+
       const response = await fetch('http://localhost:8000/profile/me/documents', {
         method: 'POST',
         headers: {
@@ -182,7 +192,7 @@ export default function Settings() {
       e.target.value = '';
     } catch (error) {
       console.error('Error uploading document:', error);
-      toast.error('Failed to upload document');
+      toast.error(error instanceof Error ? error.message : 'Failed to upload document');
     } finally {
       setUploadingDocument(false);
     }
@@ -194,7 +204,7 @@ export default function Settings() {
         method: 'DELETE'
       });
       if (!response) throw new Error('No response received');
-      setDocuments(documents.filter(doc => doc.timestamp !== documentId));
+      setDocuments(documents.filter(doc => doc.public_id !== documentId));
     } catch (error) {
       console.error('Error deleting document:', error);
     }
@@ -418,13 +428,13 @@ export default function Settings() {
                     </div>
                     <div className="flex items-center space-x-2">
                       <button
-                        onClick={() => handleOpenDocument(doc.file_path)}
+                        onClick={() => handleOpenDocument(doc.url ?? doc.file_path)}
                         className="text-blue-500 hover:text-blue-600 px-3 py-1 rounded-lg border border-blue-500 hover:border-blue-600 transition-colors"
                       >
                         {translations.openDocument}
                       </button>
                       <button
-                        onClick={() => handleDeleteDocument(doc.timestamp)}
+                        onClick={() => handleDeleteDocument(doc.public_id)}
                         className="text-red-500 hover:text-red-600"
                       >
                         {translations.deleteDocument}
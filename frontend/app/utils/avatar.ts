@@ -0,0 +1,16 @@
+// Profile pictures come with square WebP thumbnails (48 / 128 / 512px) once
+// the backend has generated them; until then only the original is available.
+export interface AvatarSource {
+  profile_picture: string | null;
+  profile_picture_variants?: Record<string, string> | null;
+}
+
+const THUMBNAIL_SIZES = [48, 128, 512];
+
+// Smallest thumbnail covering `size` CSS pixels on a 2x screen, else the original
+export const avatarUrl = (source: AvatarSource | null | undefined, size: number): string | null => {
+  if (!source?.profile_picture) return null;
+  const wanted = THUMBNAIL_SIZES.find((edge) => edge >= size * 2) ?? THUMBNAIL_SIZES[THUMBNAIL_SIZES.length - 1];
+  const picture = source.profile_picture_variants?.[String(wanted)] || source.profile_picture;
+  return picture.startsWith('http') ? picture : `http://localhost:8000${picture}`;
+};
@@ -0,0 +1,87 @@
+import { getToken } from './auth';
+
+// Documents above this size go through resumable upload sessions instead of
+// a single POST, which the backend caps at 10MB.
+export const SINGLE_UPLOAD_LIMIT = 10 * 1024 * 1024;
+
+const API = 'http://localhost:8000/upload-sessions';
+const MAX_RETRIES = 5;
+
+interface UploadSession {
+  id: string;
+  size: number;
+  offset: number;
+  max_chunk_size: number;
+}
+
+const sha256Hex = async (file: Blob) => {
+  const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+  return Array.from(new Uint8Array(digest), (byte) => byte.toString(16).padStart(2, '0')).join('');
+};
+
+const errorDetail = async (response: Response, fallback: string) => {
+  try {
+    return (await response.json()).detail || fallback;
+  } catch {
+    return fallback;
+  }
+};
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Uploads `file` in chunks, resuming from the server's offset after network
+// errors; resolves to the stored document. `patientId` is for doctors
+// uploading to a patient's file.
+export const uploadDocumentResumable = async (
+  file: File,
+  options: { patientId?: number; onProgress?: (fraction: number) => void } = {}
+) => {
+  const headers = { 'Authorization': `Bearer ${getToken()}` };
+
+  const created = await fetch(API, {
+    method: 'POST',
+    headers: { ...headers, 'Content-Type': 'application/json' },
+    body: JSON.stringify({
+      name: file.name,
+      size: file.size,
+      sha256: await sha256Hex(file),
+      patient_id: options.patientId ?? null
+    })
+  });
+  if (!created.ok) throw new Error(await errorDetail(created, 'Failed to start upload'));
+  const session: UploadSession = await created.json();
+
+  let offset = 0;
+  let failures = 0;
+  while (offset < file.size) {
+    try {
+      const response = await fetch(`${API}/${session.id}`, {
+        method: 'PUT',
+        headers: { ...headers, 'Upload-Offset': String(offset) },
+        body: file.slice(offset, offset + session.max_chunk_size)
+      });
+      if (response.ok) {
+        offset = (await response.json()).offset;
+        failures = 0;
+      } else if (response.status === 409) {
+        // Out of step with the server (e.g. a retried chunk had landed): resume from its offset
+        offset = Number(response.headers.get('Upload-Offset') ?? offset);
+        failures += 1;
+      } else {
+        throw new Error(await errorDetail(response, 'Failed to upload document'));
+      }
+    } catch (error) {
+      if (!(error instanceof TypeError)) throw error;  // only network errors are retried
+      failures += 1;
+      await sleep(1000 * failures);
+      const status = await fetch(`${API}/${session.id}`, { headers }).catch(() => null);
+      if (status?.ok) offset = (await status.json()).offset;
+    }
+    if (failures > MAX_RETRIES) throw new Error('Upload interrupted, please try again');
+    options.onProgress?.(offset / file.size);
+  }
+
+  const completed = await fetch(`${API}/${session.id}/complete`, { method: 'POST', headers });
+  if (!completed.ok) throw new Error(await errorDetail(completed, 'Failed to upload document'));
+  return completed.json();
+};